@@ -4,15 +4,25 @@ Foundation Phase with secure defaults
 """
 
 import os
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+_env_loaded = False
+
+def _load_environment():
+    """Load .env once per process rather than on every create_app() call"""
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv()
+        _env_loaded = True
 
 def create_app(config=None):
     """Application factory function"""
     
     # Load environment variables
-    load_dotenv()
+    _load_environment()
     
     app = Flask(__name__)
     
@@ -20,17 +30,150 @@ def create_app(config=None):
     app.config.from_mapping(
         # Security
         SECRET_KEY=os.getenv('SECRET_KEY', 'fallback-secret-key-change-in-production'),
+        # Reverse proxies in front of the app whose X-Forwarded-For/-Proto/-Host are trusted
+        # (0 = clients connect directly); login limits, rate limits and audit use the client address
+        TRUSTED_PROXY_HOPS=int(os.getenv('TRUSTED_PROXY_HOPS', 0)),
         
         # Database
         SQLALCHEMY_DATABASE_URI=os.getenv('DATABASE_URL', 'sqlite:///../database/development.db'),
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
         
+        # Database connection pool
+        DB_POOL_SIZE=int(os.getenv('DB_POOL_SIZE', 10)),
+        DB_MAX_OVERFLOW=int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        DB_POOL_TIMEOUT=int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        DB_POOL_RECYCLE=int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        DB_POOL_PRE_PING=os.getenv('DB_POOL_PRE_PING', 'True').lower() == 'true',
+        SQLITE_JOURNAL_MODE=os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        SQLITE_SYNCHRONOUS=os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        
+        # Read replicas (comma-separated URLs); reads fall back to the primary when lagging or down
+        DATABASE_REPLICA_URLS=[url for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url],
+        DB_REPLICA_MAX_LAG=float(os.getenv('DB_REPLICA_MAX_LAG', 5)),
+        DB_REPLICA_CHECK_INTERVAL=float(os.getenv('DB_REPLICA_CHECK_INTERVAL', 10)),
+        
         # JWT
         JWT_SECRET_KEY=os.getenv('JWT_SECRET_KEY', 'fallback-jwt-secret-change-in-production'),
+        JWT_ACCESS_TOKEN_EXPIRES=int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 3600)),
+        # Comma-separated keys still accepted for verification while JWT_SECRET_KEY rotates
+        JWT_PREVIOUS_SECRET_KEYS=[key for key in os.getenv('JWT_PREVIOUS_SECRET_KEYS', '').split(',') if key],
+        # Revocations: reloaded incrementally every REFRESH seconds, bloom filter rebuilt every REBUILD
+        JWT_REVOCATION_REFRESH=float(os.getenv('JWT_REVOCATION_REFRESH', 1.0)),
+        JWT_REVOCATION_REBUILD=float(os.getenv('JWT_REVOCATION_REBUILD', 300)),
+        JWT_REVOCATION_CAPACITY=int(os.getenv('JWT_REVOCATION_CAPACITY', 100000)),
+        JWT_REVOCATION_ERROR_RATE=float(os.getenv('JWT_REVOCATION_ERROR_RATE', 0.001)),
+        
+        # Password hashing: werkzeug method string; stored hashes are upgraded on the next login
+        PASSWORD_HASH_METHOD=os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000'),
+        PASSWORD_HASH_WORKERS=int(os.getenv('PASSWORD_HASH_WORKERS', 0)),  # 0 = one per CPU
+        PASSWORD_HASH_QUEUE=int(os.getenv('PASSWORD_HASH_QUEUE', 64)),  # Logins waiting beyond this get 503
+        PASSWORD_HASH_TIMEOUT=float(os.getenv('PASSWORD_HASH_TIMEOUT', 10)),
+        # Failed login limits, checked before any hashing
+        LOGIN_ATTEMPT_WINDOW=int(os.getenv('LOGIN_ATTEMPT_WINDOW', 900)),
+        LOGIN_MAX_ATTEMPTS_PER_ACCOUNT=int(os.getenv('LOGIN_MAX_ATTEMPTS_PER_ACCOUNT', 5)),
+        LOGIN_MAX_ATTEMPTS_PER_ADDRESS=int(os.getenv('LOGIN_MAX_ATTEMPTS_PER_ADDRESS', 50)),
+        LOGIN_ATTEMPT_CACHE_SIZE=int(os.getenv('LOGIN_ATTEMPT_CACHE_SIZE', 100000)),
+        
+        # Rate limiting: rules in RATE_LIMIT_CONFIG (relative to the backend directory), re-read when it changes
+        RATE_LIMIT_ENABLED=os.getenv('RATE_LIMIT_ENABLED', 'True').lower() == 'true',
+        RATE_LIMIT_CONFIG=os.getenv('RATE_LIMIT_CONFIG', '../security/rate_limiting.json'),
+        RATE_LIMIT_RELOAD_INTERVAL=float(os.getenv('RATE_LIMIT_RELOAD_INTERVAL', 5)),
+        RATE_LIMIT_STORAGE=os.getenv('RATE_LIMIT_STORAGE', 'local'),  # 'redis' shares counters via REDIS_URL
+        RATE_LIMIT_SHARDS=int(os.getenv('RATE_LIMIT_SHARDS', 16)),
+        RATE_LIMIT_MAX_KEYS=int(os.getenv('RATE_LIMIT_MAX_KEYS', 100000)),
+        # Seconds to count per worker after the shared (Redis) store fails, before trying it again
+        RATE_LIMIT_STORE_COOLDOWN=float(os.getenv('RATE_LIMIT_STORE_COOLDOWN', 10)),
         
         # File Uploads
         MAX_CONTENT_LENGTH=int(os.getenv('MAX_CONTENT_LENGTH', 16777216)),  # 16MB
         UPLOAD_FOLDER=os.getenv('UPLOAD_FOLDER', '../uploads'),
+        UPLOAD_CHUNK_SIZE=int(os.getenv('UPLOAD_CHUNK_SIZE', 1048576)),  # 1MB read/hash buffer
+        UPLOAD_MAX_FILE_SIZE=int(os.getenv('UPLOAD_MAX_FILE_SIZE', 10737418240)),  # 10GB, resumable uploads
+        UPLOAD_SESSION_TTL=int(os.getenv('UPLOAD_SESSION_TTL', 86400)),
+        UPLOAD_ACCEL_REDIRECT=os.getenv('UPLOAD_ACCEL_REDIRECT', ''),  # nginx internal location, e.g. /protected-uploads/
+        
+        # Thumbnail/preview worker: SERVER_MODE=worker in production; PREVIEW_EMBEDDED starts it
+        # next to the development server only
+        PREVIEW_EMBEDDED=os.getenv('PREVIEW_EMBEDDED', 'False').lower() == 'true',
+        PREVIEW_SIZES=tuple(int(size) for size in os.getenv('PREVIEW_SIZES', '128,512').split(',')),
+        PREVIEW_WORKERS=int(os.getenv('PREVIEW_WORKERS', 2)),  # Render processes per worker
+        PREVIEW_MAX_ATTEMPTS=int(os.getenv('PREVIEW_MAX_ATTEMPTS', 3)),
+        PREVIEW_RETRY_DELAY=float(os.getenv('PREVIEW_RETRY_DELAY', 30)),  # Doubles with every attempt
+        PREVIEW_POLL_INTERVAL=float(os.getenv('PREVIEW_POLL_INTERVAL', 1.0)),
+        PREVIEW_JOB_TIMEOUT=float(os.getenv('PREVIEW_JOB_TIMEOUT', 300)),  # Running longer = worker crashed
+        
+        # Request metrics on /metrics; requests slower than the threshold (seconds) are logged
+        REQUEST_METRICS_ENABLED=os.getenv('REQUEST_METRICS_ENABLED', 'True').lower() == 'true',
+        SLOW_REQUEST_THRESHOLD=float(os.getenv('SLOW_REQUEST_THRESHOLD', 1.0)),
+        # Directory where gunicorn workers share metrics snapshots ('' = each worker reports its own)
+        METRICS_MULTIPROC_DIR=os.getenv('METRICS_MULTIPROC_DIR', ''),
+        METRICS_MULTIPROC_INTERVAL=float(os.getenv('METRICS_MULTIPROC_INTERVAL', 5)),
+        
+        # SQL fingerprint totals, slow query log (seconds) and EXPLAIN capture; report at /api/admin/slow-queries
+        SLOW_QUERY_LOG_ENABLED=os.getenv('SLOW_QUERY_LOG_ENABLED', 'False').lower() == 'true',
+        SLOW_QUERY_THRESHOLD=float(os.getenv('SLOW_QUERY_THRESHOLD', 0.5)),
+        SLOW_QUERY_EXPLAIN_TOP=int(os.getenv('SLOW_QUERY_EXPLAIN_TOP', 10)),  # Slowest fingerprints kept with a plan
+        SLOW_QUERY_MAX_FINGERPRINTS=int(os.getenv('SLOW_QUERY_MAX_FINGERPRINTS', 1000)),
+        SLOW_QUERY_REPORT_SIZE=int(os.getenv('SLOW_QUERY_REPORT_SIZE', 20)),
+        
+        # Sampling profiler for a fraction of requests, or those whose PROFILING_HEADER carries PROFILING_TOKEN
+        PROFILING_ENABLED=os.getenv('PROFILING_ENABLED', 'False').lower() == 'true',
+        PROFILING_SAMPLE_RATE=float(os.getenv('PROFILING_SAMPLE_RATE', 0.0)),
+        PROFILING_HEADER=os.getenv('PROFILING_HEADER', 'X-Profile'),
+        PROFILING_TOKEN=os.getenv('PROFILING_TOKEN', ''),  # '' = header never triggers profiling
+        PROFILING_INTERVAL=float(os.getenv('PROFILING_INTERVAL', 0.005)),  # Seconds between stack samples
+        PROFILING_DIR=os.getenv('PROFILING_DIR', '../profiles'),  # Shared by the workers
+        PROFILING_RETENTION=float(os.getenv('PROFILING_RETENTION', 86400)),
+        PROFILING_MAX_PROFILES=int(os.getenv('PROFILING_MAX_PROFILES', 1000)),
+        
+        # Health checks
+        HEALTH_PROBE_TTL=float(os.getenv('HEALTH_PROBE_TTL', 5)),
+        HEALTH_PROBE_TIMEOUT=float(os.getenv('HEALTH_PROBE_TIMEOUT', 1)),
+        
+        # Audit log writer (AUDIT_ASYNC=False writes each event synchronously)
+        AUDIT_ASYNC=os.getenv('AUDIT_ASYNC', 'True').lower() == 'true',
+        AUDIT_BATCH_SIZE=int(os.getenv('AUDIT_BATCH_SIZE', 500)),
+        AUDIT_FLUSH_INTERVAL=float(os.getenv('AUDIT_FLUSH_INTERVAL', 1.0)),
+        AUDIT_QUEUE_SIZE=int(os.getenv('AUDIT_QUEUE_SIZE', 10000)),
+        AUDIT_ENQUEUE_TIMEOUT=float(os.getenv('AUDIT_ENQUEUE_TIMEOUT', 0.05)),
+        # Monthly audit_logs partitions (PostgreSQL only) and retention window
+        AUDIT_PARTITIONING=os.getenv('AUDIT_PARTITIONING', 'False').lower() == 'true',
+        AUDIT_RETENTION_MONTHS=int(os.getenv('AUDIT_RETENTION_MONTHS', 24)),
+        
+        # Cache
+        REDIS_URL=os.getenv('REDIS_URL'),
+        PERMISSION_CACHE_SIZE=int(os.getenv('PERMISSION_CACHE_SIZE', 10000)),
+        PERMISSION_CACHE_TTL=float(os.getenv('PERMISSION_CACHE_TTL', 60)),
+        PERMISSION_SHARED_CACHE_TTL=float(os.getenv('PERMISSION_SHARED_CACHE_TTL', 300)),
+        NOTIFICATION_COUNT_CACHE_SIZE=int(os.getenv('NOTIFICATION_COUNT_CACHE_SIZE', 10000)),
+        NOTIFICATION_COUNT_CACHE_TTL=float(os.getenv('NOTIFICATION_COUNT_CACHE_TTL', 30)),
+        NOTIFICATION_COUNT_SHARED_CACHE_TTL=float(os.getenv('NOTIFICATION_COUNT_SHARED_CACHE_TTL', 300)),
+        
+        # Notification fan-out: recipients per INSERT batch and commit
+        NOTIFICATION_FANOUT_CHUNK_SIZE=int(os.getenv('NOTIFICATION_FANOUT_CHUNK_SIZE', 1000)),
+        
+        # Server-Sent Events push server: SERVER_MODE=push in production; PUSH_EMBEDDED starts
+        # it next to the development server only
+        PUSH_PORT=int(os.getenv('PUSH_PORT', 5002)),
+        PUSH_EMBEDDED=os.getenv('PUSH_EMBEDDED', 'False').lower() == 'true',
+        PUSH_HEARTBEAT=float(os.getenv('PUSH_HEARTBEAT', 15)),
+        PUSH_POLL_INTERVAL=float(os.getenv('PUSH_POLL_INTERVAL', 1.0)),
+        PUSH_RESUME_LIMIT=int(os.getenv('PUSH_RESUME_LIMIT', 500)),
+        PUSH_QUEUE_SIZE=int(os.getenv('PUSH_QUEUE_SIZE', 256)),
+        PUSH_TOKEN_MAX_AGE=int(os.getenv('PUSH_TOKEN_MAX_AGE', 3600)),
+        
+        # Tenant resolution: slug header, or subdomain of TENANT_BASE_DOMAIN (e.g. acme.example.com)
+        TENANT_HEADER=os.getenv('TENANT_HEADER', 'X-Tenant'),
+        TENANT_BASE_DOMAIN=os.getenv('TENANT_BASE_DOMAIN'),
+        TENANT_CACHE_SIZE=int(os.getenv('TENANT_CACHE_SIZE', 10000)),
+        TENANT_CACHE_TTL=float(os.getenv('TENANT_CACHE_TTL', 300)),
+        # Sharding: '' (shared database), 'database' (TENANT_SHARD_URL per tenant) or 'schema' (PostgreSQL)
+        TENANT_SHARDING=os.getenv('TENANT_SHARDING', ''),
+        TENANT_SHARD_URL=os.getenv('TENANT_SHARD_URL', 'sqlite:///../database/tenants/{slug}.db'),
+        TENANT_SHARD_SCHEMA_PREFIX=os.getenv('TENANT_SHARD_SCHEMA_PREFIX', 'tenant_'),
+        TENANT_SHARD_ENGINES=int(os.getenv('TENANT_SHARD_ENGINES', 64)),
+        TENANT_SHARD_POOL_SIZE=int(os.getenv('TENANT_SHARD_POOL_SIZE', 2)),
+        TENANT_SHARD_MAX_OVERFLOW=int(os.getenv('TENANT_SHARD_MAX_OVERFLOW', 5)),
         
         # CORS
         CORS_ORIGINS=os.getenv('CORS_ORIGINS', 'http://localhost:5000').split(',')
@@ -40,6 +183,11 @@ def create_app(config=None):
     if config is not None:
         app.config.from_mapping(config)
     
+    # Take the client address and scheme from the trusted proxies' X-Forwarded-* headers
+    hops = app.config['TRUSTED_PROXY_HOPS']
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
+    
     # Initialize extensions
     initialize_extensions(app)
     
@@ -53,18 +201,80 @@ def create_app(config=None):
 
 def initialize_extensions(app):
     """Initialize Flask extensions"""
-    from database.connection import db, init_db
+    from database.connection import db, init_db, configure_engines
     
     # Database
+    configure_engines(app)
     db.init_app(app)
     init_db(app)
     
+    # Request metrics (first, so time spent in every other request hook is included)
+    from app.core.middleware.logging_middleware import request_metrics
+    request_metrics.init_app(app)
+    
+    # Sampling profiler for selected requests (early, so the other hooks are profiled too)
+    from app.core.middleware.profiling_middleware import request_profiler
+    request_profiler.init_app(app)
+    
+    # Login: bounded password hashing pool and attempt limits
+    from app.core.services.auth_service import auth_service
+    auth_service.init_app(app)
+    
+    # Permission resolution cache
+    from app.core.services.permission_service import permission_service
+    permission_service.init_app(app)
+    
+    # Unread notification counters
+    from app.core.services.notification_service import notification_service
+    notification_service.init_app(app)
+    
+    # Batched audit log writer
+    from app.core.services.audit_service import audit_writer
+    audit_writer.init_app(app)
+    
+    # Content-addressed upload store and preview queue
+    from app.core.services.file_service import file_service
+    from app.core.services.preview_service import preview_service
+    file_service.init_app(app)
+    preview_service.init_app(app)
+    
+    # Request -> tenant resolution, query scoping and shard binding
+    from app.core.services.tenant_service import tenant_shards
+    from app.core.middleware.tenant_middleware import tenant_resolver
+    tenant_shards.init_app(app)
+    tenant_resolver.init_app(app)
+    
+    # Bearer token verification (after tenant resolution, so tenant claims can be checked)
+    from app.core.middleware.auth_middleware import jwt_authenticator
+    jwt_authenticator.init_app(app)
+    
+    # Rate limits per tenant, user and route (after authentication, so users are known)
+    from app.core.middleware.rate_limit_middleware import rate_limiter
+    rate_limiter.init_app(app)
+    
     # CORS
     CORS(app, origins=app.config['CORS_ORIGINS'])
 
 def register_routes(app):
     """Register all routes"""
     
+    from app.routes.health import health_bp
+    from app.routes.files import files_bp
+    from app.routes.auth import auth_bp
+    from app.routes.admin import admin_bp
+    
+    # Liveness and readiness probes
+    app.register_blueprint(health_bp)
+    
+    # Authentication
+    app.register_blueprint(auth_bp)
+    
+    # File uploads
+    app.register_blueprint(files_bp)
+    
+    # Operational reports
+    app.register_blueprint(admin_bp)
+    
     # Health check endpoint
     @app.route('/api/health')
     def health_check():
@@ -75,6 +285,12 @@ def register_routes(app):
             'environment': os.getenv('FLASK_ENV', 'development')
         })
     
+    # Prometheus scrape endpoint
+    @app.route('/metrics')
+    def metrics():
+        from app.core.utils.metrics import REGISTRY, CONTENT_TYPE
+        return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+    
     # API documentation endpoint
     @app.route('/api/docs')
     def api_docs():
@@ -83,7 +299,15 @@ def register_routes(app):
             'version': '1.0.0',
             'endpoints': {
                 'health': '/api/health',
-                'auth': '/api/auth/* (coming soon)',
+                'liveness': '/api/health/live',
+                'readiness': '/api/health/ready',
+                'files': '/api/files',
+                'resumable_uploads': '/api/files/uploads',
+                'downloads': '/api/files/<id>/download',
+                'previews': '/api/files/<id>/preview',
+                'login': '/api/auth/login',
+                'logout': '/api/auth/logout',
+                'push_token': '/api/auth/push-token',
                 'maintenance': '/api/maintenance/* (coming soon)',
                 'education': '/api/education/* (coming soon)'
             },
@@ -1,4 +1,371 @@
-# auth_middleware.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+JWT authentication middleware
+Access tokens are verified without touching the database: the HMAC for each signing
+key is prepared once (JWT_SECRET_KEY, plus JWT_PREVIOUS_SECRET_KEYS while keys rotate)
+and the tenant and permission bitset travel as claims. Revocations are checked in
+memory against a bloom filter of revoked token ids, an exact set of revocations made
+since it was built and per-user cutoffs, refreshed incrementally from revoked_tokens.
 
+Permission claims are a snapshot taken at login: added roles reach a user with the
+next token, while deactivation, a new password or a removed role revoke every token
+the user holds.
+"""
 
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from itertools import chain
+
+import jwt
+from flask import g, jsonify, request
+from sqlalchemy import event, inspect, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from database.connection import db
+from database.routing import RoutingSession
+from app.core.models.revoked_token import RevokedToken
+from app.core.models.user import User
+from app.core.services.auth_service import AuthError, key_id
+from app.core.services.permission_service import UserPermissions, permission_service
+from app.core.services.tenant_service import tenant_shards
+from app.core.utils.bloom import BloomFilter
+from app.core.utils.cache import TTLCache
+from app.core.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+TOKENS_REJECTED = REGISTRY.counter('auth_tokens_rejected_total', 'Access tokens refused by reason', ['reason'])
+
+# Re-read revocations this far back on every refresh, so rows committed out of order are not missed
+REFRESH_OVERLAP = timedelta(seconds=5)
+
+
+class InvalidToken(AuthError):
+    """Bad signature, malformed or expired access token"""
+
+
+def _error(status_code, message):
+    return jsonify({'error': message, 'status_code': status_code}), status_code
+
+
+def _epoch(value):
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class RevocationList:
+    """Revoked token ids and per-user cutoffs, held in memory per process
+
+    Reads and writes go to the primary database, also in sharding mode: revocations
+    are global, like the tenant catalog.
+    """
+
+    def __init__(self):
+        self.refresh_interval = 1.0
+        self.rebuild_interval = 300.0
+        self.capacity = 100000
+        self.error_rate = 0.001
+        self.bloom = BloomFilter(1, self.error_rate)
+        self.recent = set()  # Token ids revoked since the bloom filter was built
+        self.cutoffs = {}  # user_id -> epoch; tokens issued at or before it are revoked
+        self.confirmed = TTLCache()  # Bloom filter hits looked up in the database
+        self._built_at = None
+        self._refreshed_at = None
+        self._since = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.refresh_interval = app.config['JWT_REVOCATION_REFRESH']
+        self.rebuild_interval = app.config['JWT_REVOCATION_REBUILD']
+        self.capacity = app.config['JWT_REVOCATION_CAPACITY']
+        self.error_rate = app.config['JWT_REVOCATION_ERROR_RATE']
+        self.confirmed = TTLCache(10000, self.rebuild_interval)
+        self._built_at = self._refreshed_at = None
+
+    def is_revoked(self, user_id, jti, issued_at):
+        if self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.refresh_interval:
+            self.refresh()
+        cutoff = self.cutoffs.get(user_id)
+        if cutoff is not None and issued_at <= cutoff:
+            return True
+        if not jti:
+            return False
+        if jti in self.recent:
+            return True
+        if jti not in self.bloom:
+            return False
+        return self._confirm(jti)
+
+    def _confirm(self, jti):
+        # Bloom filters answer "maybe": one indexed lookup per false positive, then cached
+        revoked = self.confirmed.get(jti)
+        if revoked is None:
+            with db.engine.connect() as connection:
+                revoked = connection.execute(
+                    select(RevokedToken.id).where(RevokedToken.jti == jti)
+                ).first() is not None
+            self.confirmed.set(jti, revoked)
+        return revoked
+
+    def refresh(self):
+        """Load new revocations, or rebuild everything every JWT_REVOCATION_REBUILD seconds"""
+        first = self._built_at is None
+        # Only the first load makes requests wait; later ones answer from the current state
+        if not self._lock.acquire(blocking=first):
+            return
+        try:
+            now = time.monotonic()
+            if self._built_at is None or now - self._built_at >= self.rebuild_interval:
+                self._rebuild()
+            elif now - self._refreshed_at >= self.refresh_interval:
+                self._load_recent()
+        except Exception:
+            if self._built_at is None:
+                raise
+            logger.warning("Refreshing token revocations failed", exc_info=True)
+            self._refreshed_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def _rows(self, condition):
+        with db.engine.connect() as connection:
+            return connection.execute(
+                select(RevokedToken.jti, RevokedToken.user_id, RevokedToken.revoked_before).where(condition)
+            ).all()
+
+    def _rebuild(self):
+        started = datetime.utcnow()
+        rows = self._rows(RevokedToken.expires_at > started)
+        jtis = [jti for jti, _, _ in rows if jti]
+        bloom = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        cutoffs = {}
+        for _, user_id, revoked_before in rows:
+            if revoked_before is not None:
+                cutoffs[user_id] = max(cutoffs.get(user_id, 0), _epoch(revoked_before))
+        # Cleared first: every revocation is still in `recent` until the swap
+        self.confirmed.clear()
+        self.bloom, self.recent, self.cutoffs = bloom, set(), cutoffs
+        self._since = started - REFRESH_OVERLAP
+        self._built_at = self._refreshed_at = time.monotonic()
+
+    def _load_recent(self):
+        started = datetime.utcnow()
+        for jti, user_id, revoked_before in self._rows(RevokedToken.created_at >= self._since):
+            self._apply(jti, user_id, revoked_before)
+        self._since = started - REFRESH_OVERLAP
+        self._refreshed_at = time.monotonic()
+
+    def _apply(self, jti, user_id, revoked_before):
+        if jti:
+            self.recent.add(jti)
+        if revoked_before is not None:
+            self.cutoffs[user_id] = max(self.cutoffs.get(user_id, 0), _epoch(revoked_before))
+
+    def add(self, rows):
+        """Store revocations and apply them to this process at once; other workers follow on refresh"""
+        now = datetime.utcnow()
+        rows = [dict(row, created_at=now, updated_at=now, is_active=True) for row in rows]
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(insert(RevokedToken), rows)
+        except IntegrityError:
+            # Already revoked (e.g. a repeated logout); nothing else to record
+            if len(rows) > 1 or not rows[0].get('jti'):
+                raise
+        for row in rows:
+            self._apply(row.get('jti'), row['user_id'], row.get('revoked_before'))
+
+
+class JWTAuthenticator:
+    """Verifies Bearer access tokens and sets g.user_id, g.permissions and g.token_claims"""
+
+    def __init__(self):
+        self.revocations = RevocationList()
+        self.access_token_expires = 3600
+        self._macs = {}  # kid -> HMAC primed with the key
+        self._headers = {}  # Encoded header segment of our own tokens -> HMAC
+        self._current = None
+
+    def init_app(self, app):
+        self.access_token_expires = app.config['JWT_ACCESS_TOKEN_EXPIRES']
+        keys = [app.config['JWT_SECRET_KEY'], *app.config['JWT_PREVIOUS_SECRET_KEYS']]
+        self._macs = {key_id(key): hmac.new(key.encode('utf-8'), digestmod=hashlib.sha256) for key in keys}
+        self._current = self._macs[key_id(keys[0])]
+        # Tokens from auth_service all carry one of these headers, so verifying them skips header parsing
+        self._headers = {
+            jwt.encode({}, key, algorithm='HS256', headers={'kid': key_id(key)}).split('.', 1)[0]: self._macs[key_id(key)]
+            for key in keys
+        }
+        self.revocations.init_app(app)
+        app.before_request(self._before_request)
+
+    def _mac_for_header(self, segment):
+        header = json.loads(base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4)))
+        if not isinstance(header, dict) or header.get('alg') != 'HS256':
+            raise InvalidToken('Unsupported token algorithm')
+        if 'kid' not in header:
+            return self._current
+        mac = self._macs.get(header['kid'])
+        if mac is None:
+            raise InvalidToken('Unknown signing key')
+        return mac
+
+    def decode(self, token):
+        """Claims of a valid, unexpired HS256 token; raises InvalidToken"""
+        try:
+            signing_input, _, signature = token.rpartition('.')
+            header, _, payload = signing_input.partition('.')
+            mac = self._headers.get(header) or self._mac_for_header(header)
+            mac = mac.copy()
+            mac.update(signing_input.encode('ascii'))
+            expected = base64.urlsafe_b64encode(mac.digest()).rstrip(b'=')
+            if not hmac.compare_digest(expected, signature.encode('ascii')):
+                raise InvalidToken('Invalid token signature')
+            claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        except ValueError:  # Also base64, JSON and non-ASCII errors
+            raise InvalidToken('Malformed token')
+        if not isinstance(claims, dict):
+            raise InvalidToken('Malformed token')
+        expires = claims.get('exp')
+        if not isinstance(expires, (int, float)) or expires <= time.time():
+            raise InvalidToken('Token has expired')
+        return claims
+
+    @staticmethod
+    def _anonymous(state):
+        state.user_id = None
+        state.permissions = None
+        state.token_claims = None
+
+    def _reject(self, state, status_code, message, reason):
+        self._anonymous(state)
+        TOKENS_REJECTED.inc(reason=reason)
+        return _error(status_code, message)
+
+    def _before_request(self):
+        # Runs on every request: resolve the context-local proxies once
+        state = g._get_current_object()
+        authorization = request.environ.get('HTTP_AUTHORIZATION')
+        if not authorization:
+            return self._anonymous(state)
+        scheme, _, token = authorization.partition(' ')
+        if scheme.lower() != 'bearer' or not token:
+            return self._reject(state, 401, 'Expected a Bearer token', 'malformed')
+        try:
+            claims = self.decode(token.strip())
+            user_id = int(claims['sub'])
+            issued_at = float(claims.get('iat', 0))
+            mask = int(claims.get('perms', '0'), 16)
+        except InvalidToken as e:
+            return self._reject(state, 401, str(e), 'invalid')
+        except (KeyError, TypeError, ValueError):
+            return self._reject(state, 401, 'Malformed token', 'malformed')
+        if self.revocations.is_revoked(user_id, claims.get('jti'), issued_at):
+            return self._reject(state, 401, 'Token has been revoked', 'revoked')
+
+        tenant_id = claims.get('tenant')
+        request_tenant_id = getattr(state, 'tenant_id', None)
+        if request_tenant_id is None:
+            if tenant_id is not None:
+                if tenant_shards.enabled:
+                    # Shards are bound by slug, which only the tenant header or host carries
+                    return self._reject(state, 400, 'Name the tenant with the tenant header or host', 'tenant')
+                state.tenant_id = tenant_id
+                db.session.info['tenant_id'] = tenant_id
+        elif tenant_id != request_tenant_id:
+            return self._reject(state, 403, 'Token was issued for another tenant', 'tenant')
+
+        state.user_id = user_id
+        state.permissions = UserPermissions(user_id, mask)
+        state.token_claims = claims
+        return None
+
+    # Revocation
+
+    def revoke(self, claims, reason='logout'):
+        """Revoke one token by its jti"""
+        self.revocations.add([{
+            'jti': claims['jti'],
+            'user_id': int(claims['sub']),
+            'expires_at': datetime.utcfromtimestamp(claims['exp']),
+            'reason': reason
+        }])
+
+    def revoke_users(self, user_ids, reason='logout_all'):
+        """Revoke every token issued so far to each of `user_ids`"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.access_token_expires)
+        self.revocations.add([
+            {'user_id': user_id, 'revoked_before': now, 'expires_at': expires_at, 'reason': reason}
+            for user_id in user_ids
+        ])
+
+
+jwt_authenticator = JWTAuthenticator()
+
+
+def login_required(view):
+    """Answer 401 unless the request carries a valid access token"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if g.get('user_id') is None:
+            return _error(401, 'Authentication required')
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def permission_required(module, action):
+    """Answer 403 unless the token's permission claims grant module:action"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if g.get('user_id') is None:
+                return _error(401, 'Authentication required')
+            bit = permission_service.bit_for(module, action)
+            if bit is None or not g.permissions.has_bit(bit):
+                return _error(403, 'Permission denied')
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _collect_credential_changes(session, flush_context, instances):
+    """Record users whose tokens the pending flush invalidates"""
+    pending = session.info.setdefault('token_revocations', set())
+    rehashed = session.info.get('password_rehashed', ())
+    for obj in chain(session.dirty, session.deleted):
+        if not isinstance(obj, User):
+            continue
+        attrs = inspect(obj).attrs
+        if (
+            obj in session.deleted
+            or (attrs.is_active.history.has_changes() and not obj.is_active)
+            or (attrs.password_hash.history.has_changes() and obj.id not in rehashed)
+            or attrs.roles.history.deleted
+        ):
+            pending.add(obj.id)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _apply_credential_revocations(session):
+    session.info.pop('password_rehashed', None)
+    pending = session.info.pop('token_revocations', None)
+    if pending:
+        try:
+            jwt_authenticator.revoke_users(pending, reason='credentials_changed')
+        except Exception:
+            logger.exception("Revoking tokens of users %s failed", sorted(pending))
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_credential_revocations(session):
+    session.info.pop('token_revocations', None)
+    session.info.pop('password_rehashed', None)
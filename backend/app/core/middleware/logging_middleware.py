@@ -1,4 +1,138 @@
-# logging_middleware.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+Request metrics and slow request logging
+Records for /metrics, per route (the URL rule, so ids never become labels): latency,
+status counts, response sizes, and the number and duration of SQL statements each
+request ran, counted by cursor execution events. Label children are cached per
+route, so a request costs a few dict lookups and lock-protected additions. Requests
+slower than SLOW_REQUEST_THRESHOLD are logged with their SQL totals.
+"""
 
+import contextvars
+import logging
+import time
 
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Time from the first before_request hook to the returned response',
+    ['method', 'route'], buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+REQUESTS = REGISTRY.counter('http_requests_total', 'Requests handled by status', ['method', 'route', 'status'])
+REQUESTS_IN_FLIGHT = REGISTRY.gauge('http_requests_in_flight', 'Requests currently being handled')
+RESPONSE_BYTES = REGISTRY.histogram(
+    'http_response_size_bytes', 'Response body size, when known before streaming', ['route'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+)
+REQUEST_SQL_QUERIES = REGISTRY.histogram(
+    'http_request_sql_queries', 'SQL statements executed per request', ['route'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+)
+REQUEST_SQL_SECONDS = REGISTRY.histogram(
+    'http_request_sql_seconds', 'Time spent executing SQL per request', ['route']
+)
+
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+# [start, SQL statements, SQL seconds] of the request running in this context; None outside requests,
+# so background threads (audit writer, preview worker) are never counted
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class _RouteMetrics:
+    __slots__ = ('duration', 'size', 'queries', 'sql_seconds', 'statuses')
+
+    def __init__(self, method, route):
+        self.duration = REQUEST_SECONDS.labels(method=method, route=route)
+        self.size = RESPONSE_BYTES.labels(route=route)
+        self.queries = REQUEST_SQL_QUERIES.labels(route=route)
+        self.sql_seconds = REQUEST_SQL_SECONDS.labels(route=route)
+        self.statuses = {}
+
+
+class RequestMetrics:
+    """Flask hooks recording request metrics; register before every other before_request hook"""
+
+    def __init__(self):
+        self.slow_threshold = 1.0
+        self._routes = {}  # (method, route) -> _RouteMetrics
+        self._in_flight = REQUESTS_IN_FLIGHT.labels()
+
+    def init_app(self, app):
+        if not app.config['REQUEST_METRICS_ENABLED']:
+            return
+        self.slow_threshold = app.config['SLOW_REQUEST_THRESHOLD']
+        app.before_request(self._before_request)
+        # after_request hooks run in reverse order: this one runs last and sees the final response
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def _before_request(self):
+        if _current.get() is None:
+            self._in_flight.inc()
+        _current.set([time.perf_counter(), 0, 0.0])
+
+    def _route_metrics(self, method, route):
+        metrics = self._routes.get((method, route))
+        if metrics is None:
+            metrics = self._routes[(method, route)] = _RouteMetrics(method, route)
+        return metrics
+
+    def _after_request(self, response):
+        state = _current.get()
+        if state is None:
+            return response
+        elapsed = time.perf_counter() - state[0]
+        rule = request.url_rule
+        route = rule.rule if rule is not None else 'unmatched'
+        method = request.method
+        if method not in METHODS:
+            method = 'other'
+
+        metrics = self._route_metrics(method, route)
+        metrics.duration.observe(elapsed)
+        status = metrics.statuses.get(response.status_code)
+        if status is None:
+            status = metrics.statuses[response.status_code] = REQUESTS.labels(
+                method=method, route=route, status=response.status_code
+            )
+        status.inc()
+        size = response.content_length
+        if size is not None:
+            metrics.size.observe(size)
+        metrics.queries.observe(state[1])
+        metrics.sql_seconds.observe(state[2])
+
+        if elapsed >= self.slow_threshold:
+            logger.warning("Slow request %s %s (%s) took %.0f ms: %d SQL statements, %.0f ms in SQL",
+                           method, request.path, route, elapsed * 1000, state[1], state[2] * 1000)
+        return response
+
+    def _teardown_request(self, exc=None):
+        if _current.get() is not None:
+            self._in_flight.dec()
+            _current.set(None)
+
+
+request_metrics = RequestMetrics()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None and context is not None:
+        context._request_metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    state = _current.get()
+    start = getattr(context, '_request_metrics_start', None)
+    if state is not None and start is not None:
+        state[1] += 1
+        state[2] += time.perf_counter() - start
@@ -0,0 +1,93 @@
+"""
+Request profiling
+With PROFILING_ENABLED, a PROFILING_SAMPLE_RATE fraction of requests and every request
+whose PROFILING_HEADER carries PROFILING_TOKEN are profiled by the sampling profiler.
+The collapsed stacks are saved with the route to the profile store in PROFILING_DIR,
+and the response gets the profile id in X-Profile-Id. Aggregates per route can be
+downloaded from /api/admin/profiles. When disabled no hook is registered, so requests
+pay nothing.
+"""
+
+import hmac
+import logging
+import random
+import threading
+import time
+
+from flask import g, request
+
+from app.core.utils.metrics import REGISTRY
+from app.core.utils.profiling import ProfileStore, SamplingProfiler
+
+logger = logging.getLogger(__name__)
+
+PROFILED_REQUESTS = REGISTRY.counter('profiled_requests_total', 'Requests run under the sampling profiler', ['trigger'])
+
+
+class RequestProfiler:
+    """Flask hooks choosing requests to profile and saving their stacks"""
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.header = 'X-Profile'
+        self.token = b''
+        self.profiler = SamplingProfiler()
+        self.store = None
+
+    def init_app(self, app):
+        self.enabled = app.config['PROFILING_ENABLED']
+        self.store = ProfileStore(app.config['PROFILING_DIR'], app.config['PROFILING_RETENTION'],
+                                  app.config['PROFILING_MAX_PROFILES'])
+        if not self.enabled:
+            return
+        self.sample_rate = app.config['PROFILING_SAMPLE_RATE']
+        self.header = app.config['PROFILING_HEADER']
+        self.token = app.config['PROFILING_TOKEN'].encode('utf-8')
+        self.profiler.interval = app.config['PROFILING_INTERVAL']
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _trigger(self):
+        if self.token:
+            presented = request.headers.get(self.header)
+            if presented is not None and hmac.compare_digest(presented.encode('utf-8'), self.token):
+                return 'header'
+        if self.sample_rate and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    def _before_request(self):
+        trigger = self._trigger()
+        if trigger is None:
+            return
+        PROFILED_REQUESTS.inc(trigger=trigger)
+        state = g._get_current_object()
+        state.profile = (threading.get_ident(), time.perf_counter())
+        self.profiler.start(state.profile[0])
+
+    def _after_request(self, response):
+        profile = g.get('profile')
+        if profile is None:
+            return response
+        stacks = self.profiler.stop(profile[0])
+        g.profile = None
+        rule = request.url_rule
+        route = f"{request.method} {rule.rule if rule is not None else 'unmatched'}"
+        try:
+            profile_id = self.store.save(route, time.perf_counter() - profile[1], stacks or {})
+        except OSError as e:
+            logger.warning("Could not save profile for %s: %s", route, e)
+        else:
+            response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    def _teardown_request(self, exc=None):
+        # Requests that failed before after_request still stop being sampled
+        profile = g.get('profile')
+        if profile is not None:
+            self.profiler.stop(profile[0])
+
+
+request_profiler = RequestProfiler()
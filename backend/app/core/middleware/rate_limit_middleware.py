@@ -0,0 +1,261 @@
+"""
+Rate limiting middleware
+Rules come from RATE_LIMIT_CONFIG (security/rate_limiting.json; a relative path is
+taken from the backend directory, not the working directory) and are reloaded when
+the file changes, checked at most every RATE_LIMIT_RELOAD_INTERVAL seconds, so limits
+change without a restart; a file that fails to parse keeps the previous rules.
+
+    {
+      "enabled": true,
+      "exempt": ["/api/health*", "/metrics"],
+      "rules": [
+        {"name": "login", "paths": ["/api/auth/login"], "methods": ["POST"], "key": ["ip"],
+         "algorithm": "sliding_window", "limit": 20, "window": 60},
+        {"name": "per-user", "paths": ["/api/*"], "key": ["user", "route"],
+         "algorithm": "token_bucket", "rate": 20, "burst": 60}
+      ]
+    }
+
+`paths` are glob patterns matched against the route (e.g. /api/files/<int:upload_id>).
+Every matching rule must admit a request. `key` combines "tenant", "user", "route"
+and "ip"; anonymous requests are keyed by address instead of user, and rules keyed by
+tenant skip requests without one. Refused requests get 429 with Retry-After.
+Addresses are request.remote_addr, the client's own only when TRUSTED_PROXY_HOPS
+matches the reverse proxies in front of the app.
+"""
+
+import fnmatch
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from flask import g, jsonify, request
+
+from app.core.utils.metrics import REGISTRY
+from app.core.utils.rate_limit import LocalRateLimitStore, create_rate_limit_store
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITED = REGISTRY.counter('rate_limit_rejected_total', 'Requests refused by the rate limiter', ['rule'])
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+ALGORITHMS = ('token_bucket', 'sliding_window')
+KEY_PARTS = ('tenant', 'user', 'route', 'ip')
+
+
+class RateLimitRule:
+    """One entry of the rules list, validated"""
+
+    __slots__ = ('name', 'pattern', 'methods', 'key', 'algorithm', 'limit', 'rate', 'burst', 'window')
+
+    def __init__(self, spec):
+        self.name = str(spec['name'])
+        paths = spec.get('paths') or ['*']
+        self.pattern = re.compile('|'.join(fnmatch.translate(path) for path in paths))
+        self.methods = frozenset(method.upper() for method in spec.get('methods') or ())
+        self.key = tuple(spec.get('key') or ('user',))
+        if not set(self.key) <= set(KEY_PARTS):
+            raise ValueError(f"Rule {self.name!r}: key parts must be among {', '.join(KEY_PARTS)}")
+        self.algorithm = spec.get('algorithm', 'token_bucket')
+        if self.algorithm == 'token_bucket':
+            self.rate = float(spec['rate'])
+            self.burst = float(spec.get('burst', self.rate))
+            self.limit = int(self.burst)
+            if self.rate <= 0 or self.burst < 1:
+                raise ValueError(f'Rule {self.name!r}: rate must be positive and burst at least 1')
+        elif self.algorithm == 'sliding_window':
+            self.limit = int(spec['limit'])
+            self.window = float(spec['window'])
+            if self.window <= 0:
+                raise ValueError(f'Rule {self.name!r}: window must be positive')
+        else:
+            raise ValueError(f"Rule {self.name!r}: algorithm must be one of {', '.join(ALGORITHMS)}")
+
+    def matches(self, route, method):
+        return (not self.methods or method in self.methods) and self.pattern.match(route) is not None
+
+    def check(self, store, key):
+        if self.algorithm == 'token_bucket':
+            return store.token_bucket(key, self.rate, self.burst)
+        return store.sliding_window(key, self.limit, self.window)
+
+
+class RateLimitConfig:
+    """Parsed rate_limiting.json; an empty or missing file disables limiting"""
+
+    def __init__(self, spec=None):
+        spec = spec or {}
+        self.enabled = bool(spec.get('enabled', True)) and bool(spec.get('rules'))
+        exempt = spec.get('exempt') or ()
+        self.exempt = re.compile('|'.join(fnmatch.translate(path) for path in exempt)) if exempt else None
+        self.rules = [RateLimitRule(rule) for rule in spec.get('rules') or ()]
+        names = [rule.name for rule in self.rules]
+        if len(set(names)) != len(names):
+            raise ValueError('Rule names must be unique')
+
+    def rules_for(self, route, method):
+        if self.exempt is not None and self.exempt.match(route):
+            return []
+        return [rule for rule in self.rules if rule.matches(route, method)]
+
+
+class RateLimiter:
+    """Applies the configured rules to every request"""
+
+    def __init__(self):
+        self.config = RateLimitConfig()
+        self.store = LocalRateLimitStore()
+        self.fallback = self.store
+        self.store_cooldown = 10.0
+        self._store_down_until = 0.0
+        self.path = None
+        self.reload_interval = 5.0
+        self._checked_at = 0.0
+        self._mtime = None
+        self._matches = {}  # (route, method) -> rules, rebuilt on reload
+        self._reload_lock = threading.Lock()
+
+    def init_app(self, app):
+        if not app.config['RATE_LIMIT_ENABLED']:
+            return
+        self.path = os.path.join(_BACKEND_DIR, app.config['RATE_LIMIT_CONFIG'])
+        self.reload_interval = app.config['RATE_LIMIT_RELOAD_INTERVAL']
+        shards, max_keys = app.config['RATE_LIMIT_SHARDS'], app.config['RATE_LIMIT_MAX_KEYS']
+        self.store = create_rate_limit_store(app.config['RATE_LIMIT_STORAGE'], app.config['REDIS_URL'], shards, max_keys)
+        # Used when the shared store is unreachable: limits then hold per worker instead of failing open
+        self.fallback = self.store if isinstance(self.store, LocalRateLimitStore) else LocalRateLimitStore(shards, max_keys)
+        self.store_cooldown = app.config['RATE_LIMIT_STORE_COOLDOWN']
+        self._store_down_until = 0.0
+        self._mtime = None
+        self.reload()
+        REGISTRY.gauge('rate_limit_keys', 'Rate limit counters held in this process',
+                       callback=lambda: [({}, len(self.fallback))])
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    # Configuration
+
+    def reload(self):
+        """Re-read the rules file if it changed since the last load"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        try:
+            if mtime is None:
+                logger.error("Rate limiting disabled: %s does not exist", self.path)
+                config = RateLimitConfig()
+            else:
+                with open(self.path, encoding='utf-8') as source:
+                    config = RateLimitConfig(json.load(source))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error("Keeping previous rate limits, %s is invalid: %s", self.path, e)
+            return
+        self.config, self._matches = config, {}
+        if mtime is not None:
+            logger.info("Loaded %d rate limit rules from %s", len(config.rules), self.path)
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval or not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            self._checked_at = now
+            self.reload()
+        finally:
+            self._reload_lock.release()
+
+    # Requests
+
+    def _rules_for(self, config, method):
+        rule = request.url_rule
+        if rule is None:
+            # Unrouted paths are matched as they come and never cached, so they cannot grow the cache
+            return config.rules_for(request.path, method)
+        matches = self._matches.get((rule.rule, method))
+        if matches is None:
+            matches = self._matches[(rule.rule, method)] = config.rules_for(rule.rule, method)
+        return matches
+
+    def _key(self, rule, state):
+        parts = [rule.name]
+        for part in rule.key:
+            if part == 'tenant':
+                tenant_id = getattr(state, 'tenant_id', None)
+                if tenant_id is None:
+                    return None
+                parts.append(f't{tenant_id}')
+            elif part == 'user':
+                user_id = getattr(state, 'user_id', None)
+                parts.append(f'u{user_id}' if user_id is not None else f'a{request.remote_addr}')
+            elif part == 'route':
+                parts.append(request.endpoint or request.path)
+            else:
+                parts.append(f'a{request.remote_addr}')
+        return '|'.join(parts)
+
+    def _check(self, rule, key):
+        store = self.store
+        # Circuit breaker: after a failure, skip the shared store for the cooldown rather
+        # than wait out its timeout on every rule of every request
+        if store is not self.fallback and time.monotonic() < self._store_down_until:
+            store = self.fallback
+        try:
+            return rule.check(store, key)
+        except Exception:
+            if store is self.fallback:
+                raise
+            self._store_down_until = time.monotonic() + self.store_cooldown
+            logger.warning("Shared rate limit store unavailable, limiting per worker for %ss",
+                           self.store_cooldown, exc_info=True)
+            return rule.check(self.fallback, key)
+
+    def _before_request(self):
+        method = request.method
+        if method == 'OPTIONS':
+            return None
+        self._maybe_reload()
+        config = self.config
+        if not config.enabled:
+            return None
+        rules = self._rules_for(config, method)
+        if not rules:
+            return None
+
+        state = g._get_current_object()
+        tightest = None
+        for rule in rules:
+            key = self._key(rule, state)
+            if key is None:
+                continue
+            allowed, remaining, retry_after = self._check(rule, key)
+            if not allowed:
+                RATE_LIMITED.inc(rule=rule.name)
+                response = jsonify({'error': 'Rate limit exceeded', 'status_code': 429, 'rule': rule.name})
+                return response, 429, {
+                    'Retry-After': str(max(int(retry_after + 0.999), 1)),
+                    'RateLimit-Limit': str(rule.limit),
+                    'RateLimit-Remaining': '0'
+                }
+            if tightest is None or remaining < tightest[1]:
+                tightest = (rule.limit, remaining)
+        state.rate_limit = tightest
+        return None
+
+    @staticmethod
+    def _after_request(response):
+        limit = g.get('rate_limit')
+        if limit is not None:
+            response.headers['RateLimit-Limit'] = str(limit[0])
+            response.headers['RateLimit-Remaining'] = str(limit[1])
+        return response
+
+
+rate_limiter = RateLimiter()
@@ -1,4 +1,99 @@
-# tenant_middleware.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+Tenant resolution middleware
+Maps each request to a tenant from the TENANT_HEADER header (a tenant slug) or the
+subdomain of TENANT_BASE_DOMAIN, through an in-process cache instead of a database
+lookup per request, and scopes the request's session to that tenant (and, in
+sharding mode, binds it to the tenant's shard)
+"""
 
+from itertools import chain
 
+from flask import g, jsonify, request
+from sqlalchemy import event, select
+
+from database.connection import db
+from database.routing import RoutingSession
+from app.core.models.tenant import Tenant
+from app.core.services.tenant_service import tenant_shards
+from app.core.utils.cache import TTLCache
+
+# Cached for slugs that match no active tenant, so unknown hosts cannot force lookups
+_UNKNOWN = 0
+
+
+class TenantResolver:
+    """Resolves tenant slugs to ids with an LRU + TTL cache"""
+
+    def __init__(self):
+        self.cache = TTLCache()
+        self.header = 'X-Tenant'
+        self.base_domain = None
+
+    def init_app(self, app):
+        self.cache = TTLCache(app.config['TENANT_CACHE_SIZE'], app.config['TENANT_CACHE_TTL'])
+        self.header = app.config['TENANT_HEADER']
+        base_domain = app.config['TENANT_BASE_DOMAIN']
+        self.base_domain = f".{base_domain.lower().lstrip('.')}" if base_domain else None
+        app.before_request(self._before_request)
+
+    def slug_for_request(self):
+        """Tenant slug named by the request header or host, or None"""
+        slug = request.headers.get(self.header)
+        if slug:
+            return slug.strip().lower()
+        if self.base_domain:
+            host = request.host.split(':', 1)[0].lower()
+            if host.endswith(self.base_domain):
+                subdomain = host[:-len(self.base_domain)]
+                if subdomain and '.' not in subdomain:
+                    return subdomain
+        return None
+
+    def resolve(self, slug):
+        """Tenant id for an active tenant slug, or None"""
+        tenant_id = self.cache.get(slug)
+        if tenant_id is None:
+            tenant_id = db.session.execute(
+                select(Tenant.id).where(Tenant.slug == slug, Tenant.is_active.is_(True))
+            ).scalar() or _UNKNOWN
+            self.cache.set(slug, tenant_id)
+        return tenant_id or None
+
+    def invalidate(self):
+        """Forget every cached slug, e.g. after tenants are renamed or deactivated"""
+        self.cache.clear()
+
+    def _before_request(self):
+        g.tenant_id = None
+        slug = self.slug_for_request()
+        if slug is None:
+            return None
+        tenant_id = self.resolve(slug)
+        if tenant_id is None:
+            return jsonify({'error': 'Unknown tenant'}), 404
+        g.tenant_id = tenant_id
+        db.session.info['tenant_id'] = tenant_id
+        if tenant_shards.enabled:
+            tenant_shards.bind_session(db.session, slug)
+        return None
+
+
+tenant_resolver = TenantResolver()
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _collect_tenant_changes(session, flush_context, instances):
+    if any(isinstance(obj, Tenant) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info['tenant_registry_changed'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _apply_tenant_invalidation(session):
+    if session.info.pop('tenant_registry_changed', False):
+        tenant_resolver.invalidate()
+        tenant_shards.invalidate()
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_tenant_invalidation(session):
+    session.info.pop('tenant_registry_changed', None)
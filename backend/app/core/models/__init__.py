@@ -1,20 +1,27 @@
 # Core models package
 from .base_model import BaseModel
+from .tenant_owned import TenantOwnedMixin
 from .tenant import Tenant
 from .user import User
 from .role import Role
 from .permission import Permission
 from .audit_log import AuditLog
 from .notification import Notification
-from .file_upload import FileUpload
+from .file_upload import FileUpload, UploadSession
+from .preview_job import PreviewJob
+from .revoked_token import RevokedToken
 
 __all__ = [
     'BaseModel',
+    'TenantOwnedMixin',
     'Tenant',
     'User', 
     'Role',
     'Permission',
     'AuditLog',
     'Notification',
-    'FileUpload'
+    'FileUpload',
+    'UploadSession',
+    'PreviewJob',
+    'RevokedToken'
 ]
\ No newline at end of file
@@ -1,11 +1,19 @@
 from datetime import datetime
 from database.connection import db
 from .base_model import BaseModel
+from .tenant_owned import TenantOwnedMixin
 
-class AuditLog(BaseModel):
+class AuditLog(TenantOwnedMixin, BaseModel):
     """Audit log for tracking user actions"""
     __tablename__ = 'audit_logs'
+    __table_args__ = (
+        # full history of a single resource
+        db.Index('ix_audit_logs_resource', 'resource_type', 'resource_id', 'created_at'),
+        db.Index('ix_audit_logs_created', 'created_at'),
+    )
     
+    # Nullable: system events are not tied to a tenant
+    tenant_id = db.Column(db.Integer, db.ForeignKey('tenants.id'))
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     action = db.Column(db.String(100), nullable=False)  # e.g., 'login', 'create', 'update'
     resource_type = db.Column(db.String(100))  # e.g., 'User', 'MaintenanceRequest'
@@ -17,10 +25,16 @@ class AuditLog(BaseModel):
     # Relationship
     user = db.relationship('User', backref=db.backref('audit_logs', lazy=True))
     
+    __serialize_relationships__ = {'user': 'joined'}
+    
+    # "actions by user X in tenant T last week"
+    __tenant_indexes__ = (('user_id', 'created_at'),)
+    
     def to_dict(self):
         """Convert audit log to dictionary"""
         base_dict = super().to_dict()
         base_dict.update({
+            'tenant_id': self.tenant_id,
             'user_id': self.user_id,
             'action': self.action,
             'resource_type': self.resource_type,
@@ -1,6 +1,11 @@
+from contextlib import contextmanager
 from datetime import datetime
+from sqlalchemy.orm import joinedload, selectinload
 from database.connection import db
 
+# Rows per executemany batch; keeps IN lists and bound parameters under SQLite's limits
+BULK_CHUNK_SIZE = 500
+
 class BaseModel(db.Model):
     """Base model with common fields for all models"""
     __abstract__ = True
@@ -10,16 +15,89 @@ class BaseModel(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     
+    # Relationships read by to_dict(), mapped to the loader strategy list queries should use
+    __serialize_relationships__ = {}
+    
+    # Columns never emitted by the compiled serializer (e.g. secrets)
+    __serialize_exclude__ = ()
+    
     def save(self):
         """Save the model to the database"""
         db.session.add(self)
-        db.session.commit()
+        self._commit()
     
     def delete(self):
         """Soft delete the model"""
         self.is_active = False
         self.save()
     
+    @staticmethod
+    def _commit():
+        """Commit the session unless a deferred_commit() block is open"""
+        if not db.session.info.get('deferred_commit_depth'):
+            db.session.commit()
+    
+    @staticmethod
+    @contextmanager
+    def deferred_commit():
+        """Collect every save()/delete() in the block into a single commit"""
+        info = db.session.info
+        info['deferred_commit_depth'] = info.get('deferred_commit_depth', 0) + 1
+        try:
+            yield db.session
+        except Exception:
+            info['deferred_commit_depth'] -= 1
+            db.session.rollback()
+            raise
+        info['deferred_commit_depth'] -= 1
+        if not info['deferred_commit_depth']:
+            db.session.commit()
+    
+    @classmethod
+    def bulk_save(cls, objs):
+        """Insert or update many model instances with batched statements and one commit"""
+        objs = list(objs)
+        db.session.bulk_save_objects(objs)
+        cls._commit()
+        return len(objs)
+    
+    @classmethod
+    def bulk_insert(cls, rows, chunk_size=BULK_CHUNK_SIZE):
+        """Insert plain column dicts via executemany without building ORM instances"""
+        rows = list(rows)
+        statement = cls.__table__.insert()
+        for start in range(0, len(rows), chunk_size):
+            db.session.execute(statement, rows[start:start + chunk_size])
+        cls._commit()
+        return len(rows)
+    
+    @classmethod
+    def bulk_soft_delete(cls, ids, chunk_size=BULK_CHUNK_SIZE):
+        """Soft delete many rows by primary key with one UPDATE per chunk"""
+        ids = list(ids)
+        updated = 0
+        for start in range(0, len(ids), chunk_size):
+            updated += cls.query.filter(cls.id.in_(ids[start:start + chunk_size])).update(
+                {cls.is_active: False}, synchronize_session='evaluate'
+            )
+        cls._commit()
+        return updated
+    
+    @classmethod
+    def eager_load_options(cls):
+        """Loader options that preload every relationship to_dict() touches"""
+        loaders = {'selectin': selectinload, 'joined': joinedload}
+        return [
+            loaders[strategy](getattr(cls, name))
+            for name, strategy in cls.__serialize_relationships__.items()
+        ]
+    
+    @classmethod
+    def serializer(cls, fields=None):
+        """Compiled column serializer for this model, optionally projected to `fields`"""
+        from .serializer import get_serializer
+        return get_serializer(cls, tuple(fields) if fields else None)
+    
     def to_dict(self):
         """Convert model to dictionary"""
         return {
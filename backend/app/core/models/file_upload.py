@@ -1,6 +1,14 @@
 from database.connection import db
 from .base_model import BaseModel
 
+# Content-addressed store: one row (and one file) per distinct SHA-256, shared by every upload of it
+file_blobs = db.Table('file_blobs',
+    db.Column('content_hash', db.String(64), primary_key=True),
+    db.Column('size', db.BigInteger, nullable=False),
+    db.Column('ref_count', db.Integer, nullable=False, default=0),
+    db.Column('created_at', db.DateTime, default=db.func.current_timestamp())
+)
+
 class FileUpload(BaseModel):
     """File upload model for storing file metadata"""
     __tablename__ = 'file_uploads'
@@ -9,9 +17,10 @@ class FileUpload(BaseModel):
     filename = db.Column(db.String(255), nullable=False)
     original_filename = db.Column(db.String(255), nullable=False)
     file_path = db.Column(db.String(500), nullable=False)
-    file_size = db.Column(db.Integer)  # Size in bytes
+    file_size = db.Column(db.BigInteger)  # Size in bytes
     mime_type = db.Column(db.String(100))
     description = db.Column(db.Text)
+    content_hash = db.Column(db.String(64), index=True)  # SHA-256 of the content, key into file_blobs
     
     # Relationship
     user = db.relationship('User', backref=db.backref('file_uploads', lazy=True))
@@ -26,6 +35,33 @@ class FileUpload(BaseModel):
             'file_path': self.file_path,
             'file_size': self.file_size,
             'mime_type': self.mime_type,
-            'description': self.description
+            'description': self.description,
+            'content_hash': self.content_hash
+        })
+        return base_dict
+
+class UploadSession(BaseModel):
+    """Resumable upload in progress; chunks are appended to a part file until `offset` reaches `total_size`"""
+    __tablename__ = 'upload_sessions'
+    
+    token = db.Column(db.String(64), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    original_filename = db.Column(db.String(255), nullable=False)
+    mime_type = db.Column(db.String(100))
+    description = db.Column(db.Text)
+    total_size = db.Column(db.BigInteger, nullable=False)
+    offset = db.Column(db.BigInteger, nullable=False, default=0)
+    file_upload_id = db.Column(db.Integer, db.ForeignKey('file_uploads.id'))  # Set once complete
+    
+    def to_dict(self):
+        """Convert upload session to dictionary"""
+        base_dict = super().to_dict()
+        base_dict.update({
+            'upload_id': self.token,
+            'original_filename': self.original_filename,
+            'mime_type': self.mime_type,
+            'total_size': self.total_size,
+            'offset': self.offset,
+            'file_upload_id': self.file_upload_id
         })
-        return base_dict
\ No newline at end of file
+        return base_dict
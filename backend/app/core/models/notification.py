@@ -1,9 +1,22 @@
 from database.connection import db
 from .base_model import BaseModel
 
+# Maintained unread count per user, so the badge never needs COUNT(*) over notifications
+notification_counters = db.Table('notification_counters',
+    db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
+    db.Column('unread', db.Integer, nullable=False, default=0),
+    db.Column('updated_at', db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+)
+
 class Notification(BaseModel):
     """Notification model for user notifications"""
     __tablename__ = 'notifications'
+    __table_args__ = (
+        # Only unread rows are indexed: unread counts and "mark all read" stay small as history grows
+        db.Index('ix_notifications_unread', 'user_id',
+                 postgresql_where=db.text('is_read = false'), sqlite_where=db.text('is_read = 0')),
+        db.Index('ix_notifications_user_created', 'user_id', 'created_at'),
+    )
     
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(255), nullable=False)
@@ -20,7 +33,7 @@ class Notification(BaseModel):
         from datetime import datetime
         self.is_read = True
         self.read_at = datetime.utcnow()
-        db.session.commit()
+        self._commit()
     
     def to_dict(self):
         """Convert notification to dictionary"""
@@ -0,0 +1,37 @@
+from datetime import datetime
+from database.connection import db
+from .base_model import BaseModel
+
+class PreviewJob(BaseModel):
+    """Queued thumbnail/preview rendering for one stored blob, shared by every upload of that content"""
+    __tablename__ = 'preview_jobs'
+    __table_args__ = (
+        # Workers claim the oldest due pending jobs
+        db.Index('ix_preview_jobs_claim', 'status', 'available_at'),
+    )
+    
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    UNSUPPORTED = 'unsupported'
+    
+    content_hash = db.Column(db.String(64), unique=True, nullable=False)
+    mime_type = db.Column(db.String(100))
+    status = db.Column(db.String(20), nullable=False, default=PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Not claimed before (retry backoff)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    
+    def to_dict(self):
+        """Convert preview job to dictionary"""
+        base_dict = super().to_dict()
+        base_dict.update({
+            'content_hash': self.content_hash,
+            'status': self.status,
+            'attempts': self.attempts,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        })
+        return base_dict
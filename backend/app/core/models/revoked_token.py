@@ -0,0 +1,28 @@
+from database.connection import db
+from .base_model import BaseModel
+
+class RevokedToken(BaseModel):
+    """Revoked access token (jti), or every token of a user issued before `revoked_before`"""
+    __tablename__ = 'revoked_tokens'
+    __table_args__ = (
+        # Workers poll for revocations created since their last refresh
+        db.Index('ix_revoked_tokens_created', 'created_at'),
+    )
+    
+    jti = db.Column(db.String(64), unique=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    revoked_before = db.Column(db.DateTime)  # Set for user-wide revocation (logout everywhere, deactivation)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)  # Row is useless once the token has expired
+    reason = db.Column(db.String(50))
+    
+    def to_dict(self):
+        """Convert revoked token to dictionary"""
+        base_dict = super().to_dict()
+        base_dict.update({
+            'jti': self.jti,
+            'user_id': self.user_id,
+            'revoked_before': self.revoked_before.isoformat() if self.revoked_before else None,
+            'expires_at': self.expires_at.isoformat(),
+            'reason': self.reason
+        })
+        return base_dict
@@ -8,6 +8,13 @@ user_roles = db.Table('user_roles',
     db.Column('assigned_at', db.DateTime, default=db.func.current_timestamp())
 )
 
+# Association table for many-to-many relationship between roles and permissions
+role_permissions = db.Table('role_permissions',
+    db.Column('role_id', db.Integer, db.ForeignKey('roles.id'), primary_key=True),
+    db.Column('permission_id', db.Integer, db.ForeignKey('permissions.id'), primary_key=True),
+    db.Column('granted_at', db.DateTime, default=db.func.current_timestamp())
+)
+
 class Role(BaseModel):
     """Role model for role-based access control"""
     __tablename__ = 'roles'
@@ -15,12 +22,18 @@ class Role(BaseModel):
     name = db.Column(db.String(100), unique=True, nullable=False)
     description = db.Column(db.Text)
     
+    # Relationships
+    permissions = db.relationship('Permission', secondary='role_permissions', backref=db.backref('roles', lazy=True))
+    
+    __serialize_relationships__ = {'permissions': 'selectin'}
+    
     def to_dict(self):
         """Convert role to dictionary"""
         base_dict = super().to_dict()
         base_dict.update({
             'name': self.name,
-            'description': self.description
+            'description': self.description,
+            'permissions': [permission.name for permission in self.permissions]
         })
         return base_dict
     
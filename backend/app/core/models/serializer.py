@@ -0,0 +1,100 @@
+"""
+Compiled model serializers
+Generated once per model (and field projection) from the SQLAlchemy mapper
+"""
+
+import json
+
+from sqlalchemy import Date, DateTime, inspect, select
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+_serializers = {}
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def parse_fields(value):
+    """Parse a ?fields=id,email query value into a tuple of field names (None for all)"""
+    if not value:
+        return None
+    return tuple(field.strip() for field in value.split(',') if field.strip())
+
+
+def dumps(data):
+    """Encode serialized data to JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+class ModelSerializer:
+    """Column serializer for one model, compiled to plain dict-building functions
+
+    Serializes either ORM instances or Row tuples from select(*serializer.columns),
+    so list endpoints can skip hydrating ORM objects entirely. Relationship values
+    (e.g. User roles) stay with the model's to_dict().
+    """
+
+    def __init__(self, model, fields=None):
+        available = {
+            attr.key: attr for attr in inspect(model).column_attrs
+            if attr.key not in model.__serialize_exclude__
+        }
+        if fields is None:
+            fields = tuple(available)
+        unknown = [field for field in fields if field not in available]
+        if unknown:
+            raise ValueError(f"Unknown fields for {model.__name__}: {', '.join(unknown)}")
+
+        self.model = model
+        self.fields = tuple(fields)
+        self.columns = tuple(getattr(model, field) for field in self.fields)
+
+        temporal = {
+            field for field in self.fields
+            if isinstance(available[field].columns[0].type, (Date, DateTime))
+        }
+        self.from_instance = self._compile('obj', lambda i, field: f'obj.{field}', temporal)
+        self.from_row = self._compile('row', lambda i, field: f'row[{i}]', temporal)
+
+    def _compile(self, arg, accessor, temporal):
+        """Build a function returning a dict literal with one entry per field"""
+        entries = []
+        for i, field in enumerate(self.fields):
+            value = accessor(i, field)
+            if field in temporal:
+                value = f'_isoformat({value})'
+            entries.append(f'{field!r}: {value}')
+        source = f"def serialize({arg}):\n    return {{{', '.join(entries)}}}\n"
+        namespace = {'_isoformat': _isoformat}
+        exec(compile(source, f'<serializer {self.model.__name__}>', 'exec'), namespace)
+        return namespace['serialize']
+
+    def select(self):
+        """SELECT statement over exactly the serialized columns"""
+        return select(*self.columns)
+
+    def serialize(self, objs):
+        """Serialize ORM instances"""
+        from_instance = self.from_instance
+        return [from_instance(obj) for obj in objs]
+
+    def serialize_rows(self, rows):
+        """Serialize Row tuples produced by select()"""
+        from_row = self.from_row
+        return [from_row(row) for row in rows]
+
+
+def get_serializer(model, fields=None):
+    """Return the cached serializer for a model and field projection"""
+    key = (model, fields)
+    serializer = _serializers.get(key)
+    if serializer is None:
+        serializer = _serializers[key] = ModelSerializer(model, fields)
+    return serializer
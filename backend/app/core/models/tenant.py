@@ -12,6 +12,9 @@ class Tenant(BaseModel):
     contact_phone = db.Column(db.String(50))
     address = db.Column(db.Text)
     
+    # Sharding mode: database URL or schema name overriding the TENANT_SHARD_* naming
+    shard = db.Column(db.String(500))
+    
     # Relationships
     users = db.relationship('User', backref='tenant', lazy=True)
     
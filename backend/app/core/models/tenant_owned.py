@@ -0,0 +1,89 @@
+"""
+Tenant ownership and automatic query scoping
+Models carrying tenant_id inherit TenantOwnedMixin. While a session has a current
+tenant (session.info['tenant_id'], set per request by the tenant middleware), every
+ORM SELECT, UPDATE and DELETE against those models is restricted to that tenant,
+and new rows default to it.
+"""
+
+from contextlib import contextmanager
+
+from sqlalchemy import Index, event
+from sqlalchemy.orm import declared_attr, with_loader_criteria
+
+from database.connection import db
+from database.routing import RoutingSession
+
+# Execution option that lifts tenant scoping for one statement, e.g. login by email:
+#   User.query.execution_options(all_tenants=True).filter_by(email=email)
+ALL_TENANTS = 'all_tenants'
+
+
+class TenantOwnedMixin:
+    """Gives a model a tenant_id and scopes its queries to the session's tenant
+
+    `__tenant_indexes__` lists column tuples that get a composite index led by
+    tenant_id; (tenant_id, created_at, id) for keyset pagination is always added.
+    """
+
+    __tenant_indexes__ = ()
+
+    @declared_attr
+    def tenant_id(cls):
+        return db.Column(db.Integer, db.ForeignKey('tenants.id'), nullable=False)
+
+
+@event.listens_for(TenantOwnedMixin, 'instrument_class', propagate=True)
+def _add_tenant_indexes(mapper, cls):
+    table = cls.__table__
+    existing = {index.name for index in table.indexes}
+    for columns in (('created_at', 'id'),) + tuple(cls.__tenant_indexes__):
+        name = f"ix_{table.name}_tenant_{'_'.join(columns)}"
+        if name not in existing:
+            Index(name, table.c.tenant_id, *(table.c[column] for column in columns))
+
+
+def current_tenant(session):
+    """Tenant id the session is scoped to, or None"""
+    return session.info.get('tenant_id')
+
+
+@contextmanager
+def tenant_scope(session, tenant_id):
+    """Scope ORM statements in the block to `tenant_id` (None lifts scoping)"""
+    previous = session.info.get('tenant_id')
+    session.info['tenant_id'] = tenant_id
+    try:
+        yield session
+    finally:
+        session.info['tenant_id'] = previous
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _apply_tenant_criteria(execute_state):
+    tenant_id = current_tenant(execute_state.session)
+    if (
+        tenant_id is None
+        or execute_state.execution_options.get(ALL_TENANTS, False)
+        or execute_state.is_column_load
+        or execute_state.is_relationship_load
+        or not (execute_state.is_select or execute_state.is_update or execute_state.is_delete)
+    ):
+        return
+    execute_state.statement = execute_state.statement.options(
+        with_loader_criteria(
+            TenantOwnedMixin,
+            lambda cls: cls.tenant_id == tenant_id,
+            include_aliases=True
+        )
+    )
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _assign_tenant(session, flush_context, instances):
+    tenant_id = current_tenant(session)
+    if tenant_id is None:
+        return
+    for obj in session.new:
+        if isinstance(obj, TenantOwnedMixin) and obj.tenant_id is None:
+            obj.tenant_id = tenant_id
@@ -1,9 +1,11 @@
 from datetime import datetime
+from flask import current_app
 from werkzeug.security import generate_password_hash, check_password_hash
 from database.connection import db
 from .base_model import BaseModel
+from .tenant_owned import TenantOwnedMixin
 
-class User(BaseModel):
+class User(TenantOwnedMixin, BaseModel):
     """User model for authentication and authorization"""
     __tablename__ = 'users'
     
@@ -14,15 +16,15 @@ class User(BaseModel):
     phone = db.Column(db.String(50))
     last_login = db.Column(db.DateTime)
     
-    # Foreign keys
-    tenant_id = db.Column(db.Integer, db.ForeignKey('tenants.id'), nullable=False)
-    
     # Relationships
     roles = db.relationship('Role', secondary='user_roles', backref=db.backref('users', lazy=True))
     
+    __serialize_relationships__ = {'roles': 'selectin'}
+    __serialize_exclude__ = ('password_hash',)
+    
     def set_password(self, password):
-        """Set password hash"""
-        self.password_hash = generate_password_hash(password)
+        """Set password hash (with PASSWORD_HASH_METHOD; auth_service.set_password hashes off-thread)"""
+        self.password_hash = generate_password_hash(password, current_app.config['PASSWORD_HASH_METHOD'])
     
     def check_password(self, password):
         """Check password against hash"""
@@ -31,7 +33,7 @@ class User(BaseModel):
     def update_last_login(self):
         """Update last login timestamp"""
         self.last_login = datetime.utcnow()
-        db.session.commit()
+        self._commit()
     
     def to_dict(self):
         """Convert user to dictionary (excluding sensitive data)"""
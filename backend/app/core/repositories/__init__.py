@@ -1,4 +1,10 @@
-# __init__.py - Smart Enterprise Management System
-# Auto-generated placeholder file
-
+# Core repositories package
+from .base_repository import BaseRepository
+from .user_repository import UserRepository
+from .audit_repository import AuditRepository
 
+__all__ = [
+    'BaseRepository',
+    'UserRepository',
+    'AuditRepository'
+]
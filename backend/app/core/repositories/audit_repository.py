@@ -1,4 +1,46 @@
-# audit_repository.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+Audit log repository
+Searches use keyset pagination on (created_at, id) so deep pages cost the same as
+the first, and bounded time ranges let PostgreSQL prune monthly partitions
+"""
 
+from app.core.models.audit_log import AuditLog
+from .base_repository import BaseRepository
 
+
+class AuditRepository(BaseRepository):
+    """Data access for audit log entries"""
+    
+    model = AuditLog
+    
+    def list_for_user(self, user_id, limit=None):
+        """Audit entries recorded for a user, newest first"""
+        return self.list(limit=limit, user_id=user_id)
+    
+    def list_for_resource(self, resource_type, resource_id, limit=None):
+        """Audit entries recorded against a resource, newest first"""
+        return self.list(limit=limit, resource_type=resource_type, resource_id=resource_id)
+    
+    def search(self, tenant_id=None, user_id=None, resource_type=None, resource_id=None,
+               action=None, since=None, until=None, cursor=None, limit=50):
+        """Keyset-paginated search, newest first
+        
+        `cursor` is the next_cursor of the previous page. Returns a Page whose
+        next_cursor is None on the last page.
+        """
+        query = AuditLog.query.options(*AuditLog.eager_load_options())
+        filters = {
+            AuditLog.tenant_id: tenant_id,
+            AuditLog.user_id: user_id,
+            AuditLog.resource_type: resource_type,
+            AuditLog.resource_id: resource_id,
+            AuditLog.action: action
+        }
+        for column, value in filters.items():
+            if value is not None:
+                query = query.filter(column == value)
+        if since is not None:
+            query = query.filter(AuditLog.created_at >= since)
+        if until is not None:
+            query = query.filter(AuditLog.created_at < until)
+        return self.iter_page(cursor, limit, query=query)
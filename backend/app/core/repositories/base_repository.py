@@ -1,4 +1,136 @@
-# base_repository.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+Base repository for core data access
+List queries preload the relationships each model declares for serialization,
+or skip ORM hydration entirely through the model's compiled serializer.
+They are replica-safe and may be served by a read replica.
+Large lists page by keyset on (created_at, id) or stream through yield_per.
+"""
 
+from contextlib import nullcontext
 
+from sqlalchemy import tuple_
+
+from database.connection import db
+from database.routing import replica_reads
+from app.core.utils.pagination import Page, decode_cursor, encode_cursor
+
+STREAM_BATCH_SIZE = 1000
+
+
+class BaseRepository:
+    """Generic data access for a BaseModel subclass"""
+    
+    model = None
+    
+    # Serve list queries from a read replica when one is configured
+    use_replica = True
+    
+    def __init__(self, model=None):
+        if model is not None:
+            self.model = model
+        if self.model is None:
+            raise ValueError(f"{type(self).__name__} requires a model")
+    
+    def query(self, include_inactive=False):
+        """Base query for the model, excluding soft-deleted rows by default"""
+        query = self.model.query
+        if not include_inactive:
+            query = query.filter(self.model.is_active.is_(True))
+        return query
+    
+    def list_query(self, include_inactive=False, **filters):
+        """Query for list endpoints with serialization relationships eager-loaded"""
+        return (
+            self.query(include_inactive)
+            .filter_by(**filters)
+            .options(*self.model.eager_load_options())
+        )
+    
+    def read_session(self):
+        """Context in which list reads may be routed to a replica"""
+        if self.use_replica:
+            return replica_reads(db.session)
+        return nullcontext(db.session)
+    
+    def get_by_id(self, record_id):
+        """Return a single record by primary key or None"""
+        return db.session.get(self.model, record_id)
+    
+    def list(self, limit=None, include_inactive=False, **filters):
+        """Return records matching the filters, newest first"""
+        query = self.list_query(include_inactive, **filters).order_by(
+            self.model.created_at.desc(), self.model.id.desc()
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        with self.read_session():
+            return query.all()
+    
+    def list_dicts(self, limit=None, include_inactive=False, **filters):
+        """Serialized records for list endpoints without per-row relationship queries"""
+        return [record.to_dict() for record in self.list(limit, include_inactive, **filters)]
+    
+    def list_rows(self, fields=None, limit=None, include_inactive=False, **filters):
+        """Serialized column values straight from result rows, optionally projected to `fields`"""
+        serializer = self.model.serializer(fields)
+        statement = serializer.select().filter_by(**filters).order_by(
+            self.model.created_at.desc(), self.model.id.desc()
+        )
+        if not include_inactive:
+            statement = statement.where(self.model.is_active.is_(True))
+        if limit is not None:
+            statement = statement.limit(limit)
+        with self.read_session():
+            return serializer.serialize_rows(db.session.execute(statement))
+    
+    def iter_page(self, cursor=None, limit=50, order_by='desc', query=None,
+                  include_inactive=False, **filters):
+        """One keyset page ordered by (created_at, id)
+        
+        `cursor` is the next_cursor of the previous page; `order_by` is 'desc'
+        (newest first) or 'asc'. Subclasses may pass a pre-filtered `query`.
+        Raises ValueError for a malformed cursor or unknown ordering.
+        """
+        if order_by not in ('asc', 'desc'):
+            raise ValueError(f"order_by must be 'asc' or 'desc', not {order_by!r}")
+        if query is None:
+            query = self.list_query(include_inactive, **filters)
+        
+        key = tuple_(self.model.created_at, self.model.id)
+        if cursor:
+            position = tuple_(*decode_cursor(cursor))
+            query = query.filter(key < position if order_by == 'desc' else key > position)
+        if order_by == 'desc':
+            query = query.order_by(self.model.created_at.desc(), self.model.id.desc())
+        else:
+            query = query.order_by(self.model.created_at.asc(), self.model.id.asc())
+        
+        # One extra row tells whether another page follows
+        with self.read_session():
+            items = query.limit(limit + 1).all()
+        if len(items) <= limit:
+            return Page(items, None)
+        items = items[:limit]
+        return Page(items, encode_cursor(items[-1].created_at, items[-1].id))
+    
+    def stream_rows(self, fields=None, include_inactive=False, batch_size=STREAM_BATCH_SIZE, **filters):
+        """Generator of serialized rows fetched `batch_size` at a time, newest first
+        
+        Memory stays constant however many rows match; pair with
+        app.core.utils.streaming.json_stream_response for exports.
+        """
+        serializer = self.model.serializer(fields)
+        statement = serializer.select().filter_by(**filters).order_by(
+            self.model.created_at.desc(), self.model.id.desc()
+        )
+        if not include_inactive:
+            statement = statement.where(self.model.is_active.is_(True))
+        from_row = serializer.from_row
+        with self.read_session():
+            result = db.session.execute(statement.execution_options(yield_per=batch_size))
+            try:
+                for partition in result.partitions():
+                    for row in partition:
+                        yield from_row(row)
+            finally:
+                result.close()
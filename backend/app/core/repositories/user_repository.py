@@ -1,4 +1,20 @@
-# user_repository.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+User repository
+"""
 
+from app.core.models.user import User
+from .base_repository import BaseRepository
 
+
+class UserRepository(BaseRepository):
+    """Data access for users"""
+    
+    model = User
+    
+    def get_by_email(self, email):
+        """Return the user with the given email or None"""
+        return User.query.filter_by(email=email).first()
+    
+    def list_for_tenant(self, tenant_id, limit=None):
+        """Users of a tenant with their roles preloaded"""
+        return self.list(limit=limit, tenant_id=tenant_id)
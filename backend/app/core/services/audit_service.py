@@ -1,4 +1,198 @@
-# audit_service.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+Audit logging service
+Events are queued in-process and written to audit_logs in batches by a background
+thread, so recording an action never adds a commit to the request. In sharding mode
+each event is written to its tenant's shard, next to the users it references.
+"""
 
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
 
+from flask import has_request_context, request
+from sqlalchemy import select
+
+from database.connection import db
+from app.core.models.audit_log import AuditLog
+from app.core.models.tenant import Tenant
+from app.core.services.tenant_service import tenant_shards
+from app.core.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+AUDIT_EVENTS_WRITTEN = REGISTRY.counter('audit_events_written_total', 'Audit events written to the database')
+AUDIT_EVENTS_DROPPED = REGISTRY.counter(
+    'audit_events_dropped_total', 'Audit events discarded because the queue was full or a write failed', ['reason']
+)
+AUDIT_BATCH_SECONDS = REGISTRY.histogram('audit_batch_write_seconds', 'Time to write one batch of audit events')
+
+
+class AuditWriter:
+    """Bounded in-process queue drained in batches by a background thread
+
+    A batch is written when it reaches AUDIT_BATCH_SIZE events or its oldest event
+    is AUDIT_FLUSH_INTERVAL seconds old. When the queue is full, record() waits up to
+    AUDIT_ENQUEUE_TIMEOUT seconds and then drops the event rather than stall the request.
+    With TENANT_SHARDING, audit_logs.user_id refers to users in the tenant's shard, so
+    events go to that shard; events without a tenant stay on the primary.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config['AUDIT_ASYNC']
+        self.batch_size = app.config['AUDIT_BATCH_SIZE']
+        self.flush_interval = app.config['AUDIT_FLUSH_INTERVAL']
+        self.enqueue_timeout = app.config['AUDIT_ENQUEUE_TIMEOUT']
+        self._queue = queue.Queue(maxsize=app.config['AUDIT_QUEUE_SIZE'])
+        REGISTRY.gauge('audit_queue_depth', 'Audit events waiting to be written',
+                       callback=lambda: [({}, self._queue.qsize())])
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    def record(self, action, user_id, resource_type=None, resource_id=None, description=None,
+               ip_address=None, user_agent=None, tenant_id=None):
+        """Queue an audit event; request IP and user agent are filled in when available"""
+        if has_request_context():
+            ip_address = ip_address or request.remote_addr
+            user_agent = user_agent or request.user_agent.string
+        now = datetime.utcnow()
+        event = {
+            'tenant_id': tenant_id,
+            'user_id': user_id,
+            'action': action,
+            'resource_type': resource_type,
+            'resource_id': resource_id,
+            'description': description,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'created_at': now,
+            'updated_at': now,
+            'is_active': True
+        }
+        if not self.enabled:
+            self._write([event])
+            return
+        self._ensure_worker()
+        try:
+            self._queue.put(event, timeout=self.enqueue_timeout)
+        except queue.Full:
+            AUDIT_EVENTS_DROPPED.inc(reason='queue_full')
+            logger.warning("Audit queue full, dropped %s event for user %s", action, user_id)
+
+    def flush(self):
+        """Block until every queued event has been written"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def shutdown(self, timeout=10):
+        """Write remaining events and stop the worker thread"""
+        with self._lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive() or self._pid != os.getpid():
+                return
+            self._queue.put(_STOP)
+            self._thread = None
+        thread.join(timeout)
+
+    def _ensure_worker(self):
+        # Threads do not survive fork, so pre-forked workers start their own on first use
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            stop = item is _STOP
+            if item is not None and not stop:
+                batch.append(item)
+                # Drain whatever else is already waiting, up to a full batch
+                while len(batch) < self.batch_size:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stop = True
+                        break
+                    batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch and (stop or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                for _ in batch:
+                    self._queue.task_done()
+                batch = []
+                deadline = None
+            if stop:
+                self._queue.task_done()
+                return
+
+    def _write(self, batch):
+        with self.app.app_context():
+            try:
+                groups = self._group_by_shard(batch)
+            except Exception:
+                AUDIT_EVENTS_DROPPED.inc(len(batch), reason='write_failed')
+                logger.exception("Failed to route %d audit events to tenant shards", len(batch))
+                return
+            for slug, events in groups:
+                start = time.perf_counter()
+                try:
+                    if slug is None:
+                        AuditLog.bulk_insert(events)
+                    else:
+                        with tenant_shards.bound(db.session, slug):
+                            AuditLog.bulk_insert(events)
+                except Exception:
+                    db.session.rollback()
+                    AUDIT_EVENTS_DROPPED.inc(len(events), reason='write_failed')
+                    logger.exception("Failed to write %d audit events", len(events))
+                    continue
+                AUDIT_BATCH_SECONDS.observe(time.perf_counter() - start)
+                AUDIT_EVENTS_WRITTEN.inc(len(events))
+
+    def _group_by_shard(self, batch):
+        """[(tenant slug or None for the primary, events)]"""
+        if not tenant_shards.enabled:
+            return [(None, batch)]
+        tenant_ids = {event['tenant_id'] for event in batch if event['tenant_id'] is not None}
+        slugs = {}
+        if tenant_ids:
+            # The catalog lives on the primary
+            with db.engine.connect() as connection:
+                slugs = dict(connection.execute(
+                    select(Tenant.id, Tenant.slug).where(Tenant.id.in_(tenant_ids))
+                ).all())
+        groups = {}
+        for event in batch:
+            groups.setdefault(slugs.get(event['tenant_id']), []).append(event)
+        return list(groups.items())
+
+
+audit_writer = AuditWriter()
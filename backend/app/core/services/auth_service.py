@@ -1,4 +1,281 @@
-# auth_service.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+Authentication service
+Password hashing is deliberately expensive, so logins hash on a bounded pool of
+PASSWORD_HASH_WORKERS threads (hashlib releases the GIL while hashing): a burst of logins
+queues instead of pinning every request worker, and waits beyond PASSWORD_HASH_QUEUE
+are refused with 503. Failed attempts are counted per account and per client address
+and checked before any hashing, so brute force cannot burn CPU. Hashes made with older
+parameters are upgraded to PASSWORD_HASH_METHOD on the next successful login.
+"""
 
+import hashlib
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from datetime import datetime
 
+import jwt
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from database.connection import db
+from app.core.models.user import User
+from app.core.services.permission_service import permission_service
+from app.core.utils.cache import NullSharedCache, TTLCache, create_shared_cache
+from app.core.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+LOGIN_ATTEMPTS = REGISTRY.counter('auth_login_attempts_total', 'Login attempts by outcome', ['outcome'])
+PASSWORD_HASH_SECONDS = REGISTRY.histogram('auth_password_hash_seconds', 'Time spent hashing one password')
+PASSWORD_HASH_WAIT_SECONDS = REGISTRY.histogram(
+    'auth_password_hash_wait_seconds', 'Time a login waited for a free hashing worker'
+)
+
+
+def key_id(secret_key):
+    """Short public id of a signing key, sent as the token's `kid` header"""
+    return hashlib.sha256(secret_key.encode('utf-8')).hexdigest()[:8]
+
+
+class AuthError(Exception):
+    """Authentication refused; status_code is the HTTP status to answer with"""
+
+    status_code = 401
+
+
+class InvalidCredentials(AuthError):
+    def __init__(self):
+        super().__init__('Invalid email or password')
+
+
+class TooManyAttempts(AuthError):
+    status_code = 429
+
+    def __init__(self, retry_after):
+        super().__init__('Too many failed login attempts')
+        self.retry_after = retry_after
+
+
+class AuthBusy(AuthError):
+    status_code = 503
+
+    def __init__(self):
+        super().__init__('Authentication is temporarily overloaded')
+        self.retry_after = 1
+
+
+class PasswordHasher:
+    """Runs password hashing on a bounded thread pool, one per process"""
+
+    def __init__(self):
+        self.method = 'pbkdf2:sha256:600000'
+        self.workers = os.cpu_count() or 1
+        self.max_waiting = 64
+        self.timeout = 10.0
+        self._executor = None
+        self._pid = None
+        self._slots = None
+        self._reference_hash = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.method = app.config['PASSWORD_HASH_METHOD']
+        self.workers = app.config['PASSWORD_HASH_WORKERS'] or os.cpu_count() or 1
+        self.max_waiting = app.config['PASSWORD_HASH_QUEUE']
+        self.timeout = app.config['PASSWORD_HASH_TIMEOUT']
+        self._executor = None
+        self._reference_hash = None
+
+    def _pool(self):
+        # Threads do not survive fork, so pre-forked workers build their own pool on first use
+        if self._executor is not None and self._pid == os.getpid():
+            return self._executor
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._slots = threading.BoundedSemaphore(self.workers + self.max_waiting)
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hash')
+        return self._executor
+
+    def _run(self, func, *args):
+        pool = self._pool()
+        if not self._slots.acquire(blocking=False):
+            raise AuthBusy()
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            PASSWORD_HASH_WAIT_SECONDS.observe(started - submitted)
+            try:
+                return func(*args)
+            finally:
+                PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started)
+
+        try:
+            future = pool.submit(timed)
+            future.add_done_callback(lambda _: self._slots.release())
+        except BaseException:
+            self._slots.release()
+            raise
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            raise AuthBusy()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    @property
+    def reference_hash(self):
+        """Hash of a random password made with the current parameters (computed on first use)
+
+        Verifying unknown accounts against it makes them cost as much as known ones, and
+        its prefix is the normalized form of PASSWORD_HASH_METHOD (e.g. 'pbkdf2:sha256:600000').
+        """
+        if self._reference_hash is None:
+            self._reference_hash = generate_password_hash(os.urandom(16).hex(), self.method)
+        return self._reference_hash
+
+    def needs_rehash(self, password_hash):
+        """Whether a stored hash was made with other parameters than PASSWORD_HASH_METHOD"""
+        return password_hash.split('$', 1)[0] != self.reference_hash.split('$', 1)[0]
+
+
+class LoginAttemptLimiter:
+    """Fixed-window failure counters per account and per client address
+
+    Counts live in-process and, when REDIS_URL is set, in the shared cache so every
+    worker sees the same totals. Limits are checked before the password, so an
+    account over its limit is refused even the correct password until the window
+    ends: a known email address is enough to lock its owner out for that long.
+    The address is request.remote_addr, which is the client's only when
+    TRUSTED_PROXY_HOPS matches the proxies in front of the app.
+    """
+
+    def __init__(self):
+        self.local = TTLCache()
+        self.shared = NullSharedCache()
+        self.window = 900
+        self.max_per_account = 5
+        self.max_per_address = 50
+
+    def init_app(self, app):
+        self.window = app.config['LOGIN_ATTEMPT_WINDOW']
+        self.max_per_account = app.config['LOGIN_MAX_ATTEMPTS_PER_ACCOUNT']
+        self.max_per_address = app.config['LOGIN_MAX_ATTEMPTS_PER_ADDRESS']
+        self.local = TTLCache(app.config['LOGIN_ATTEMPT_CACHE_SIZE'], self.window)
+        self.shared = create_shared_cache(app.config['REDIS_URL'])
+
+    def _keys(self, email, ip_address):
+        keys = [(f'login:account:{email}', self.max_per_account)]
+        if ip_address:
+            keys.append((f'login:addr:{ip_address}', self.max_per_address))
+        return keys
+
+    def _count(self, key):
+        count = self.local.get(key)
+        if count is not None:
+            return count[0]
+        try:
+            shared = self.shared.get(key)
+        except Exception:
+            logger.warning("Shared cache read failed for %s", key, exc_info=True)
+            return 0
+        return int(shared) if shared else 0
+
+    def check(self, email, ip_address=None):
+        """Raise TooManyAttempts while the account or address is over its limit"""
+        for key, limit in self._keys(email, ip_address):
+            if self._count(key) >= limit:
+                entry = self.local.get(key)
+                retry_after = int(entry[1] - time.time()) if entry else self.window
+                raise TooManyAttempts(max(retry_after, 1))
+
+    def failed(self, email, ip_address=None):
+        now = time.time()
+        for key, _ in self._keys(email, ip_address):
+            entry = self.local.get(key)
+            count, expires_at = (entry[0] + 1, entry[1]) if entry else (1, now + self.window)
+            try:
+                shared = self.shared.incr(key, self.window)
+            except Exception:
+                logger.warning("Shared cache increment failed for %s", key, exc_info=True)
+                shared = None
+            if shared is not None:
+                count = max(count, int(shared))
+            self.local.set(key, (count, expires_at), ttl=max(expires_at - now, 1))
+
+    def succeeded(self, email):
+        key = f'login:account:{email}'
+        self.local.delete(key)
+        try:
+            self.shared.delete(key)
+        except Exception:
+            logger.warning("Shared cache delete failed for %s", key, exc_info=True)
+
+
+class AuthService:
+    """Password login and access token issuing"""
+
+    def __init__(self):
+        self.hasher = PasswordHasher()
+        self.limiter = LoginAttemptLimiter()
+
+    def init_app(self, app):
+        self.hasher.init_app(app)
+        self.limiter.init_app(app)
+        self.secret_key = app.config['JWT_SECRET_KEY']
+        self.access_token_expires = app.config['JWT_ACCESS_TOKEN_EXPIRES']
+
+    def authenticate(self, email, password, ip_address=None):
+        """Return the active user for a correct email/password, or raise an AuthError"""
+        email = (email or '').strip()
+        account = email.lower()
+        try:
+            self.limiter.check(account, ip_address)
+            user = User.query.filter_by(email=email, is_active=True).first()
+            valid = self.hasher.verify(user.password_hash if user else self.hasher.reference_hash, password or '')
+        except (TooManyAttempts, AuthBusy) as e:
+            LOGIN_ATTEMPTS.inc(outcome='limited' if isinstance(e, TooManyAttempts) else 'busy')
+            raise
+        if not valid or user is None:
+            self.limiter.failed(account, ip_address)
+            LOGIN_ATTEMPTS.inc(outcome='failed')
+            raise InvalidCredentials()
+
+        self.limiter.succeeded(account)
+        if self.hasher.needs_rehash(user.password_hash):
+            user.password_hash = self.hasher.hash(password)
+            # Same password, stronger hash: the user's existing tokens stay valid
+            db.session.info.setdefault('password_rehashed', set()).add(user.id)
+        user.last_login = datetime.utcnow()
+        db.session.commit()
+        LOGIN_ATTEMPTS.inc(outcome='success')
+        return user
+
+    def set_password(self, user, password):
+        """Hash a new password on the worker pool"""
+        user.password_hash = self.hasher.hash(password)
+
+    def issue_access_token(self, user):
+        """Signed token carrying everything a request needs: user, tenant and permission bitset"""
+        now = time.time()
+        claims = {
+            'sub': str(user.id),
+            'tenant': user.tenant_id,
+            'perms': format(permission_service.resolve(user.id).mask, 'x'),
+            'jti': secrets.token_urlsafe(16),
+            'iat': now,  # Sub-second, so a revocation cutoff never catches a token issued right after it
+            'exp': int(now) + self.access_token_expires
+        }
+        return jwt.encode(claims, self.secret_key, algorithm='HS256', headers={'kid': key_id(self.secret_key)})
+
+
+auth_service = AuthService()
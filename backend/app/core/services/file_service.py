@@ -1,4 +1,374 @@
-# file_service.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+File storage service
+Uploads stream to disk in fixed-size chunks while being hashed (SHA-256), then land in
+a content-addressed store under UPLOAD_FOLDER/blobs: identical content is kept once and
+reference counted in file_blobs. Files larger than MAX_CONTENT_LENGTH arrive as
+resumable uploads, appended chunk by chunk at a client-declared offset.
 
+A new blob moves into the store only once the transaction registering it commits,
+under a shared lock on the store; garbage collection unlinks under the exclusive
+lock, so it never removes content that a concurrent upload has just referenced.
+"""
 
+import hashlib
+import logging
+import os
+import secrets
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from database.connection import db
+from database.routing import RoutingSession
+from app.core.models.base_model import BaseModel
+from app.core.models.file_upload import FileUpload, UploadSession, file_blobs
+from app.core.services.preview_service import preview_service
+
+try:
+    import fcntl
+except ImportError:  # Windows: no concurrent chunks of one resumable upload, and no GC while uploading
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class UploadError(Exception):
+    """Upload rejected; status_code is the HTTP status to answer with"""
+
+    status_code = 400
+
+
+class UploadConflict(UploadError):
+    status_code = 409
+
+
+class UploadTooLarge(UploadError):
+    status_code = 413
+
+
+class FileService:
+    """Streaming uploads into a reference-counted content-addressed store"""
+
+    def __init__(self):
+        self.root = None
+        self.chunk_size = 1024 * 1024
+        self.max_file_size = None
+        self.session_ttl = 86400
+
+    def init_app(self, app):
+        self.root = app.config['UPLOAD_FOLDER']
+        self.chunk_size = app.config['UPLOAD_CHUNK_SIZE']
+        self.max_file_size = app.config['UPLOAD_MAX_FILE_SIZE']
+        self.session_ttl = app.config['UPLOAD_SESSION_TTL']
+        # Readiness reports the store down until this folder exists and is writable
+        try:
+            os.makedirs(self.root, exist_ok=True)
+        except OSError as e:
+            logger.error("Cannot create upload folder %s: %s", self.root, e)
+        register_file_commands(app)
+
+    # Paths
+
+    @staticmethod
+    def blob_relpath(content_hash):
+        """Path of a blob relative to UPLOAD_FOLDER, fanned out over two directory levels"""
+        return os.path.join('blobs', content_hash[:2], content_hash[2:4], content_hash)
+
+    def blob_path(self, content_hash):
+        return os.path.join(self.root, self.blob_relpath(content_hash))
+
+    @contextmanager
+    def _store_lock(self, exclusive=False):
+        """Cross-process lock on the blob store: shared to place blobs, exclusive to unlink them"""
+        if fcntl is None:
+            yield
+            return
+        folder = os.path.join(self.root, 'blobs')
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, '.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _incoming_path(self, name):
+        folder = os.path.join(self.root, 'incoming')
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, name)
+
+    # Streaming
+
+    def _copy(self, stream, target, limit=None, written=0):
+        """Copy `stream` into the open file `target` in chunks; returns bytes written"""
+        read, write, chunk_size = stream.read, target.write, self.chunk_size
+        while True:
+            chunk = read(chunk_size)
+            if not chunk:
+                return written
+            written += len(chunk)
+            if limit is not None and written > limit:
+                raise UploadTooLarge(f'Upload exceeds {limit} bytes')
+            write(chunk)
+
+    def _hash_file(self, path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as source:
+            for chunk in iter(lambda: source.read(self.chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def write_stream(self, stream, limit=None):
+        """Stream to a temporary file while hashing; returns (temp_path, sha256, size)"""
+        path = self._incoming_path(f'{uuid.uuid4().hex}.tmp')
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(path, 'wb') as target:
+                for chunk in iter(lambda: stream.read(self.chunk_size), b''):
+                    size += len(chunk)
+                    if limit is not None and size > limit:
+                        raise UploadTooLarge(f'Upload exceeds {limit} bytes')
+                    digest.update(chunk)
+                    target.write(chunk)
+        except BaseException:
+            _remove_quietly(path)
+            raise
+        return path, digest.hexdigest(), size
+
+    # Content-addressed store
+
+    def add_blob(self, temp_path, content_hash, size):
+        """Take one reference on a blob in the current transaction
+
+        The hashed temp file moves into the store when the transaction commits, or
+        is dropped then when the content is already stored; a rollback removes it.
+        """
+        referenced = db.session.execute(
+            update(file_blobs)
+            .where(file_blobs.c.content_hash == content_hash)
+            .values(ref_count=file_blobs.c.ref_count + 1)
+        ).rowcount
+        if not referenced:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(file_blobs).values(content_hash=content_hash, size=size, ref_count=1))
+            except IntegrityError:
+                # Another upload of the same content registered it first
+                db.session.execute(
+                    update(file_blobs)
+                    .where(file_blobs.c.content_hash == content_hash)
+                    .values(ref_count=file_blobs.c.ref_count + 1)
+                )
+        db.session.info.setdefault('blob_placements', []).append((temp_path, content_hash))
+        return self.blob_path(content_hash)
+
+    def _place_blobs(self, placements):
+        """Move committed temp files into the store, dropping those whose content is already stored"""
+        with self._store_lock():
+            for temp_path, content_hash in placements:
+                target = self.blob_path(content_hash)
+                try:
+                    if os.path.exists(target):
+                        _remove_quietly(temp_path)
+                    else:
+                        os.makedirs(os.path.dirname(target), exist_ok=True)
+                        os.replace(temp_path, target)
+                except OSError as e:
+                    logger.error("Cannot store blob %s: %s", content_hash, e)
+
+    def release_blob(self, content_hash):
+        """Drop one reference; unreferenced blobs are deleted by `flask files-gc`"""
+        db.session.execute(
+            update(file_blobs)
+            .where(file_blobs.c.content_hash == content_hash, file_blobs.c.ref_count > 0)
+            .values(ref_count=file_blobs.c.ref_count - 1)
+        )
+
+    # Uploads
+
+    def _create_upload(self, user_id, content_hash, size, original_filename, mime_type, description):
+        upload = FileUpload(
+            user_id=user_id,
+            filename=content_hash,
+            original_filename=original_filename,
+            file_path=self.blob_relpath(content_hash),
+            file_size=size,
+            mime_type=mime_type,
+            description=description,
+            content_hash=content_hash
+        )
+        db.session.add(upload)
+        preview_service.enqueue(content_hash, mime_type)
+        return upload
+
+    def save_stream(self, user_id, stream, original_filename, mime_type=None, description=None, limit=None):
+        """Store a whole upload read from `stream` and return its FileUpload"""
+        temp_path, content_hash, size = self.write_stream(stream, limit)
+        try:
+            with BaseModel.deferred_commit():
+                self.add_blob(temp_path, content_hash, size)
+                upload = self._create_upload(user_id, content_hash, size, original_filename, mime_type, description)
+        except BaseException:
+            _remove_quietly(temp_path)
+            raise
+        return upload
+
+    def delete_upload(self, upload):
+        """Soft delete an upload and release its blob"""
+        with BaseModel.deferred_commit():
+            upload.delete()
+            if upload.content_hash:
+                self.release_blob(upload.content_hash)
+
+    # Resumable uploads
+
+    def create_session(self, user_id, original_filename, total_size, mime_type=None, description=None):
+        """Start a resumable upload of `total_size` bytes"""
+        if total_size < 0:
+            raise UploadError('Upload size must not be negative')
+        if self.max_file_size and total_size > self.max_file_size:
+            raise UploadTooLarge(f'Upload exceeds {self.max_file_size} bytes')
+        session = UploadSession(
+            token=secrets.token_urlsafe(24),
+            user_id=user_id,
+            original_filename=original_filename,
+            mime_type=mime_type,
+            description=description,
+            total_size=total_size,
+            offset=0
+        )
+        session.save()
+        return session
+
+    def get_session(self, token, user_id):
+        """Active upload session of a user, or None"""
+        return UploadSession.query.filter_by(token=token, user_id=user_id, is_active=True).first()
+
+    def _part_path(self, session):
+        return self._incoming_path(f'{session.token}.part')
+
+    def append_chunk(self, session, offset, stream):
+        """Append a chunk at `offset`; returns the FileUpload once the last byte has arrived
+
+        The offset must equal the bytes already received (the client asks with HEAD
+        after an interruption). Bytes past `total_size` are rejected.
+        """
+        if offset != session.offset:
+            raise UploadConflict(f'Expected offset {session.offset}, got {offset}')
+        path = self._part_path(session)
+        with open(path, 'r+b' if os.path.exists(path) else 'w+b') as target:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(target, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    raise UploadConflict('Another chunk of this upload is being received')
+            # Discard bytes of an earlier chunk that was written but never recorded
+            target.truncate(offset)
+            target.seek(offset)
+            received = self._copy(stream, target, limit=session.total_size, written=offset)
+
+        advanced = db.session.execute(
+            update(UploadSession)
+            .where(UploadSession.id == session.id, UploadSession.offset == offset)
+            .values(offset=received, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not advanced:
+            db.session.rollback()
+            raise UploadConflict('Upload offset changed concurrently')
+        session.offset = received
+        if received < session.total_size:
+            BaseModel._commit()
+            return None
+        return self._complete_session(session, path)
+
+    def _complete_session(self, session, path):
+        content_hash = self._hash_file(path)
+        try:
+            with BaseModel.deferred_commit():
+                self.add_blob(path, content_hash, session.total_size)
+                upload = self._create_upload(session.user_id, content_hash, session.total_size,
+                                             session.original_filename, session.mime_type, session.description)
+                db.session.flush()
+                session.file_upload_id = upload.id
+                session.is_active = False
+        except BaseException:
+            _remove_quietly(path)
+            raise
+        return upload
+
+    # Maintenance
+
+    def collect_garbage(self, session_max_age=None):
+        """Delete unreferenced blobs and abandoned upload sessions; returns (blobs, sessions) removed"""
+        cutoff = datetime.utcnow() - timedelta(seconds=session_max_age or self.session_ttl)
+        stale = UploadSession.query.filter(
+            UploadSession.is_active.is_(True), UploadSession.updated_at < cutoff
+        ).all()
+        for session in stale:
+            _remove_quietly(os.path.join(self.root, 'incoming', f'{session.token}.part'))
+            session.is_active = False
+        db.session.commit()
+
+        hashes = db.session.execute(
+            select(file_blobs.c.content_hash).where(file_blobs.c.ref_count <= 0)
+        ).scalars().all()
+        removed = 0
+        for content_hash in hashes:
+            deleted = db.session.execute(
+                delete(file_blobs).where(file_blobs.c.content_hash == content_hash, file_blobs.c.ref_count <= 0)
+            ).rowcount
+            db.session.commit()
+            if not deleted:
+                continue
+            # Unlink only while no new reference has re-registered the content. Uploads
+            # place blobs after committing their reference, under the shared lock, so a
+            # reference committed after this check finds the blob gone and places its copy.
+            with self._store_lock(exclusive=True):
+                unreferenced = db.session.execute(
+                    select(file_blobs.c.content_hash).where(file_blobs.c.content_hash == content_hash)
+                ).first() is None
+                if unreferenced:
+                    _remove_quietly(self.blob_path(content_hash))
+                db.session.commit()
+            if unreferenced:
+                preview_service.remove_previews(content_hash)
+                db.session.commit()
+                removed += 1
+        return removed, len(stale)
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+file_service = FileService()
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _place_committed_blobs(session):
+    placements = session.info.pop('blob_placements', None)
+    if placements:
+        file_service._place_blobs(placements)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_blob_placements(session):
+    for temp_path, _ in session.info.pop('blob_placements', ()):
+        _remove_quietly(temp_path)
+
+
+def register_file_commands(app):
+    """Register upload store maintenance commands on the Flask CLI"""
+
+    @app.cli.command('files-gc')
+    @click.option('--session-max-age', default=None, type=int, help='Seconds before an idle upload is abandoned')
+    def files_gc_command(session_max_age):
+        """Delete unreferenced blobs and abandoned resumable uploads"""
+        blobs, sessions = file_service.collect_garbage(session_max_age)
+        click.echo(f"✅ Removed {blobs} unreferenced blobs and {sessions} abandoned uploads")
@@ -1,4 +1,293 @@
-# notification_service.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+Notification service
+Fans notifications out to many recipients with chunked bulk inserts, marks them read
+with single UPDATEs, and keeps a per-user unread counter (notification_counters,
+fronted by the in-process and shared caches) so badges never COUNT(*) notifications.
+Committed notifications are published to the push hub when a push server runs in-process.
+"""
 
+import logging
+from collections import defaultdict
+from datetime import datetime
+from itertools import chain
 
+from sqlalchemy import case, event, func, inspect, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from database.connection import db
+from database.routing import RoutingSession
+from app.core.models.base_model import BaseModel
+from app.core.models.notification import Notification, notification_counters
+from app.core.models.user import User
+from app.core.services.push_service import notification_event, push_hub
+from app.core.utils.cache import NullSharedCache, TTLCache, create_shared_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _is_unread(is_read, is_active):
+    # Unset values are the column defaults of a pending row: unread and active
+    return not is_read and is_active is not False
+
+
+class NotificationService:
+    """Fan-out, bulk read marking and cached unread counts"""
+
+    def __init__(self):
+        self.local = TTLCache()
+        self.shared = NullSharedCache()
+        self.shared_ttl = 300
+        self.chunk_size = 1000
+
+    def init_app(self, app):
+        self.local = TTLCache(app.config['NOTIFICATION_COUNT_CACHE_SIZE'], app.config['NOTIFICATION_COUNT_CACHE_TTL'])
+        self.shared = create_shared_cache(app.config['REDIS_URL'])
+        self.shared_ttl = app.config['NOTIFICATION_COUNT_SHARED_CACHE_TTL']
+        self.chunk_size = app.config['NOTIFICATION_FANOUT_CHUNK_SIZE']
+
+    @staticmethod
+    def _shared_key(user_id):
+        return f'notif:unread:{user_id}'
+
+    # Writes
+
+    def fan_out(self, user_ids, title, message, notification_type='info', chunk_size=None):
+        """Create one notification per recipient; one INSERT batch and one commit per chunk
+
+        Returns the number of notifications created.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        chunk_size = chunk_size or self.chunk_size
+        now = datetime.utcnow()
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            rows = [
+                {
+                    'user_id': user_id,
+                    'title': title,
+                    'message': message,
+                    'notification_type': notification_type,
+                    'is_read': False,
+                    'created_at': now,
+                    'updated_at': now,
+                    'is_active': True
+                }
+                for user_id in chunk
+            ]
+            with BaseModel.deferred_commit() as session:
+                if push_hub.active:
+                    self._insert_and_queue_push(session, rows)
+                else:
+                    Notification.bulk_insert(rows, chunk_size=chunk_size)
+                adjust_unread_counters(session, {user_id: 1 for user_id in chunk})
+                _invalidate_on_commit(session, chunk)
+        return len(user_ids)
+
+    @staticmethod
+    def _insert_and_queue_push(session, rows):
+        # RETURNING gives the ids that become the pushed events' ids
+        table = Notification.__table__
+        inserted = session.execute(insert(table).returning(table.c.id, table.c.user_id), rows)
+        row = rows[0]
+        events = []
+        for notification_id, user_id in inserted:
+            data = {
+                'id': notification_id,
+                'title': row['title'],
+                'message': row['message'],
+                'notification_type': row['notification_type'],
+                'created_at': row['created_at'].isoformat()
+            }
+            events.append((user_id, notification_id, data))
+        session.info.setdefault('push_events', []).extend(events)
+
+    def broadcast_to_tenant(self, tenant_id, title, message, notification_type='info'):
+        """Notify every active user of a tenant"""
+        user_ids = db.session.execute(
+            select(User.id).where(User.tenant_id == tenant_id, User.is_active.is_(True))
+        ).scalars().all()
+        return self.fan_out(user_ids, title, message, notification_type)
+
+    def mark_all_read(self, user_id, before=None):
+        """Mark the user's unread notifications (created at or before `before`) read in one UPDATE
+
+        Returns the number of notifications marked.
+        """
+        now = datetime.utcnow()
+        statement = (
+            update(Notification)
+            .where(
+                Notification.user_id == user_id,
+                Notification.is_read.is_(False),
+                Notification.is_active.is_(True)
+            )
+            .values(is_read=True, read_at=now, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        if before is not None:
+            statement = statement.where(Notification.created_at <= before)
+        marked = db.session.execute(statement).rowcount
+        if marked:
+            adjust_unread_counters(db.session, {user_id: -marked})
+            _invalidate_on_commit(db.session, [user_id])
+        BaseModel._commit()
+        return marked
+
+    # Reads
+
+    def unread_count(self, user_id):
+        """Unread notifications of a user from the nearest cache level"""
+        count = self.local.get(user_id)
+        if count is not None:
+            return count
+
+        count = self._shared_get(user_id)
+        if count is None:
+            count = self._load_count(user_id)
+            self._shared_set(user_id, count)
+
+        self.local.set(user_id, count)
+        return count
+
+    def _load_count(self, user_id):
+        count = db.session.execute(
+            select(notification_counters.c.unread).where(notification_counters.c.user_id == user_id)
+        ).scalar()
+        if count is None:
+            count = self.recount(user_id)
+        return count
+
+    def recount(self, user_id):
+        """Rebuild a user's counter from the notifications table (initializes or repairs drift)
+
+        Writes in the caller's transaction and leaves committing to the caller.
+        """
+        count = db.session.execute(
+            select(func.count()).select_from(Notification).where(
+                Notification.user_id == user_id,
+                Notification.is_read.is_(False),
+                Notification.is_active.is_(True)
+            )
+        ).scalar()
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(notification_counters).values(user_id=user_id, unread=count))
+        except IntegrityError:
+            # The row exists, or a concurrent first read created it meanwhile
+            db.session.execute(
+                update(notification_counters)
+                .where(notification_counters.c.user_id == user_id)
+                .values(unread=count)
+            )
+        _invalidate_on_commit(db.session, [user_id])
+        return count
+
+    def _shared_get(self, user_id):
+        try:
+            value = self.shared.get(self._shared_key(user_id))
+        except Exception as e:
+            logger.warning("Shared notification cache unavailable: %s", e)
+            return None
+        return int(value) if value is not None else None
+
+    def _shared_set(self, user_id, count):
+        try:
+            self.shared.set(self._shared_key(user_id), str(count), self.shared_ttl)
+        except Exception as e:
+            logger.warning("Shared notification cache unavailable: %s", e)
+
+    # Invalidation
+
+    def invalidate_users(self, user_ids):
+        """Drop cached unread counts for users at every cache level"""
+        user_ids = list(user_ids)
+        for user_id in user_ids:
+            self.local.delete(user_id)
+        try:
+            self.shared.delete(*(self._shared_key(user_id) for user_id in user_ids))
+        except Exception as e:
+            logger.warning("Shared notification cache unavailable: %s", e)
+
+
+notification_service = NotificationService()
+
+
+def _invalidate_on_commit(session, user_ids):
+    session.info.setdefault('unread_invalidations', set()).update(user_ids)
+
+
+def adjust_unread_counters(executor, deltas):
+    """Apply per-user unread deltas in the current transaction, one UPDATE per distinct delta
+
+    Users without a counter row are skipped; their counter is built from the
+    notifications table on first read.
+    """
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(user_id)
+    unread = notification_counters.c.unread
+    for delta, user_ids in by_delta.items():
+        executor.execute(
+            update(notification_counters)
+            .where(notification_counters.c.user_id.in_(user_ids))
+            .values(unread=case((unread + delta < 0, 0), else_=unread + delta))
+        )
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _count_unread_changes(session, flush_context, instances):
+    """Keep counters in step with notifications created, read or removed through the ORM"""
+    deltas = defaultdict(int)
+    for obj in session.new:
+        if isinstance(obj, Notification) and _is_unread(obj.is_read, obj.is_active):
+            deltas[obj.user_id] += 1
+
+    changed = {}
+    for obj in chain(session.dirty, session.deleted):
+        if isinstance(obj, Notification):
+            attrs = inspect(obj).attrs
+            if obj in session.deleted or attrs.is_read.history.has_changes() or attrs.is_active.history.has_changes():
+                changed[obj.id] = obj
+    if changed:
+        # Stored state, since history lacks the old value once an instance has been expired by a commit
+        stored = session.connection().execute(
+            select(Notification.id, Notification.is_read, Notification.is_active)
+            .where(Notification.id.in_(list(changed)))
+        )
+        for notification_id, is_read, is_active in stored:
+            obj = changed[notification_id]
+            is_unread = obj not in session.deleted and _is_unread(obj.is_read, obj.is_active)
+            deltas[obj.user_id] += is_unread - _is_unread(is_read, is_active)
+
+    if any(deltas.values()):
+        adjust_unread_counters(session.connection(), deltas)
+        _invalidate_on_commit(session, deltas)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _queue_push_events(session, flush_context):
+    if not push_hub.active:
+        return
+    events = [
+        (obj.user_id, obj.id, notification_event(obj))
+        for obj in session.new if isinstance(obj, Notification) and obj.is_active is not False
+    ]
+    if events:
+        session.info.setdefault('push_events', []).extend(events)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _apply_unread_invalidations(session):
+    pending = session.info.pop('unread_invalidations', None)
+    if pending:
+        notification_service.invalidate_users(pending)
+    push_events = session.info.pop('push_events', None)
+    if push_events:
+        push_hub.publish(push_events)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_unread_invalidations(session):
+    session.info.pop('unread_invalidations', None)
+    session.info.pop('push_events', None)
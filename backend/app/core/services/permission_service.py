@@ -0,0 +1,216 @@
+"""
+Permission resolution service
+Resolves users -> roles -> permissions into a frozen bitset (bit = Permission.id),
+cached in-process (LRU + TTL) and in the shared cache, and invalidated on commit
+when a user's roles or a role's permissions change. Invalidations are published on
+the Redis invalidation bus so every worker drops its in-process entry; without Redis
+other workers serve stale permissions for up to PERMISSION_CACHE_TTL seconds.
+"""
+
+import logging
+import threading
+import time
+from collections import namedtuple
+from itertools import chain
+
+from sqlalchemy import event, inspect, select
+
+from database.connection import db
+from database.routing import RoutingSession
+from app.core.models.permission import Permission
+from app.core.models.role import Role, role_permissions, user_roles
+from app.core.models.user import User
+from app.core.utils.cache import (
+    NullInvalidationBus, NullSharedCache, TTLCache, create_invalidation_bus, create_shared_cache
+)
+
+logger = logging.getLogger(__name__)
+
+
+class UserPermissions(namedtuple('UserPermissions', ['user_id', 'mask'])):
+    """Immutable permission bitset for one user"""
+
+    __slots__ = ()
+
+    def has_bit(self, bit):
+        return (self.mask >> bit) & 1 == 1
+
+
+class PermissionService:
+    """Resolves and caches per-user permission bitsets"""
+
+    INVALIDATION_CHANNEL = 'perm:invalidate'
+
+    def __init__(self):
+        self.local = TTLCache()
+        self.shared = NullSharedCache()
+        self.shared_ttl = 300
+        self.bus = NullInvalidationBus()
+        self._bits = {}
+        self._bits_loaded_at = None
+        self._bits_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.local = TTLCache(app.config['PERMISSION_CACHE_SIZE'], app.config['PERMISSION_CACHE_TTL'])
+        self.shared = create_shared_cache(app.config['REDIS_URL'])
+        self.shared_ttl = app.config['PERMISSION_SHARED_CACHE_TTL']
+        self.bus = create_invalidation_bus(app.config['REDIS_URL'])
+        self.bus.subscribe(self.INVALIDATION_CHANNEL, self._drop_local)
+        self.reset_registry()
+
+    @staticmethod
+    def _shared_key(user_id):
+        return f'perm:user:{user_id}'
+
+    # Permission registry: 'module:action' -> bit index
+
+    def reset_registry(self):
+        """Reload the permission registry on next use"""
+        self._bits_loaded_at = None
+
+    def bit_for(self, module, action):
+        """Bit index for a permission, or None when it does not exist"""
+        key = f'{module}:{action}'
+        bit = self._bits.get(key)
+        if bit is None and self._registry_expired():
+            self._load_registry()
+            bit = self._bits.get(key)
+        return bit
+
+    def _registry_expired(self):
+        return self._bits_loaded_at is None or time.monotonic() - self._bits_loaded_at > self.local.ttl
+
+    def _load_registry(self):
+        with self._bits_lock:
+            if not self._registry_expired():
+                return
+            rows = db.session.execute(
+                select(Permission.id, Permission.module, Permission.action)
+                .where(Permission.is_active.is_(True))
+            )
+            self._bits = {f'{module}:{action}': permission_id for permission_id, module, action in rows}
+            self._bits_loaded_at = time.monotonic()
+
+    # Resolution
+
+    def resolve(self, user_id):
+        """Return the user's UserPermissions from the nearest cache level"""
+        self.bus.ensure_listening()
+        permissions = self.local.get(user_id)
+        if permissions is not None:
+            return permissions
+
+        mask = self._shared_get(user_id)
+        if mask is None:
+            mask = self._load_mask(user_id)
+            self._shared_set(user_id, mask)
+
+        permissions = UserPermissions(user_id, mask)
+        self.local.set(user_id, permissions)
+        return permissions
+
+    def has_permission(self, user_id, module, action):
+        """True when any active role of the user grants module:action"""
+        bit = self.bit_for(module, action)
+        return bit is not None and self.resolve(user_id).has_bit(bit)
+
+    def _load_mask(self, user_id):
+        statement = (
+            select(role_permissions.c.permission_id)
+            .join(user_roles, user_roles.c.role_id == role_permissions.c.role_id)
+            .join(Role, Role.id == role_permissions.c.role_id)
+            .join(Permission, Permission.id == role_permissions.c.permission_id)
+            .where(
+                user_roles.c.user_id == user_id,
+                Role.is_active.is_(True),
+                Permission.is_active.is_(True)
+            )
+        )
+        mask = 0
+        for permission_id in db.session.execute(statement).scalars():
+            mask |= 1 << permission_id
+        return mask
+
+    def _shared_get(self, user_id):
+        try:
+            value = self.shared.get(self._shared_key(user_id))
+        except Exception as e:
+            logger.warning("Shared permission cache unavailable: %s", e)
+            return None
+        return int(value) if value is not None else None
+
+    def _shared_set(self, user_id, mask):
+        try:
+            self.shared.set(self._shared_key(user_id), str(mask), self.shared_ttl)
+        except Exception as e:
+            logger.warning("Shared permission cache unavailable: %s", e)
+
+    # Invalidation
+
+    def invalidate_users(self, user_ids):
+        """Drop cached permissions for users at every cache level and in every worker"""
+        user_ids = list(user_ids)
+        self._drop_local(user_ids)
+        # Shared entries go first, so other workers reload fresh masks once notified
+        try:
+            self.shared.delete(*(self._shared_key(user_id) for user_id in user_ids))
+        except Exception as e:
+            logger.warning("Shared permission cache unavailable: %s", e)
+        try:
+            self.bus.publish(self.INVALIDATION_CHANNEL, user_ids)
+        except Exception as e:
+            logger.warning("Permission invalidation not published: %s", e)
+
+    def _drop_local(self, user_ids):
+        """Invalidation bus handler; None means messages may have been missed"""
+        if user_ids is None:
+            self.local.clear()
+            return
+        for user_id in user_ids:
+            self.local.delete(user_id)
+
+
+permission_service = PermissionService()
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _collect_permission_changes(session, flush_context, instances):
+    """Record users whose permissions the pending flush may change"""
+    pending = session.info.setdefault('permission_invalidations', set())
+    role_ids = set()
+    for obj in chain(session.dirty, session.deleted):
+        if isinstance(obj, User):
+            if obj in session.deleted or inspect(obj).attrs.roles.history.has_changes():
+                pending.add(obj.id)
+        elif isinstance(obj, Role):
+            attrs = inspect(obj).attrs
+            if (
+                obj in session.deleted
+                or attrs.permissions.history.has_changes()
+                or attrs.is_active.history.has_changes()
+            ):
+                role_ids.add(obj.id)
+        elif isinstance(obj, Permission):
+            session.info['permission_registry_changed'] = True
+    if any(isinstance(obj, Permission) for obj in session.new):
+        session.info['permission_registry_changed'] = True
+    if role_ids:
+        # Membership before the flush, so users of deleted roles are included
+        pending.update(session.connection().execute(
+            select(user_roles.c.user_id).where(user_roles.c.role_id.in_(role_ids))
+        ).scalars())
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _apply_permission_invalidations(session):
+    pending = session.info.pop('permission_invalidations', None)
+    if pending:
+        permission_service.invalidate_users(pending)
+    if session.info.pop('permission_registry_changed', False):
+        permission_service.reset_registry()
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_permission_invalidations(session):
+    session.info.pop('permission_invalidations', None)
+    session.info.pop('permission_registry_changed', None)
@@ -0,0 +1,277 @@
+"""
+Preview generation service
+Uploads of images and PDFs enqueue a preview job in the same transaction; a worker
+(SERVER_MODE=worker, or a thread next to the development server) claims due jobs from
+the preview_jobs table and renders them in a process pool. The queue is the database
+itself, so no broker is needed and several workers can share it.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from database.connection import db
+from app.core.models.preview_job import PreviewJob
+from app.core.utils.metrics import REGISTRY
+from app.core.utils.previews import UnsupportedPreview, preview_relpath, render_previews, supports
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_JOBS_FINISHED = REGISTRY.counter('preview_jobs_finished_total', 'Preview jobs finished', ['status'])
+PREVIEW_JOB_RETRIES = REGISTRY.counter('preview_job_retries_total', 'Preview job attempts that failed and were retried')
+_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+PREVIEW_RENDER_SECONDS = REGISTRY.histogram(
+    'preview_render_seconds', 'Time to render the previews of one file', buckets=_LATENCY_BUCKETS
+)
+PREVIEW_JOB_LATENCY = REGISTRY.histogram(
+    'preview_job_latency_seconds', 'Time from upload to finished previews', buckets=_LATENCY_BUCKETS
+)
+
+
+class PreviewService:
+    """Preview job queue and the worker that drains it"""
+
+    def __init__(self):
+        self.app = None
+        self.sizes = (128, 512)
+
+    def init_app(self, app):
+        self.app = app
+        self.root = app.config['UPLOAD_FOLDER']
+        self.sizes = app.config['PREVIEW_SIZES']
+        self.workers = app.config['PREVIEW_WORKERS']
+        self.max_attempts = app.config['PREVIEW_MAX_ATTEMPTS']
+        self.retry_delay = app.config['PREVIEW_RETRY_DELAY']
+        self.poll_interval = app.config['PREVIEW_POLL_INTERVAL']
+        self.job_timeout = app.config['PREVIEW_JOB_TIMEOUT']
+        # A database count: every worker would report the same totals, so only the scraping one queries
+        REGISTRY.gauge('preview_queue_depth', 'Preview jobs by status', ['status'], callback=self._queue_depth,
+                       multiprocess_mode='scrape')
+
+    # Web side
+
+    def enqueue(self, content_hash, mime_type):
+        """Queue previews for a blob in the current transaction; once per distinct content"""
+        if not supports(mime_type):
+            return
+        exists = db.session.execute(
+            select(PreviewJob.id).where(PreviewJob.content_hash == content_hash)
+        ).first()
+        if exists:
+            return
+        now = datetime.utcnow()
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(PreviewJob).values(
+                    content_hash=content_hash, mime_type=mime_type, status=PreviewJob.PENDING,
+                    attempts=0, available_at=now, created_at=now, updated_at=now, is_active=True
+                ))
+        except IntegrityError:
+            # Same content uploaded concurrently; its job already exists
+            pass
+
+    def preview_path(self, content_hash, size):
+        """Absolute path of a rendered preview, or None while it does not exist"""
+        path = os.path.abspath(os.path.join(self.root, preview_relpath(content_hash, size)))
+        return path if os.path.isfile(path) else None
+
+    def job_status(self, content_hash):
+        return db.session.execute(
+            select(PreviewJob.status).where(PreviewJob.content_hash == content_hash)
+        ).scalar()
+
+    def remove_previews(self, content_hash):
+        """Delete the previews and job of a blob that no longer exists"""
+        for size in self.sizes:
+            try:
+                os.remove(os.path.join(self.root, preview_relpath(content_hash, size)))
+            except FileNotFoundError:
+                pass
+        db.session.execute(PreviewJob.__table__.delete().where(PreviewJob.content_hash == content_hash))
+
+    def _queue_depth(self):
+        # Scraped from any process; one grouped COUNT over the claim index
+        if self.app is None:
+            return []
+        try:
+            with self.app.app_context():
+                rows = db.session.execute(
+                    select(PreviewJob.status, func.count())
+                    .where(PreviewJob.status.in_((PreviewJob.PENDING, PreviewJob.RUNNING)))
+                    .group_by(PreviewJob.status)
+                ).all()
+        except Exception:
+            logger.warning("Could not read preview queue depth", exc_info=True)
+            return []
+        counts = dict(rows)
+        return [({'status': status}, counts.get(status, 0)) for status in (PreviewJob.PENDING, PreviewJob.RUNNING)]
+
+    # Worker side
+
+    def claim(self, limit):
+        """Atomically move up to `limit` due jobs to running; safe with several workers"""
+        now = datetime.utcnow()
+        candidates = db.session.execute(
+            select(PreviewJob.id)
+            .where(PreviewJob.status == PreviewJob.PENDING, PreviewJob.available_at <= now)
+            .order_by(PreviewJob.available_at)
+            .limit(limit)
+        ).scalars().all()
+        claimed = []
+        for job_id in candidates:
+            won = db.session.execute(
+                update(PreviewJob)
+                .where(PreviewJob.id == job_id, PreviewJob.status == PreviewJob.PENDING)
+                .values(status=PreviewJob.RUNNING, started_at=now, updated_at=now,
+                        attempts=PreviewJob.attempts + 1)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if won:
+                claimed.append(job_id)
+        db.session.commit()
+        if not claimed:
+            return []
+        return db.session.execute(
+            select(PreviewJob.id, PreviewJob.content_hash, PreviewJob.mime_type,
+                   PreviewJob.attempts, PreviewJob.created_at)
+            .where(PreviewJob.id.in_(claimed))
+        ).all()
+
+    def _finish(self, job, error=None, render_seconds=None):
+        now = datetime.utcnow()
+        values = {'finished_at': now, 'updated_at': now, 'last_error': None}
+        if error is None:
+            values['status'] = PreviewJob.DONE
+            PREVIEW_RENDER_SECONDS.observe(render_seconds)
+            PREVIEW_JOB_LATENCY.observe((now - job.created_at).total_seconds())
+        elif isinstance(error, UnsupportedPreview):
+            values.update(status=PreviewJob.UNSUPPORTED, last_error=str(error))
+        elif job.attempts < self.max_attempts:
+            # Exponential backoff: retry_delay, 2 x retry_delay, 4 x ...
+            delay = self.retry_delay * 2 ** (job.attempts - 1)
+            values.update(status=PreviewJob.PENDING, finished_at=None, last_error=repr(error),
+                          available_at=now + timedelta(seconds=delay))
+            PREVIEW_JOB_RETRIES.inc()
+            logger.warning("Preview of %s failed (attempt %d), retrying in %ss: %r",
+                           job.content_hash, job.attempts, delay, error)
+        else:
+            values.update(status=PreviewJob.FAILED, last_error=repr(error))
+            logger.error("Preview of %s failed after %d attempts: %r", job.content_hash, job.attempts, error)
+        db.session.execute(
+            update(PreviewJob).where(PreviewJob.id == job.id).values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if values['status'] != PreviewJob.PENDING:
+            PREVIEW_JOBS_FINISHED.inc(status=values['status'])
+
+    def requeue_stale(self):
+        """Return jobs left running by a crashed worker to the queue"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.job_timeout)
+        stale = (PreviewJob.status == PreviewJob.RUNNING, PreviewJob.started_at < cutoff)
+        db.session.execute(
+            update(PreviewJob).where(*stale, PreviewJob.attempts < self.max_attempts)
+            .values(status=PreviewJob.PENDING, last_error='Worker timed out', updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            update(PreviewJob).where(*stale, PreviewJob.attempts >= self.max_attempts)
+            .values(status=PreviewJob.FAILED, last_error='Worker timed out', updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+    def _defer_until_placed(self, job):
+        """Put a claimed job back, without using up an attempt, while its blob is not in place
+
+        Uploads enqueue the job in their transaction but move the blob into place after
+        commit, so a worker can claim the job first. A blob still missing after
+        PREVIEW_JOB_TIMEOUT counts as a failed attempt. Returns whether the job was set aside.
+        """
+        from app.core.services.file_service import file_service
+
+        source = file_service.blob_path(job.content_hash)
+        if os.path.exists(source):
+            return False
+        now = datetime.utcnow()
+        if (now - job.created_at).total_seconds() >= self.job_timeout:
+            self._finish(job, FileNotFoundError(f'Blob {job.content_hash} is missing'))
+            return True
+        db.session.execute(
+            update(PreviewJob).where(PreviewJob.id == job.id)
+            .values(status=PreviewJob.PENDING, attempts=PreviewJob.attempts - 1, started_at=None,
+                    available_at=now + timedelta(seconds=self.poll_interval), updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return True
+
+    def _submit(self, pool, job):
+        from app.core.services.file_service import file_service
+
+        targets = {
+            size: os.path.abspath(os.path.join(self.root, preview_relpath(job.content_hash, size)))
+            for size in self.sizes
+        }
+        source = os.path.abspath(file_service.blob_path(job.content_hash))
+        return pool.submit(render_previews, source, job.mime_type, targets)
+
+    def run_worker(self, stop=None):
+        """Claim and render jobs until `stop` is set; at most PREVIEW_WORKERS run at once"""
+        stop = stop or threading.Event()
+        # spawn: forking a process that runs threads and holds database connections is unsafe
+        context = multiprocessing.get_context('spawn')
+        with self.app.app_context():
+            self.requeue_stale()
+            pool = ProcessPoolExecutor(self.workers, mp_context=context)
+            running = {}
+            last_requeue = time.monotonic()
+            try:
+                while not stop.is_set():
+                    free = self.workers - len(running)
+                    if free:
+                        for job in self.claim(free):
+                            if self._defer_until_placed(job):
+                                continue
+                            running[self._submit(pool, job)] = (job, time.perf_counter())
+                    if not running:
+                        stop.wait(self.poll_interval)
+                    else:
+                        done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            if future not in running:
+                                continue  # Already retried with the rest of a broken pool
+                            job, started = running.pop(future)
+                            error = future.exception()
+                            self._finish(job, error, time.perf_counter() - started)
+                            if isinstance(error, BrokenProcessPool):
+                                # A renderer died (e.g. out of memory); jobs in flight are retried
+                                for other, _ in running.values():
+                                    self._finish(other, error)
+                                running.clear()
+                                pool.shutdown(wait=False, cancel_futures=True)
+                                pool = ProcessPoolExecutor(self.workers, mp_context=context)
+                    if time.monotonic() - last_requeue > self.job_timeout:
+                        self.requeue_stale()
+                        last_requeue = time.monotonic()
+            finally:
+                pool.shutdown(wait=True, cancel_futures=True)
+                db.session.remove()
+
+
+preview_service = PreviewService()
+
+
+def start_preview_worker_thread():
+    """Render previews from a daemon thread next to the development server"""
+    thread = threading.Thread(target=preview_service.run_worker, name='preview-worker', daemon=True)
+    thread.start()
+    return thread
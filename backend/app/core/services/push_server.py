@@ -0,0 +1,253 @@
+"""
+Server-Sent Events push server
+A small asyncio HTTP server that holds thousands of idle notification streams per
+process. Events arrive from the in-process PushHub and from one shared database tail
+per process (instead of every client polling); reconnecting clients resume from
+Last-Event-ID, which is a notification id.
+
+    GET /api/notifications/stream?token=...   (or Authorization: Bearer <token>)
+    GET /api/push/health
+    GET /metrics
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from sqlalchemy import func, select
+
+from database.connection import db
+from app.core.models.notification import Notification
+from app.core.services.push_service import format_event, notification_event, push_hub, verify_push_token
+from app.core.utils.metrics import CONTENT_TYPE, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = '/api/notifications/stream'
+HEALTH_PATH = '/api/push/health'
+
+# Ids re-scanned by the database tail, so rows committed out of id order are still seen
+TAIL_OVERLAP = 500
+TAIL_BATCH = 5000
+
+# Reconnect delay suggested to EventSource clients
+RETRY_MS = 3000
+
+_STREAM_HEADERS = (
+    'HTTP/1.1 200 OK\r\n'
+    'Content-Type: text/event-stream\r\n'
+    'Cache-Control: no-cache\r\n'
+    'Connection: keep-alive\r\n'
+    'X-Accel-Buffering: no\r\n'
+)
+
+
+class PushServer:
+    """asyncio SSE server bound to one Flask app's configuration and database"""
+
+    def __init__(self, app, hub=push_hub):
+        self.app = app
+        self.hub = hub
+        config = app.config
+        self.heartbeat = config['PUSH_HEARTBEAT']
+        self.poll_interval = config['PUSH_POLL_INTERVAL']
+        self.resume_limit = config['PUSH_RESUME_LIMIT']
+        self.token_max_age = config['PUSH_TOKEN_MAX_AGE']
+        self.cors_origins = config['CORS_ORIGINS']
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='push-db')
+        self.server = None
+        self._tail_task = None
+
+    async def start(self, host, port):
+        loop = asyncio.get_running_loop()
+        self.hub.attach(loop, self.app.config['PUSH_QUEUE_SIZE'])
+        REGISTRY.gauge('push_connections', 'Open push streams', callback=lambda: [({}, self.hub.connections)])
+        self.server = await asyncio.start_server(self._handle, host, port, backlog=4096)
+        self._tail_task = asyncio.create_task(self._tail())
+        logger.info("Push server listening on %s:%s", host, port)
+        return self.server
+
+    async def serve_forever(self, host, port):
+        await self.start(host, port)
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self):
+        if self._tail_task is not None:
+            self._tail_task.cancel()
+        if self.server is not None:
+            self.server.close()
+        self.hub.detach()
+        self.executor.shutdown(wait=False)
+
+    # HTTP
+
+    async def _handle(self, reader, writer):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout=10)
+            method, target, headers = _parse_request(head)
+            path = urlsplit(target).path
+            if method != 'GET':
+                await self._respond(writer, 405, {'error': 'Method not allowed'})
+            elif path == STREAM_PATH:
+                await self._stream(writer, target, headers)
+            elif path == HEALTH_PATH:
+                await self._respond(writer, 200, {'status': 'alive', 'connections': self.hub.connections})
+            elif path == '/metrics':
+                await self._respond_raw(writer, 200, CONTENT_TYPE, REGISTRY.render().encode('utf-8'))
+            else:
+                await self._respond(writer, 404, {'error': 'Not found'})
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ValueError):
+            pass
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, body):
+        await self._respond_raw(writer, status, 'application/json', json.dumps(body).encode('utf-8'))
+
+    async def _respond_raw(self, writer, status, content_type, body):
+        writer.write(
+            f'HTTP/1.1 {status} {_REASONS.get(status, "")}\r\nContent-Type: {content_type}\r\n'
+            f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode('latin-1') + body
+        )
+        await writer.drain()
+
+    def _cors_header(self, headers):
+        origin = headers.get('origin')
+        if origin and origin in self.cors_origins:
+            return f'Access-Control-Allow-Origin: {origin}\r\nVary: Origin\r\n'
+        return ''
+
+    # Streams
+
+    async def _stream(self, writer, target, headers):
+        query = parse_qs(urlsplit(target).query)
+        token = query.get('token', [None])[0]
+        authorization = headers.get('authorization', '')
+        if authorization.lower().startswith('bearer '):
+            token = authorization[7:].strip()
+        user_id = verify_push_token(self.app.config['SECRET_KEY'], token, self.token_max_age) if token else None
+        if user_id is None:
+            await self._respond(writer, 401, {'error': 'Invalid or expired push token'})
+            return
+
+        last_event_id = headers.get('last-event-id') or query.get('last_event_id', [None])[0]
+        subscription = self.hub.subscribe(user_id)
+        try:
+            writer.write((_STREAM_HEADERS + self._cors_header(headers) + '\r\n').encode('latin-1'))
+            writer.write(f'retry: {RETRY_MS}\n\n'.encode('ascii'))
+            if last_event_id and last_event_id.isdigit():
+                missed = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self._missed_since, user_id, int(last_event_id)
+                )
+                for event_id, data in missed:
+                    if subscription.mark_seen(event_id):
+                        writer.write(format_event(event_id, data))
+            await writer.drain()
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=self.heartbeat)
+                except asyncio.TimeoutError:
+                    event = b': ping\n\n'
+                if event is None:
+                    return
+                writer.write(event)
+                await writer.drain()
+        finally:
+            self.hub.unsubscribe(subscription)
+
+    def _missed_since(self, user_id, last_event_id):
+        with self.app.app_context():
+            rows = db.session.execute(
+                select(Notification.id, Notification.title, Notification.message,
+                       Notification.notification_type, Notification.created_at)
+                .where(
+                    Notification.user_id == user_id,
+                    Notification.id > last_event_id,
+                    Notification.is_active.is_(True)
+                )
+                .order_by(Notification.id)
+                .limit(self.resume_limit)
+            ).all()
+            return [(row.id, notification_event(row)) for row in rows]
+
+    # Database tail: one query per interval for every stream of this process
+
+    async def _tail(self):
+        loop = asyncio.get_running_loop()
+        high_water = floor = None
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self.hub.connections:
+                # Nobody to deliver to; start from the newest row once someone subscribes
+                high_water = None
+                continue
+            try:
+                if high_water is None:
+                    high_water = floor = await loop.run_in_executor(self.executor, self._max_notification_id)
+                rows = await loop.run_in_executor(
+                    self.executor, self._rows_after, max(high_water - TAIL_OVERLAP, floor)
+                )
+            except Exception:
+                logger.exception("Notification tail query failed")
+                continue
+            for user_id, event_id, data in rows:
+                self.hub.deliver(user_id, event_id, data)
+                high_water = max(high_water, event_id)
+
+    def _max_notification_id(self):
+        with self.app.app_context():
+            return db.session.execute(select(func.max(Notification.id))).scalar() or 0
+
+    def _rows_after(self, after_id):
+        with self.app.app_context():
+            rows = db.session.execute(
+                select(Notification.id, Notification.user_id, Notification.title, Notification.message,
+                       Notification.notification_type, Notification.created_at)
+                .where(Notification.id > after_id, Notification.is_active.is_(True))
+                .order_by(Notification.id)
+                .limit(TAIL_BATCH)
+            ).all()
+            return [(row.user_id, row.id, notification_event(row)) for row in rows]
+
+
+_REASONS = {200: 'OK', 401: 'Unauthorized', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+def _parse_request(head):
+    lines = head.decode('latin-1').split('\r\n')
+    method, target, _ = lines[0].split(' ', 2)
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    return method, target, headers
+
+
+def run_push_server(app, host, port):
+    """Serve push streams until interrupted (SERVER_MODE=push)"""
+    asyncio.run(PushServer(app).serve_forever(host, port))
+
+
+def start_push_server_thread(app, host, port):
+    """Serve push streams from a daemon thread next to the development server"""
+    started = threading.Event()
+
+    def _run():
+        async def _main():
+            await PushServer(app).start(host, port)
+            started.set()
+            await asyncio.Event().wait()
+        asyncio.run(_main())
+
+    thread = threading.Thread(target=_run, name='push-server', daemon=True)
+    thread.start()
+    started.wait(5)
+    return thread
@@ -0,0 +1,168 @@
+"""
+Push delivery hub
+In-process pub/sub between notification writers and the SSE push server: publishers
+on any thread hand events to the server's asyncio loop, which fans them out to the
+per-connection queues of the recipient's open streams
+"""
+
+import asyncio
+import json
+from collections import defaultdict, deque
+
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from app.core.utils.metrics import REGISTRY
+
+PUSH_EVENTS_DELIVERED = REGISTRY.counter('push_events_delivered_total', 'Events written to push subscriber queues')
+PUSH_SUBSCRIBERS_DROPPED = REGISTRY.counter(
+    'push_subscribers_dropped_total', 'Push streams closed because the client fell too far behind'
+)
+
+# Recent event ids remembered per subscriber, so in-process and database-fed copies are sent once
+_SEEN_EVENTS = 1024
+
+
+def format_event(event_id, data, event='notification'):
+    """Encode one Server-Sent Event"""
+    payload = json.dumps(data, separators=(',', ':'))
+    return f'id: {event_id}\nevent: {event}\ndata: {payload}\n\n'.encode('utf-8')
+
+
+def notification_event(row):
+    """Event data for a notification row or instance"""
+    created_at = row.created_at
+    return {
+        'id': row.id,
+        'title': row.title,
+        'message': row.message,
+        'notification_type': row.notification_type,
+        'created_at': created_at.isoformat() if created_at else None
+    }
+
+
+class Subscription:
+    """One open stream: a bounded queue of encoded events for one user"""
+
+    def __init__(self, user_id, maxsize):
+        self.user_id = user_id
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+        self._seen = deque(maxlen=_SEEN_EVENTS)
+        self._seen_set = set()
+
+    def close(self):
+        """Drop pending events and queue the end-of-stream marker (None)"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    def mark_seen(self, event_id):
+        """Remember an event id; False when it was already delivered"""
+        if event_id in self._seen_set:
+            return False
+        if len(self._seen) == self._seen.maxlen:
+            self._seen_set.discard(self._seen[0])
+        self._seen.append(event_id)
+        self._seen_set.add(event_id)
+        return True
+
+
+class PushHub:
+    """Routes published events to the subscriptions of their recipient
+
+    Subscriptions live on one asyncio loop; publish() may be called from any thread
+    and is a no-op until a push server has attached its loop in this process.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.queue_size = 256
+        self._subscriptions = defaultdict(set)
+
+    def attach(self, loop, queue_size=256):
+        self.loop = loop
+        self.queue_size = queue_size
+
+    def detach(self):
+        self.loop = None
+        self._subscriptions.clear()
+
+    @property
+    def active(self):
+        return self.loop is not None and not self.loop.is_closed()
+
+    @property
+    def connections(self):
+        return sum(len(subscriptions) for subscriptions in list(self._subscriptions.values()))
+
+    def has_subscribers(self, user_id):
+        return bool(self._subscriptions.get(user_id))
+
+    # Loop side
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id, self.queue_size)
+        self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+
+    def deliver(self, user_id, event_id, data):
+        """Queue an event for every stream of the user (call on the hub's loop)"""
+        subscriptions = self._subscriptions.get(user_id)
+        if not subscriptions:
+            return
+        encoded = format_event(event_id, data)
+        for subscription in list(subscriptions):
+            if subscription.overflowed or not subscription.mark_seen(event_id):
+                continue
+            try:
+                subscription.queue.put_nowait(encoded)
+                PUSH_EVENTS_DELIVERED.inc()
+            except asyncio.QueueFull:
+                # Slow client: close the stream; it resumes from Last-Event-ID on reconnect
+                subscription.overflowed = True
+                subscription.close()
+                PUSH_SUBSCRIBERS_DROPPED.inc()
+
+    # Any thread
+
+    def publish(self, events):
+        """Publish (user_id, event_id, data) tuples to local subscribers, from any thread"""
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+        events = list(events)
+        if events:
+            loop.call_soon_threadsafe(self._deliver_many, events)
+
+    def _deliver_many(self, events):
+        for user_id, event_id, data in events:
+            self.deliver(user_id, event_id, data)
+
+
+push_hub = PushHub()
+
+
+# Stream tokens
+
+def _serializer(secret_key):
+    return URLSafeTimedSerializer(secret_key, salt='push-stream')
+
+
+def create_push_token(secret_key, user_id):
+    """Signed token that lets a client open the push stream of `user_id`"""
+    return _serializer(secret_key).dumps({'u': user_id})
+
+
+def verify_push_token(secret_key, token, max_age):
+    """User id from a push token, or None when it is invalid or expired"""
+    try:
+        return _serializer(secret_key).loads(token, max_age=max_age)['u']
+    except (BadSignature, KeyError, TypeError):
+        return None
@@ -1,4 +1,182 @@
-# tenant_service.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+Tenant sharding service
+In sharding mode (TENANT_SHARDING=database or schema) each tenant's data lives in
+its own database or PostgreSQL schema. The primary database stays the tenant
+catalog; requests are bound to the tenant's shard engine, kept in a bounded LRU so
+thousands of tenants never hold thousands of connection pools open.
+"""
 
+import logging
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
 
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.engine import make_url
+
+from database.connection import (
+    build_engine_options, create_schema, db, instrument_engine, uninstrument_engine
+)
+from app.core.models.tenant import Tenant
+from app.core.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+SHARDING_MODES = ('database', 'schema')
+
+
+class Shard(namedtuple('Shard', ['slug', 'url', 'schema'])):
+    """Where one tenant's data lives: a database URL, or a schema on the primary"""
+
+    __slots__ = ()
+
+
+class TenantShardService:
+    """Maps tenant slugs to shards and caches one engine per active shard"""
+
+    def __init__(self):
+        self.app = None
+        self.mode = None
+        self.shards = TTLCache()
+        self._engines = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        mode = app.config['TENANT_SHARDING']
+        if mode and mode not in SHARDING_MODES:
+            raise ValueError(f"TENANT_SHARDING must be one of {', '.join(SHARDING_MODES)}, not {mode!r}")
+        self.app = app
+        self.mode = mode or None
+        self.url_template = app.config['TENANT_SHARD_URL']
+        self.schema_prefix = app.config['TENANT_SHARD_SCHEMA_PREFIX']
+        self.max_engines = app.config['TENANT_SHARD_ENGINES']
+        self.shards = TTLCache(app.config['TENANT_CACHE_SIZE'], app.config['TENANT_CACHE_TTL'])
+        self.dispose_all()
+
+    @property
+    def enabled(self):
+        return self.mode is not None
+
+    # Slug -> shard
+
+    def shard_for(self, slug):
+        """Shard of a tenant, from its Tenant.shard override or the configured naming"""
+        shard = self.shards.get(slug)
+        if shard is None:
+            # Always the catalog on the primary, even when the session is already on a shard
+            with db.engine.connect() as connection:
+                override = connection.execute(select(Tenant.shard).where(Tenant.slug == slug)).scalar()
+            shard = self._build_shard(slug, override)
+            self.shards.set(slug, shard)
+        return shard
+
+    def _build_shard(self, slug, override=None):
+        if self.mode == 'schema':
+            return Shard(slug, None, override or f'{self.schema_prefix}{slug}')
+        url = override or self.url_template.format(slug=slug)
+        return Shard(slug, self._resolve_sqlite_path(url), None)
+
+    def _resolve_sqlite_path(self, url):
+        # Relative SQLite paths are relative to the instance folder, as for SQLALCHEMY_DATABASE_URI
+        parsed = make_url(url)
+        if parsed.get_backend_name() != 'sqlite' or not parsed.database or parsed.database == ':memory:':
+            return url
+        if os.path.isabs(parsed.database):
+            return url
+        path = os.path.normpath(os.path.join(self.app.instance_path, parsed.database))
+        return parsed.set(database=path).render_as_string(hide_password=False)
+
+    # Shard -> engine
+
+    def engine_for(self, shard):
+        """Engine for a shard, created on first use; the least recently used is disposed past the limit"""
+        key = shard.schema or shard.url
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is not None:
+                self._engines.move_to_end(key)
+                return engine
+            engine = self._create_engine(shard)
+            self._engines[key] = engine
+            while len(self._engines) > self.max_engines:
+                _, evicted = self._engines.popitem(last=False)
+                self._dispose(evicted)
+            return engine
+
+    def _create_engine(self, shard):
+        if shard.schema:
+            # Shares the primary's pool; unqualified table names resolve to the tenant schema
+            return db.engine.execution_options(schema_translate_map={None: shard.schema})
+        config = self.app.config
+        options = build_engine_options(config, shard.url, pool_label=f'tenant_{shard.slug}')
+        if 'pool_size' in options:
+            options.update(pool_size=config['TENANT_SHARD_POOL_SIZE'],
+                           max_overflow=config['TENANT_SHARD_MAX_OVERFLOW'])
+        engine = create_engine(shard.url, **options)
+        instrument_engine(engine, self.app)
+        return engine
+
+    @staticmethod
+    def _dispose(engine):
+        if engine.get_execution_options().get('schema_translate_map'):
+            return
+        uninstrument_engine(engine)
+        engine.dispose()
+
+    def dispose_all(self):
+        """Close every cached shard engine"""
+        with self._lock:
+            while self._engines:
+                _, engine = self._engines.popitem()
+                self._dispose(engine)
+
+    # Sessions
+
+    def bind_session(self, session, slug):
+        """Route every statement of `session` to the tenant's shard"""
+        session.info['shard_engine'] = self.engine_for(self.shard_for(slug))
+
+    @contextmanager
+    def bound(self, session, slug):
+        """Route `session` to the tenant's shard for the duration of the block"""
+        previous = session.info.get('shard_engine')
+        self.bind_session(session, slug)
+        try:
+            yield session
+        finally:
+            session.info['shard_engine'] = previous
+
+    def invalidate(self):
+        """Forget cached slug -> shard mappings"""
+        self.shards.clear()
+
+    # Provisioning
+
+    def provision(self, tenant):
+        """Create (or migrate) a tenant's shard and copy its catalog row into it
+
+        Safe to re-run: existing tables and the tenant row are left in place.
+        """
+        shard = self.shard_for(tenant.slug)
+        engine = self.engine_for(shard)
+        if shard.schema:
+            with db.engine.begin() as connection:
+                connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{shard.schema}"'))
+        else:
+            url = make_url(shard.url)
+            if url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:':
+                os.makedirs(os.path.dirname(url.database), exist_ok=True)
+
+        create_schema(engine)
+
+        columns = {column.name: getattr(tenant, column.key) for column in Tenant.__table__.columns}
+        with engine.begin() as connection:
+            exists = connection.execute(select(Tenant.id).where(Tenant.id == tenant.id)).scalar()
+            if exists is None:
+                connection.execute(insert(Tenant.__table__).values(**columns))
+        logger.info("Provisioned shard for tenant %s", tenant.slug)
+        return shard
+
+
+tenant_shards = TenantShardService()
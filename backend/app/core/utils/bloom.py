@@ -0,0 +1,49 @@
+"""
+Bloom filter
+Compact set membership with false positives but no false negatives: `key in bloom`
+is False only for keys never added
+"""
+
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Bit array sized for `capacity` keys at `error_rate` false positives"""
+
+    def __init__(self, capacity=100000, error_rate=0.001):
+        capacity = max(int(capacity), 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: k positions from the two halves of one 128-bit digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        size = self.size
+        return [(first + i * second) % size for i in range(self.hashes)]
+
+    def add(self, key):
+        bits = self._bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        # Same positions as _positions(), stopping at the first unset bit (the common case)
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        position = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        bits, size = self._bits, self.size
+        for _ in range(self.hashes):
+            index = position % size
+            if not bits[index >> 3] & (1 << (index & 7)):
+                return False
+            position += step
+        return True
+
+    def __len__(self):
+        return self.count
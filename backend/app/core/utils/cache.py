@@ -0,0 +1,193 @@
+"""
+In-process and shared cache helpers
+TTLCache is a thread-safe LRU with per-entry expiry; shared backends let several
+worker processes see the same values, and invalidation buses tell every worker to
+drop entries from its in-process caches
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, maxsize=10000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class NullSharedCache:
+    """Shared backend used when no cache server is configured"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def incr(self, key, ttl):
+        return None
+
+
+class RedisSharedCache:
+    """Shared backend storing string values in Redis"""
+
+    def __init__(self, client, prefix='sems:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return value.decode('utf-8') if value is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, ex=max(int(ttl), 1))
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def incr(self, key, ttl):
+        """Atomically increment a counter that expires `ttl` seconds after its first increment"""
+        pipeline = self.client.pipeline()
+        pipeline.set(self.prefix + key, 0, ex=max(int(ttl), 1), nx=True)
+        pipeline.incr(self.prefix + key)
+        return pipeline.execute()[1]
+
+
+class NullInvalidationBus:
+    """Invalidation bus used when no cache server is configured
+
+    Other workers keep their in-process entries until these expire.
+    """
+
+    def subscribe(self, channel, handler):
+        pass
+
+    def publish(self, channel, keys):
+        pass
+
+    def ensure_listening(self):
+        pass
+
+
+class RedisInvalidationBus:
+    """Broadcasts invalidated keys to every worker over Redis pub/sub
+
+    Each process listens on one daemon thread, started lazily so forked workers
+    start their own. handler(keys) receives the published keys, or None when
+    messages may have been missed while (re)connecting and everything must go.
+    """
+
+    def __init__(self, client, prefix='sems:', retry_interval=1.0):
+        self.client = client
+        self.prefix = prefix
+        self.retry_interval = retry_interval
+        self._handlers = {}
+        self._listener_pid = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel, handler):
+        self._handlers[self.prefix + channel] = handler
+
+    def publish(self, channel, keys):
+        self.client.publish(self.prefix + channel, json.dumps(list(keys)))
+
+    def ensure_listening(self):
+        """Start this process's listener thread if it is not running yet"""
+        if self._listener_pid == os.getpid() or not self._handlers:
+            return
+        with self._lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+            threading.Thread(target=self._listen, name='cache-invalidation', daemon=True).start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(*self._handlers)
+                self._dispatch_all(None)
+                for message in pubsub.listen():
+                    if message['type'] != 'message':
+                        continue
+                    channel = message['channel']
+                    handler = self._handlers.get(channel.decode('utf-8') if isinstance(channel, bytes) else channel)
+                    if handler is not None:
+                        handler(json.loads(message['data']))
+            except Exception as e:
+                logger.warning("Cache invalidation listener disconnected: %s", e)
+                time.sleep(self.retry_interval)
+
+    def _dispatch_all(self, keys):
+        for handler in list(self._handlers.values()):
+            handler(keys)
+
+
+def create_invalidation_bus(url):
+    """Invalidation bus for REDIS_URL, or a no-op bus when Redis is not configured or installed"""
+    if not url:
+        return NullInvalidationBus()
+    try:
+        import redis
+    except ImportError:
+        return NullInvalidationBus()
+    # No socket timeout: the listener blocks waiting for messages
+    return RedisInvalidationBus(redis.Redis.from_url(url, health_check_interval=30))
+
+
+def create_shared_cache(url):
+    """Shared cache for REDIS_URL, or a no-op backend when Redis is not configured or installed"""
+    if not url:
+        return NullSharedCache()
+    try:
+        import redis
+    except ImportError:
+        return NullSharedCache()
+    return RedisSharedCache(redis.Redis.from_url(url, socket_timeout=0.5))
@@ -0,0 +1,380 @@
+"""
+Lightweight Prometheus metrics registry
+Counters, gauges and histograms rendered in the text exposition format.
+
+Each process keeps its own values. Under a pre-forking server, enable_multiprocess()
+makes every worker write a snapshot to a shared directory every few seconds, and a
+scrape served by any worker merges them: counters and histograms are summed (those
+of exited workers are folded into one file, so nothing is lost when workers recycle)
+and gauges are summed over live workers. Gauges with multiprocess_mode='scrape'
+measure something shared by every worker (e.g. rows in a table): they are left out
+of the snapshots and computed once, by the worker serving the scrape.
+"""
+
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: exited workers' files are left unfolded
+    fcntl = None
+
+GAUGE_MULTIPROCESS_MODES = ('sum', 'scrape')
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base class for a labelled metric family"""
+
+    type_name = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _pairs(self, key):
+        return list(zip(self.labelnames, key))
+
+    def labels(self, **labels):
+        """Child bound to one label set, for hot paths that would otherwise rebuild the key per call"""
+        return _Child(self, self._key(labels))
+
+    def snapshot(self):
+        """[(key, value)] pairs, in a JSON-serializable form"""
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def merge(self, values):
+        """Add snapshot values from another process"""
+        with self._lock:
+            for key, value in values:
+                key = tuple(key)
+                self._values[key] = self._values.get(key, 0) + value
+
+    def samples(self):
+        """Yield (suffix, label pairs, value) tuples"""
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield '', self._pairs(key), value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+        for suffix, pairs, value in self.samples():
+            lines.append(f'{self.name}{suffix}{_format_labels(pairs)} {_format_value(value)}')
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing value"""
+
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self._inc(self._key(labels), amount)
+
+    def _inc(self, key, amount=1):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that can go up and down, or be computed at scrape time by a callback"""
+
+    type_name = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), callback=None, multiprocess_mode='sum'):
+        super().__init__(name, documentation, labelnames)
+        if multiprocess_mode not in GAUGE_MULTIPROCESS_MODES:
+            raise ValueError(f"{name}: multiprocess_mode must be one of {', '.join(GAUGE_MULTIPROCESS_MODES)}")
+        self.callback = callback
+        self.multiprocess_mode = multiprocess_mode
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        self._inc(self._key(labels), amount)
+
+    def _inc(self, key, amount=1):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        if self.callback is None:
+            yield from super().samples()
+            return
+        # Callbacks yield (labels dict, value) pairs
+        for labels, value in self.callback():
+            yield '', self._pairs(self._key(labels)), value
+
+    def snapshot(self):
+        if self.callback is None:
+            return super().snapshot()
+        return [[list(self._key(labels)), value] for labels, value in self.callback()]
+
+
+class Histogram(Metric):
+    """Bucketed distribution of observed values"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        self._observe(self._key(labels), value)
+
+    def _observe(self, key, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        for key, (counts, total, count) in items:
+            pairs = self._pairs(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield '_bucket', pairs + [('le', _format_value(float(bound)))], cumulative
+            yield '_sum', pairs, total
+            yield '_count', pairs, count
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), [list(state[0]), state[1], state[2]]] for key, state in self._values.items()]
+
+    def merge(self, values):
+        with self._lock:
+            for key, (counts, total, count) in values:
+                key = tuple(key)
+                state = self._values.get(key)
+                if state is None:
+                    state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                if len(counts) != len(state[0]):
+                    continue  # Written with other buckets by an older deployment
+                state[0] = [a + b for a, b in zip(state[0], counts)]
+                state[1] += total
+                state[2] += count
+
+
+class _Child:
+    """A metric bound to one label set"""
+
+    __slots__ = ('metric', 'key')
+
+    def __init__(self, metric, key):
+        self.metric = metric
+        self.key = key
+
+    def inc(self, amount=1):
+        self.metric._inc(self.key, amount)
+
+    def dec(self, amount=1):
+        self.metric._inc(self.key, -amount)
+
+    def observe(self, value):
+        self.metric._observe(self.key, value)
+
+
+class Registry:
+    """Collection of metrics rendered together for a scrape"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self.directory = None
+        self.interval = 5.0
+        self._writer_pid = None
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.type_name}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=(), callback=None, multiprocess_mode='sum'):
+        """Gauge summed over workers, or with multiprocess_mode='scrape' computed only by the scraping worker"""
+        gauge = self._get_or_create(Gauge, name, documentation, labelnames, multiprocess_mode=multiprocess_mode)
+        if callback is not None:
+            gauge.callback = callback
+        return gauge
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        """Render every metric in the Prometheus text format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        if self.directory:
+            metrics = self._merged(metrics)
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+    # Multi-process mode
+
+    def enable_multiprocess(self, directory, interval=5.0, clear=False):
+        """Share metrics between the worker processes of one server through `directory`
+
+        Call in the server's master before forking with clear=True; every worker then
+        calls start_writer() after the fork and write_final() when it exits.
+        """
+        os.makedirs(directory, exist_ok=True)
+        if clear:
+            for path in glob.glob(os.path.join(directory, '*.json')):
+                os.remove(path)
+        self.directory = directory
+        self.interval = interval
+
+    def _snapshot(self, exited=False, shared=False):
+        """This process's metrics; `shared` leaves out those only the scraping worker reports"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        if shared:
+            metrics = [metric for metric in metrics if getattr(metric, 'multiprocess_mode', 'sum') != 'scrape']
+        return {
+            'exited': exited,
+            'metrics': {
+                metric.name: {
+                    'type': metric.type_name,
+                    'documentation': metric.documentation,
+                    'labelnames': list(metric.labelnames),
+                    'buckets': list(getattr(metric, 'buckets', ())),
+                    'values': metric.snapshot()
+                }
+                for metric in metrics
+            }
+        }
+
+    def _write(self, name, snapshot):
+        path = os.path.join(self.directory, name)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as target:
+            json.dump(snapshot, target)
+        os.replace(temp_path, path)
+
+    def start_writer(self):
+        """Write this process's snapshot every `interval` seconds from a daemon thread"""
+        if not self.directory or self._writer_pid == os.getpid():
+            return
+        self._writer_pid = os.getpid()
+
+        def _run():
+            while True:
+                time.sleep(self.interval)
+                try:
+                    self._write(f'{os.getpid()}.json', self._snapshot(shared=True))
+                except OSError:
+                    pass
+
+        threading.Thread(target=_run, name='metrics-writer', daemon=True).start()
+
+    def write_final(self):
+        """Fold this exiting process's counters and histograms into exited.json"""
+        if not self.directory:
+            return
+        own_path = os.path.join(self.directory, f'{os.getpid()}.json')
+        if fcntl is None:
+            self._write(f'{os.getpid()}.json', self._snapshot(exited=True, shared=True))
+            return
+        with open(os.path.join(self.directory, 'exited.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            folded = Registry()
+            folded._merge_file(os.path.join(self.directory, 'exited.json'), gauges=False)
+            folded._merge_snapshot(self._snapshot(exited=True, shared=True), gauges=False)
+            self._write('exited.json', folded._snapshot(exited=True))
+        try:
+            os.remove(own_path)
+        except FileNotFoundError:
+            pass
+
+    def _merge_snapshot(self, snapshot, gauges=True):
+        kinds = {'counter': Counter, 'gauge': Gauge, 'histogram': Histogram}
+        for name, family in snapshot['metrics'].items():
+            cls = kinds.get(family['type'])
+            if cls is None or (cls is Gauge and not gauges):
+                continue
+            if cls is Histogram:
+                metric = self._get_or_create(cls, name, family['documentation'], family['labelnames'],
+                                             buckets=family['buckets'])
+            else:
+                metric = self._get_or_create(cls, name, family['documentation'], family['labelnames'])
+            metric.merge(family['values'])
+
+    def _merge_file(self, path, gauges=True):
+        try:
+            with open(path) as source:
+                snapshot = json.load(source)
+        except (OSError, ValueError):
+            return
+        # Gauges describe the present: skip those of exited workers and of workers that stopped writing
+        fresh = not snapshot.get('exited') and time.time() - os.path.getmtime(path) < self.interval * 3
+        self._merge_snapshot(snapshot, gauges=gauges and fresh)
+
+    def _merged(self, metrics):
+        """This process's live metrics plus the latest snapshots of every other worker"""
+        merged = Registry()
+        merged.interval = self.interval
+        own = str(os.getpid())
+        merged._merge_snapshot(self._snapshot())
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            if os.path.basename(path)[:-5] != own:
+                merged._merge_file(path)
+        # Keep this process's registration order, so the output is stable between scrapes
+        return [merged._metrics[metric.name] for metric in metrics if metric.name in merged._metrics] + [
+            metric for name, metric in merged._metrics.items() if name not in self._metrics
+        ]
+
+
+# Process-wide registry scraped by /metrics
+REGISTRY = Registry()
@@ -0,0 +1,36 @@
+"""
+Keyset pagination helpers
+Cursors are opaque URL-safe tokens holding the (created_at, id) of the last row
+of a page; clients pass them back unchanged to fetch the next page
+"""
+
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+
+
+class Page(namedtuple('Page', ['items', 'next_cursor'])):
+    """One page of results; next_cursor is None on the last page"""
+
+    __slots__ = ()
+
+    def to_dict(self, serialize=None):
+        items = serialize(self.items) if serialize else self.items
+        return {'items': items, 'next_cursor': self.next_cursor}
+
+
+def encode_cursor(created_at, record_id):
+    """Opaque token for the position after (created_at, record_id)"""
+    payload = json.dumps([created_at.isoformat(), record_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(token):
+    """(created_at, id) position from a cursor token; raises ValueError when malformed"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(record_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError('Invalid pagination cursor') from e
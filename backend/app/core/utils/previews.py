@@ -0,0 +1,78 @@
+"""
+Preview rendering
+Runs inside preview worker processes: takes file paths and returns file paths, with no
+Flask or database access. Images are decoded with Pillow; PDFs are rasterised (first
+page) with poppler's pdftoppm when it is installed.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+
+PDF_MIME_TYPE = 'application/pdf'
+
+# Decoding refuses images above this many pixels (decompression bombs)
+MAX_IMAGE_PIXELS = 100_000_000
+
+
+class UnsupportedPreview(Exception):
+    """The content cannot be previewed; the job is not retried"""
+
+
+def supports(mime_type):
+    """Whether previews are attempted for a MIME type"""
+    if not mime_type:
+        return False
+    return mime_type.startswith('image/') or mime_type == PDF_MIME_TYPE
+
+
+def preview_relpath(content_hash, size):
+    """Path of a preview relative to UPLOAD_FOLDER, laid out like the blob store"""
+    return os.path.join('previews', content_hash[:2], content_hash[2:4], f'{content_hash}-{size}.jpg')
+
+
+def render_previews(source, mime_type, targets, quality=80):
+    """Write a JPEG preview of `source` for every {size: path} in `targets`
+
+    Each preview fits in a size x size box and keeps the aspect ratio. Files are written
+    to a temporary name and renamed, so readers never see a partial preview.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    largest = max(targets)
+    with tempfile.TemporaryDirectory(prefix='preview-') as workdir:
+        if mime_type == PDF_MIME_TYPE:
+            source = _rasterize_pdf(source, largest, workdir)
+        try:
+            image = Image.open(source)
+        except UnidentifiedImageError as e:
+            raise UnsupportedPreview(str(e))
+        with image:
+            # JPEG decoders can scale down while decoding, far cheaper than a full decode
+            image.draft('RGB', (largest, largest))
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            # Largest first, so each smaller preview is resized from the previous one
+            for size in sorted(targets, reverse=True):
+                image.thumbnail((size, size), Image.LANCZOS)
+                path = targets[size]
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                partial = f'{path}.{os.getpid()}.tmp'
+                image.save(partial, 'JPEG', quality=quality, optimize=True)
+                os.replace(partial, path)
+    return targets
+
+
+def _rasterize_pdf(source, size, workdir):
+    """First page of a PDF as a PNG scaled to `size` pixels on its longest side"""
+    if shutil.which('pdftoppm') is None:
+        raise UnsupportedPreview('pdftoppm (poppler-utils) is not installed')
+    prefix = os.path.join(workdir, 'page')
+    subprocess.run(
+        ['pdftoppm', '-f', '1', '-l', '1', '-png', '-singlefile', '-scale-to', str(size), source, prefix],
+        check=True, capture_output=True, timeout=120
+    )
+    return f'{prefix}.png'
@@ -0,0 +1,185 @@
+"""
+Sampling profiler and profile store
+SamplingProfiler runs one thread that, every `interval` seconds, reads the current
+frame of each thread being profiled (sys._current_frames) and counts its stack in
+collapsed form, root first and frames separated by ';'. That is the input format of
+flamegraph.pl and speedscope. The profiled code runs untraced, so its cost is the
+sampler thread taking the GIL briefly; with nothing to profile the thread sleeps.
+
+ProfileStore keeps one JSON file per profiled request in a directory, so every
+worker's profiles are aggregated together. It keeps at most `max_profiles` files,
+none older than `retention` seconds.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+_BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))) + os.sep
+_STDLIB_ROOT = os.path.dirname(os.__file__) + os.sep
+MAX_DEPTH = 128
+
+
+class SamplingProfiler:
+    """Samples the stacks of registered threads until they are unregistered"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._active = {}  # thread id -> Counter of collapsed stacks
+        self._labels = {}  # code object -> frame label
+        self._wakeup = threading.Condition()
+        self._thread = None
+
+    def start(self, thread_id):
+        """Begin sampling `thread_id`"""
+        stacks = Counter()
+        with self._wakeup:
+            self._active[thread_id] = stacks
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+        return stacks
+
+    def stop(self, thread_id):
+        """Stop sampling `thread_id` and return its stack counts"""
+        with self._wakeup:
+            return self._active.pop(thread_id, None)
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while not self._active:
+                    self._wakeup.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            # Under the lock, so no sample lands in a profile after stop() returned it
+            with self._wakeup:
+                for thread_id, stacks in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[self._collapse(frame)] += 1
+            del frames
+
+    def _collapse(self, frame):
+        labels = self._labels
+        parts = []
+        while frame is not None and len(parts) < MAX_DEPTH:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = _label(code)
+            parts.append(label)
+            frame = frame.f_back
+        parts.reverse()
+        return ';'.join(parts)
+
+
+def _label(code):
+    filename = code.co_filename
+    if filename.startswith(_BACKEND_ROOT) and 'site-packages' not in filename:
+        filename = os.path.relpath(filename, _BACKEND_ROOT)
+    else:
+        marker = filename.rfind('site-packages' + os.sep)
+        if marker >= 0:
+            filename = filename[marker + len('site-packages') + 1:]
+        elif filename.startswith(_STDLIB_ROOT):
+            filename = filename[len(_STDLIB_ROOT):]
+    name = getattr(code, 'co_qualname', code.co_name)
+    # ';' separates frames in the collapsed format; the count follows the last space
+    return f'{name} ({filename}:{code.co_firstlineno})'.replace(';', ':')
+
+
+class ProfileStore:
+    """Profiles as files in `directory`, bounded in number and age"""
+
+    def __init__(self, directory, retention=86400, max_profiles=1000):
+        self.directory = directory
+        self.retention = retention
+        self.max_profiles = max_profiles
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def save(self, route, duration, stacks):
+        """Write one request's profile and return its id"""
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+        profile_id = f'{int(time.time() * 1000):013d}-{os.getpid()}-{sequence}'
+        path = os.path.join(self.directory, profile_id + '.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as target:
+            json.dump({'route': route, 'duration': duration, 'stacks': stacks}, target)
+        os.replace(path + '.tmp', path)
+        if sequence % 50 == 1:
+            self.prune()
+        return profile_id
+
+    def _files(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        # Ids start with the zero-padded time in milliseconds, so names sort oldest first
+        return sorted(name for name in names if name.endswith('.json'))
+
+    def prune(self):
+        """Delete profiles beyond the retention period or the count limit"""
+        names = self._files()
+        cutoff = f'{int((time.time() - self.retention) * 1000):013d}'
+        expired = [name for name in names if name < cutoff]
+        excess = len(names) - len(expired) - self.max_profiles
+        if excess > 0:
+            expired += names[len(expired):len(expired) + excess]
+        for name in expired:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def _profiles(self, route=None, since=None):
+        names = self._files()
+        if since is not None:
+            start = f'{int(since * 1000):013d}'
+            names = [name for name in names if name >= start]
+        for name in names:
+            try:
+                with open(os.path.join(self.directory, name), encoding='utf-8') as source:
+                    profile = json.load(source)
+            except (OSError, ValueError):
+                continue  # Pruned by another worker meanwhile
+            if route is None or profile['route'] == route:
+                yield name[:-5], profile
+
+    def summary(self, since=None):
+        """Profiles, samples and latest profile id per route"""
+        routes = {}
+        for profile_id, profile in self._profiles(since=since):
+            entry = routes.setdefault(profile['route'], {'profiles': 0, 'samples': 0, 'seconds': 0.0})
+            entry['profiles'] += 1
+            entry['samples'] += sum(profile['stacks'].values())
+            entry['seconds'] = round(entry['seconds'] + profile['duration'], 6)
+            entry['latest'] = profile_id
+        return routes
+
+    def aggregate(self, route=None, since=None):
+        """Stack counts summed over the matching profiles"""
+        stacks = Counter()
+        for _, profile in self._profiles(route, since):
+            stacks.update(profile['stacks'])
+        return stacks
+
+    def clear(self):
+        for name in self._files():
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+
+def collapsed(stacks):
+    """Text in the collapsed stack format: one 'frame;frame;frame count' line per stack"""
+    return ''.join(f'{stack} {count}\n' for stack, count in sorted(stacks.items()))
@@ -0,0 +1,184 @@
+"""
+Rate limiting algorithms and counter stores
+Each store implements two decisions, both answering (allowed, remaining, retry_after):
+
+    token_bucket(key, rate, burst)      `rate` requests/second on average, bursts up to `burst`
+    sliding_window(key, limit, window)  at most `limit` requests in any `window` seconds
+
+LocalRateLimitStore keeps counters in this process, split over independently locked
+shards so concurrent requests rarely wait on each other; it also stands in for the
+shared backend when no Redis is configured, in which case limits apply per worker.
+RedisRateLimitStore keeps them in Redis so every worker and host shares one count.
+"""
+
+import math
+import threading
+import time
+
+# Atomic token bucket: KEYS[1] = bucket, ARGV = rate, burst, now; returns {allowed, tokens * 1000}
+_TOKEN_BUCKET_SCRIPT = """
+local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens, at = tonumber(state[1]) or burst, tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(now - at, 0) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, math.floor(tokens * 1000)}
+"""
+
+# Atomic sliding window: KEYS = current, previous window; ARGV = limit, previous weight, ttl.
+# Only admitted requests are counted, as in LocalRateLimitStore; returns {allowed, current, previous}
+_SLIDING_WINDOW_SCRIPT = """
+local limit, weight, ttl = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local current = tonumber(redis.call('GET', KEYS[1]) or 0)
+local previous = tonumber(redis.call('GET', KEYS[2]) or 0)
+local allowed = 0
+if previous * weight + current < limit then
+    current = redis.call('INCR', KEYS[1])
+    redis.call('EXPIRE', KEYS[1], ttl)
+    allowed = 1
+end
+return {allowed, current, previous}
+"""
+
+
+class _Shard:
+    __slots__ = ('lock', 'entries')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+
+
+class LocalRateLimitStore:
+    """In-process counters over `shards` independently locked dicts of at most `max_keys` keys in total"""
+
+    def __init__(self, shards=16, max_keys=100000):
+        count = 1 << max(int(shards) - 1, 0).bit_length()  # Next power of two, for masking
+        self._shards = [_Shard() for _ in range(count)]
+        self._mask = count - 1
+        self._max_per_shard = max(max_keys // count, 1)
+
+    def _shard(self, key):
+        return self._shards[hash(key) & self._mask]
+
+    def token_bucket(self, key, rate, burst):
+        now = time.monotonic()
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None:
+                if len(shard.entries) >= self._max_per_shard:
+                    self._evict(shard, now)
+                # [tokens, refilled_at, idle_after]: a bucket idle this long is full again
+                entry = shard.entries[key] = [burst, now, burst / rate]
+            else:
+                entry[0] = min(burst, entry[0] + (now - entry[1]) * rate)
+                entry[1] = now
+            if entry[0] >= 1:
+                entry[0] -= 1
+                return True, int(entry[0]), 0.0
+            return False, 0, (1 - entry[0]) / rate
+
+    def sliding_window(self, key, limit, window):
+        now = time.monotonic()
+        index = int(now // window)
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None:
+                if len(shard.entries) >= self._max_per_shard:
+                    self._evict(shard, now)
+                # [window index, count in it, count in the window before, window length]
+                entry = shard.entries[key] = [index, 0, 0, window]
+            elif entry[0] != index:
+                entry[2] = entry[1] if entry[0] == index - 1 else 0
+                entry[0], entry[1] = index, 0
+            # Weigh the previous window by how much of it still overlaps the sliding window
+            elapsed = now / window - index
+            estimate = entry[2] * (1 - elapsed) + entry[1]
+            if estimate < limit:
+                entry[1] += 1
+                return True, int(limit - estimate - 1), 0.0
+            return False, 0, _window_retry_after(estimate, limit, entry[1], entry[2], elapsed, window)
+
+    def _evict(self, shard, now):
+        """Drop entries that no longer hold state, then the oldest ones down to three quarters full
+
+        The headroom keeps the full scan from running again on the next new key.
+        """
+        entries = shard.entries
+        stale = [
+            key for key, entry in entries.items()
+            # Token buckets (3 fields) refill completely; windows (4 fields) stop counting after two lengths
+            if (len(entry) == 3 and now - entry[1] >= entry[2])
+            or (len(entry) == 4 and entry[0] < now // entry[3] - 1)
+        ]
+        for key in stale:
+            del entries[key]
+        excess = len(entries) - self._max_per_shard * 3 // 4
+        if excess > 0:
+            for key in list(entries)[:excess]:
+                del entries[key]
+
+    def __len__(self):
+        return sum(len(shard.entries) for shard in self._shards)
+
+
+class RedisRateLimitStore:
+    """Counters in Redis, shared by every worker and host"""
+
+    def __init__(self, client, prefix='sems:rl:'):
+        self.client = client
+        self.prefix = prefix
+        self._token_bucket = client.register_script(_TOKEN_BUCKET_SCRIPT)
+        self._sliding_window = client.register_script(_SLIDING_WINDOW_SCRIPT)
+
+    def token_bucket(self, key, rate, burst):
+        allowed, tokens = self._token_bucket(keys=[self.prefix + key], args=[rate, burst, time.time()])
+        tokens /= 1000
+        if allowed:
+            return True, int(tokens), 0.0
+        return False, 0, (1 - tokens) / rate
+
+    def sliding_window(self, key, limit, window):
+        now = time.time()
+        index = int(now // window)
+        elapsed = now / window - index
+        allowed, current, previous = self._sliding_window(
+            keys=[f'{self.prefix}{key}:{index}', f'{self.prefix}{key}:{index - 1}'],
+            args=[limit, 1 - elapsed, int(math.ceil(window * 2))]
+        )
+        estimate = previous * (1 - elapsed) + current
+        if allowed:
+            # `current` already counts this request
+            return True, int(limit - estimate), 0.0
+        return False, 0, _window_retry_after(estimate, limit, current, previous, elapsed, window)
+
+    def __len__(self):
+        return 0
+
+
+def _window_retry_after(estimate, limit, current, previous, elapsed, window):
+    """Seconds until a sliding window estimated at `estimate` admits a request again"""
+    if current >= limit or not previous:
+        return (1 - elapsed) * window
+    # The previous window's weight shrinks as it slides out
+    return min((estimate - limit) / previous * window, (1 - elapsed) * window) + 0.001
+
+
+def create_rate_limit_store(storage, redis_url, shards=16, max_keys=100000):
+    """Store for RATE_LIMIT_STORAGE: 'redis' (needs REDIS_URL and the redis package) or 'local'"""
+    if storage == 'redis' and redis_url:
+        try:
+            import redis
+        except ImportError:
+            pass
+        else:
+            return RedisRateLimitStore(redis.Redis.from_url(redis_url, socket_timeout=0.5))
+    return LocalRateLimitStore(shards, max_keys)
@@ -0,0 +1,36 @@
+"""
+Streaming JSON responses
+Encodes an iterable of serialized rows as a JSON array chunk by chunk, so exports
+never hold the whole result in memory
+"""
+
+from flask import Response, stream_with_context
+
+from app.core.models.serializer import dumps
+
+STREAM_CHUNK_ROWS = 500
+
+
+def iter_json_array(rows, chunk_rows=STREAM_CHUNK_ROWS):
+    """Yield a JSON array of `rows` as byte chunks of up to `chunk_rows` rows"""
+    yield b'['
+    chunk = []
+    first = True
+    for row in rows:
+        chunk.append(dumps(row))
+        if len(chunk) >= chunk_rows:
+            yield (b'' if first else b',') + b','.join(chunk)
+            first = False
+            chunk = []
+    if chunk:
+        yield (b'' if first else b',') + b','.join(chunk)
+    yield b']'
+
+
+def json_stream_response(rows, status=200, chunk_rows=STREAM_CHUNK_ROWS):
+    """Chunked JSON array response; the request context stays open while rows are read"""
+    return Response(
+        stream_with_context(iter_json_array(rows, chunk_rows)),
+        status=status,
+        mimetype='application/json'
+    )
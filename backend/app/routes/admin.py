@@ -0,0 +1,67 @@
+"""
+Administrative reports
+
+    GET    /api/admin/slow-queries   SQL fingerprints ranked by total time (?limit=, ?order=total|max|count|slow)
+    DELETE /api/admin/slow-queries   start a new measurement window
+    GET    /api/admin/profiles       profiled requests per route (?since=epoch seconds)
+    GET    /api/admin/profiles/collapsed
+                                     summed collapsed stacks (?route=, ?since=), for flamegraph.pl or speedscope
+    DELETE /api/admin/profiles       delete every stored profile
+
+Slow query reports cover the worker process that answers; `pid` in each report tells
+them apart. Profiles are shared by every worker through PROFILING_DIR.
+"""
+
+from flask import Blueprint, Response, jsonify, request
+
+from app.core.middleware.auth_middleware import permission_required
+from app.core.middleware.profiling_middleware import request_profiler
+from app.core.utils.profiling import collapsed
+from database.connection import slow_query_log
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
+
+SLOW_QUERY_ORDERS = ('total', 'max', 'count', 'slow')
+
+
+@admin_bp.route('/slow-queries', methods=['GET'])
+@permission_required('system', 'admin')
+def slow_queries():
+    order = request.args.get('order', 'total')
+    if order not in SLOW_QUERY_ORDERS:
+        return jsonify({'error': f"'order' must be one of {', '.join(SLOW_QUERY_ORDERS)}", 'status_code': 400}), 400
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 1:
+        return jsonify({'error': "'limit' must be positive", 'status_code': 400}), 400
+    return jsonify(slow_query_log.report(limit, order))
+
+
+@admin_bp.route('/slow-queries', methods=['DELETE'])
+@permission_required('system', 'admin')
+def reset_slow_queries():
+    slow_query_log.reset()
+    return '', 204
+
+
+@admin_bp.route('/profiles', methods=['GET'])
+@permission_required('system', 'admin')
+def profiles():
+    return jsonify({
+        'enabled': request_profiler.enabled,
+        'routes': request_profiler.store.summary(request.args.get('since', type=float))
+    })
+
+
+@admin_bp.route('/profiles/collapsed', methods=['GET'])
+@permission_required('system', 'admin')
+def download_profiles():
+    stacks = request_profiler.store.aggregate(request.args.get('route'), request.args.get('since', type=float))
+    return Response(collapsed(stacks), mimetype='text/plain',
+                    headers={'Content-Disposition': 'attachment; filename="profile.folded"'})
+
+
+@admin_bp.route('/profiles', methods=['DELETE'])
+@permission_required('system', 'admin')
+def delete_profiles():
+    request_profiler.store.clear()
+    return '', 204
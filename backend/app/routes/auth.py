@@ -0,0 +1,64 @@
+"""
+Authentication endpoints
+
+    POST /api/auth/login        {"email", "password"}  -> access token
+    POST /api/auth/logout       revoke the presented token
+    POST /api/auth/logout-all   revoke every token of the user
+    POST /api/auth/push-token   -> token for the notification push stream
+"""
+
+from flask import Blueprint, current_app, g, jsonify, request
+
+from app.core.middleware.auth_middleware import jwt_authenticator, login_required
+from app.core.services.auth_service import AuthError, auth_service
+from app.core.services.push_service import create_push_token
+
+auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
+
+
+@auth_bp.errorhandler(AuthError)
+def _auth_error(error):
+    headers = {}
+    retry_after = getattr(error, 'retry_after', None)
+    if retry_after:
+        headers['Retry-After'] = str(retry_after)
+    return jsonify({'error': str(error), 'status_code': error.status_code}), error.status_code, headers
+
+
+@auth_bp.route('/login', methods=['POST'])
+def login():
+    data = request.get_json(silent=True) or {}
+    if not data.get('email') or not data.get('password'):
+        return jsonify({'error': "'email' and 'password' are required", 'status_code': 400}), 400
+    user = auth_service.authenticate(data['email'], data['password'], request.remote_addr)
+    return jsonify({
+        'access_token': auth_service.issue_access_token(user),
+        'token_type': 'Bearer',
+        'expires_in': auth_service.access_token_expires,
+        'user': user.to_dict()
+    })
+
+
+@auth_bp.route('/logout', methods=['POST'])
+@login_required
+def logout():
+    if not g.token_claims.get('jti'):
+        return jsonify({'error': 'Token cannot be revoked individually', 'status_code': 400}), 400
+    jwt_authenticator.revoke(g.token_claims)
+    return '', 204
+
+
+@auth_bp.route('/logout-all', methods=['POST'])
+@login_required
+def logout_all():
+    jwt_authenticator.revoke_users([g.user_id])
+    return '', 204
+
+
+@auth_bp.route('/push-token', methods=['POST'])
+@login_required
+def push_token():
+    return jsonify({
+        'push_token': create_push_token(current_app.config['SECRET_KEY'], g.user_id),
+        'expires_in': current_app.config['PUSH_TOKEN_MAX_AGE']
+    })
@@ -0,0 +1,194 @@
+"""
+File upload endpoints
+Bodies are streamed straight to the content-addressed store, never buffered in memory.
+Small files go up in one request; files above MAX_CONTENT_LENGTH use a resumable upload:
+
+    POST  /api/files/uploads            {"filename", "size", "mime_type"}  -> upload_id
+    PATCH /api/files/uploads/<id>       Upload-Offset: <bytes received>, body = next chunk
+    HEAD  /api/files/uploads/<id>       -> Upload-Offset, to resume after an interruption
+
+Downloads are served with wsgi.file_wrapper (sendfile under gunicorn), honour Range and
+If-None-Match against the content hash, and can be handed to nginx with X-Accel-Redirect.
+"""
+
+import os
+
+from flask import Blueprint, Response, current_app, g, jsonify, request, send_file
+
+from app.core.models.file_upload import FileUpload
+from app.core.services.file_service import UploadError, file_service
+from app.core.services.preview_service import preview_service
+
+files_bp = Blueprint('files', __name__, url_prefix='/api/files')
+
+
+def _error(status_code, message):
+    return jsonify({'error': message, 'status_code': status_code}), status_code
+
+
+@files_bp.before_request
+def _require_user():
+    if g.get('user_id') is None:
+        return _error(401, 'Authentication required')
+
+
+@files_bp.errorhandler(UploadError)
+def _upload_error(error):
+    return _error(error.status_code, str(error))
+
+
+def _own_upload(upload_id):
+    return FileUpload.query.filter_by(id=upload_id, user_id=g.user_id, is_active=True).first()
+
+
+@files_bp.route('', methods=['POST'])
+def upload_file():
+    """Single-request upload: multipart form field `file`, or the raw request body"""
+    if request.mimetype == 'multipart/form-data':
+        part = request.files.get('file')
+        if part is None:
+            return _error(400, "Missing form field 'file'")
+        stream, filename, mime_type = part.stream, part.filename, part.mimetype
+    else:
+        stream = request.stream
+        filename = request.args.get('filename') or request.headers.get('X-Filename')
+        mime_type = request.mimetype or None
+    if not filename:
+        return _error(400, 'A filename is required')
+
+    upload = file_service.save_stream(
+        g.user_id, stream, filename, mime_type,
+        description=request.args.get('description') or request.form.get('description')
+    )
+    return jsonify(upload.to_dict()), 201
+
+
+@files_bp.route('/<int:upload_id>', methods=['GET'])
+def get_file(upload_id):
+    upload = _own_upload(upload_id)
+    if upload is None:
+        return _error(404, 'File not found')
+    return jsonify(upload.to_dict())
+
+
+@files_bp.route('/<int:upload_id>/download', methods=['GET'])
+def download_file(upload_id):
+    """File content; ?inline=1 for Content-Disposition: inline"""
+    upload = _own_upload(upload_id)
+    if upload is None:
+        return _error(404, 'File not found')
+    as_attachment = request.args.get('inline') not in ('1', 'true')
+
+    accel_prefix = current_app.config['UPLOAD_ACCEL_REDIRECT']
+    if accel_prefix:
+        response = _accel_redirect(upload, accel_prefix, as_attachment)
+    else:
+        path = os.path.abspath(os.path.join(file_service.root, upload.file_path))
+        if not os.path.isfile(path):
+            return _error(404, 'File content missing')
+        response = send_file(
+            path,
+            mimetype=upload.mime_type or None,
+            as_attachment=as_attachment,
+            download_name=upload.original_filename,
+            etag=upload.content_hash or True,
+            conditional=True
+        )
+        if response.status_code == 200:
+            response.accept_ranges = 'bytes'
+    # Authorized per user: never stored by shared caches, revalidated with the ETag
+    response.cache_control.private = True
+    return response
+
+
+@files_bp.route('/<int:upload_id>/preview', methods=['GET'])
+def preview_file(upload_id):
+    """JPEG thumbnail; ?size= one of PREVIEW_SIZES. 202 while it is still being rendered"""
+    upload = _own_upload(upload_id)
+    if upload is None or not upload.content_hash:
+        return _error(404, 'File not found')
+    sizes = current_app.config['PREVIEW_SIZES']
+    size = request.args.get('size', sizes[0], type=int)
+    if size not in sizes:
+        return _error(400, f"size must be one of {', '.join(map(str, sizes))}")
+
+    path = preview_service.preview_path(upload.content_hash, size)
+    if path is None:
+        status = preview_service.job_status(upload.content_hash)
+        if status in ('pending', 'running'):
+            return jsonify({'status': status}), 202, {'Retry-After': '2'}
+        return _error(404, 'No preview available')
+    response = send_file(path, mimetype='image/jpeg', etag=f'{upload.content_hash}-{size}', conditional=True)
+    response.cache_control.private = True
+    response.cache_control.max_age = 86400
+    return response
+
+
+def _accel_redirect(upload, prefix, as_attachment):
+    """Empty response telling nginx to send the file from its internal location itself"""
+    etag = upload.content_hash
+    # Same weak comparison (and If-None-Match: *) as send_file's conditional responses
+    if etag and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(mimetype=upload.mime_type or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + upload.file_path.replace(os.sep, '/')
+        response.headers.set(
+            'Content-Disposition', 'attachment' if as_attachment else 'inline', filename=upload.original_filename
+        )
+    if etag:
+        response.set_etag(etag)
+    return response
+
+
+@files_bp.route('/<int:upload_id>', methods=['DELETE'])
+def delete_file(upload_id):
+    upload = _own_upload(upload_id)
+    if upload is None:
+        return _error(404, 'File not found')
+    file_service.delete_upload(upload)
+    return '', 204
+
+
+# Resumable uploads
+
+@files_bp.route('/uploads', methods=['POST'])
+def create_upload():
+    data = request.get_json(silent=True) or {}
+    filename = data.get('filename')
+    size = data.get('size')
+    if not filename or not isinstance(size, int):
+        return _error(400, "'filename' and an integer 'size' are required")
+    session = file_service.create_session(
+        g.user_id, filename, size, data.get('mime_type'), data.get('description')
+    )
+    body = session.to_dict()
+    body['chunk_size'] = request.max_content_length
+    return jsonify(body), 201, {'Location': f'{request.path}/{session.token}', 'Upload-Offset': '0'}
+
+
+@files_bp.route('/uploads/<token>', methods=['HEAD'])
+def upload_status(token):
+    session = file_service.get_session(token, g.user_id)
+    if session is None:
+        return '', 404
+    return '', 200, {
+        'Upload-Offset': str(session.offset),
+        'Upload-Length': str(session.total_size),
+        'Cache-Control': 'no-store'
+    }
+
+
+@files_bp.route('/uploads/<token>', methods=['PATCH'])
+def append_upload(token):
+    session = file_service.get_session(token, g.user_id)
+    if session is None:
+        return _error(404, 'Upload not found')
+    offset = request.headers.get('Upload-Offset', '')
+    if not offset.isdigit():
+        return _error(400, 'Upload-Offset header is required')
+
+    upload = file_service.append_chunk(session, int(offset), request.stream)
+    if upload is None:
+        return '', 204, {'Upload-Offset': str(session.offset)}
+    return jsonify(upload.to_dict()), 201, {'Upload-Offset': str(session.total_size)}
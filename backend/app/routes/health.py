@@ -1,4 +1,107 @@
-# health.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+Health check endpoints
+Liveness answers from precomputed bytes; readiness probes dependencies and caches the
+results for HEALTH_PROBE_TTL seconds so frequent orchestrator probes never reach the database
+"""
 
+import json
+import os
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
 
+from flask import Blueprint, Response, current_app
+from sqlalchemy import text
+
+from database.connection import db
+
+health_bp = Blueprint('health', __name__, url_prefix='/api/health')
+
+_LIVE_BODY = b'{"status":"alive"}'
+
+
+class ProbeCache:
+    """Caches probe results per app; one thread refreshes while others serve the last result"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results = {}
+        self._refreshing = set()
+
+    def get(self, key, ttl, probe):
+        cached = self._results.get(key)
+        if cached is not None and time.monotonic() - cached[1] < ttl:
+            return cached[0]
+        with self._lock:
+            if key in self._refreshing and cached is not None:
+                return cached[0]
+            self._refreshing.add(key)
+        try:
+            result = probe()
+            self._results[key] = (result, time.monotonic())
+            return result
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+_probe_cache = ProbeCache()
+
+
+def _check_database():
+    engine = db.engine
+    try:
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+    except Exception as e:
+        return {'status': 'down', 'error': type(e).__name__}
+    result = {'status': 'up'}
+    if hasattr(engine.pool, 'checkedout'):
+        result.update(pool_checked_out=engine.pool.checkedout(), pool_size=engine.pool.size())
+    return result
+
+
+def _check_upload_folder():
+    folder = current_app.config['UPLOAD_FOLDER']
+    if os.path.isdir(folder) and os.access(folder, os.W_OK):
+        return {'status': 'up'}
+    return {'status': 'down', 'error': 'upload folder missing or not writable'}
+
+
+def _check_cache():
+    url = current_app.config['REDIS_URL']
+    if not url:
+        return {'status': 'skipped'}
+    target = urlsplit(url)
+    try:
+        with socket.create_connection((target.hostname, target.port or 6379),
+                                      timeout=current_app.config['HEALTH_PROBE_TIMEOUT']):
+            return {'status': 'up'}
+    except OSError as e:
+        return {'status': 'down', 'error': type(e).__name__}
+
+
+def _readiness():
+    checks = {
+        'database': _check_database(),
+        'uploads': _check_upload_folder(),
+        'cache': _check_cache()
+    }
+    ready = all(check['status'] != 'down' for check in checks.values())
+    body = json.dumps({'status': 'ready' if ready else 'unavailable', 'checks': checks}).encode('utf-8')
+    return body, 200 if ready else 503
+
+
+@health_bp.route('/live')
+def live():
+    """Process is up and serving requests; touches no dependencies"""
+    return Response(_LIVE_BODY, status=200, mimetype='application/json')
+
+
+@health_bp.route('/ready')
+def ready():
+    """Dependencies are reachable; cached for HEALTH_PROBE_TTL seconds"""
+    app = current_app._get_current_object()
+    body, status = _probe_cache.get(id(app), app.config['HEALTH_PROBE_TTL'], _readiness)
+    return Response(body, status=status, mimetype='application/json')
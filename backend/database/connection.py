@@ -3,85 +3,481 @@ Database connection and initialization
 Foundation Phase - Secure database setup
 """
 
+import click
+from collections import Counter
+from flask import current_app, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+import hashlib
+import logging
 import os
+import queue
+import re
+import sqlite3
+import sys
+import threading
+import time
 
-db = SQLAlchemy()
+from app.core.utils.metrics import REGISTRY
+from database.routing import REPLICA_BIND_PREFIX, RoutingSession
+
+logger = logging.getLogger(__name__)
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# Engines reported by the pool gauges, keyed by pool label
+_instrumented_engines = {}
+
+POOL_CHECKOUT_WAIT = REGISTRY.histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled database connection', ['pool'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+)
+POOL_OVERFLOW_EVENTS = REGISTRY.counter(
+    'db_pool_overflow_total', 'Connections opened beyond the configured pool size', ['pool']
+)
+POOL_TIMEOUTS = REGISTRY.counter(
+    'db_pool_timeouts_total', 'Checkouts that gave up waiting for a pooled connection', ['pool']
+)
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkout wait time, overflow connections and timeouts"""
+    
+    def _do_get(self):
+        label = self.logging_name or 'default'
+        overflow = self._overflow
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.inc(pool=label)
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start, pool=label)
+        if self._overflow > overflow and self._overflow > 0:
+            POOL_OVERFLOW_EVENTS.inc(pool=label)
+        return record
+
+def _queue_pools():
+    for label, engine in list(_instrumented_engines.items()):
+        if isinstance(engine.pool, QueuePool):
+            yield label, engine.pool
+
+REGISTRY.gauge(
+    'db_pool_checked_out', 'Connections currently checked out of the pool', ['pool'],
+    callback=lambda: (({'pool': label}, pool.checkedout()) for label, pool in _queue_pools())
+)
+REGISTRY.gauge(
+    'db_pool_size', 'Configured number of persistent pool connections', ['pool'],
+    callback=lambda: (({'pool': label}, pool.size()) for label, pool in _queue_pools())
+)
+REGISTRY.gauge(
+    'db_pool_overflow', 'Connections currently open beyond the pool size', ['pool'],
+    callback=lambda: (({'pool': label}, max(pool.overflow(), 0)) for label, pool in _queue_pools())
+)
+
+SLOW_QUERIES = REGISTRY.counter('db_slow_queries_total', 'SQL statements slower than SLOW_QUERY_THRESHOLD')
+
+# Literals and placeholders become '?', then IN lists and multi-row VALUES collapse, so
+# statements differing only in values or list lengths share one fingerprint
+_FINGERPRINT_PATTERNS = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%\(\w+\)s|%s|(?<!:):\w+|\$\d+|\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\s+'), ' '),
+    (re.compile(r'\bIN \(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE), 'IN (...)'),
+    (re.compile(r'(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+'), r'\1, ...'),
+)
+_EXPLAIN_PREFIXES = {'sqlite': 'EXPLAIN QUERY PLAN ', 'postgresql': 'EXPLAIN ', 'mysql': 'EXPLAIN ', 'mariadb': 'EXPLAIN '}
+_BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+_REPOSITORIES = os.path.join('app', 'core', 'repositories') + os.sep
+
+def fingerprint_sql(statement):
+    """Normalized form of `statement`: literals, placeholders and list lengths removed"""
+    for pattern, replacement in _FINGERPRINT_PATTERNS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+def _value_shape(value):
+    if isinstance(value, (list, tuple)):
+        return f'{type(value).__name__}[{len(value)}]'
+    return type(value).__name__
+
+def parameter_shape(parameters, executemany=False):
+    """Types of the bound parameters, never their values: '(int, str×3)' or '{email: str}'"""
+    if executemany:
+        return f'{len(parameters)}× {parameter_shape(parameters[0])}' if parameters else '[]'
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f'{key}: {_value_shape(value)}' for key, value in parameters.items()) + '}'
+    runs = []
+    for value in parameters or ():
+        shape = _value_shape(value)
+        if runs and runs[-1][0] == shape:
+            runs[-1][1] += 1
+        else:
+            runs.append([shape, 1])
+    return '(' + ', '.join(shape if count == 1 else f'{shape}×{count}' for shape, count in runs) + ')'
+
+def _calling_code():
+    """Innermost repository method on the stack, else the innermost application frame"""
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        code = frame.f_code
+        filename = code.co_filename
+        if _REPOSITORIES in filename:
+            owner = frame.f_locals.get('self')
+            if owner is not None:
+                return f'{type(owner).__name__}.{code.co_name}'
+            return getattr(code, 'co_qualname', code.co_name)
+        if (fallback is None and filename.startswith(_BACKEND_ROOT) and 'site-packages' not in filename
+                and not filename.endswith(('connection.py', 'routing.py'))):
+            fallback = f'{os.path.relpath(filename, _BACKEND_ROOT)}:{code.co_name}:{frame.f_lineno}'
+        frame = frame.f_back
+    return fallback or 'unknown'
+
+def _request_route():
+    if not has_request_context():
+        return f'background ({threading.current_thread().name})'
+    rule = request.url_rule
+    return f'{request.method} {rule.rule if rule is not None else "unmatched"}'
+
+class _QueryStats:
+    __slots__ = ('fingerprint', 'count', 'total', 'max', 'slow', 'shapes', 'callers', 'routes', 'plan')
+    
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow = 0
+        self.shapes = Counter()
+        self.callers = Counter()
+        self.routes = Counter()
+        self.plan = None  # {'captured_at', 'duration_ms', 'lines'}
+    
+    def to_dict(self, key):
+        return {
+            'id': key,
+            'fingerprint': self.fingerprint,
+            'count': self.count,
+            'slow_count': self.slow,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'max_ms': round(self.max * 1000, 3),
+            'parameter_shapes': dict(self.shapes.most_common(3)),
+            'callers': dict(self.callers.most_common(5)),
+            'routes': dict(self.routes.most_common(5)),
+            'plan': self.plan
+        }
+
+class SlowQueryLog:
+    """Opt-in SQL profiling per statement fingerprint (SLOW_QUERY_LOG_ENABLED)
+    
+    Every statement adds its duration to its fingerprint's totals; statements slower than
+    SLOW_QUERY_THRESHOLD are also logged with their parameter shape, calling repository
+    method and route. EXPLAIN plans are captured for the SLOW_QUERY_EXPLAIN_TOP slowest
+    SELECT fingerprints by a background thread on its own connection, so a failing
+    EXPLAIN never touches the request's transaction. Totals are per process.
+    """
+    
+    def __init__(self):
+        self.enabled = False
+        self.threshold = 0.5
+        self.explain_top = 10
+        self.max_fingerprints = 1000
+        self.report_size = 20
+        self.since = time.time()
+        self._stats = {}  # fingerprint id -> _QueryStats
+        self._fingerprints = {}  # statement -> (fingerprint id, fingerprint)
+        self._lock = threading.Lock()
+        self._explain_queue = queue.Queue(maxsize=32)
+        self._explain_pending = set()
+        self._explainer = None
+    
+    def init_app(self, app):
+        self.enabled = app.config['SLOW_QUERY_LOG_ENABLED']
+        self.threshold = app.config['SLOW_QUERY_THRESHOLD']
+        self.explain_top = app.config['SLOW_QUERY_EXPLAIN_TOP']
+        self.max_fingerprints = app.config['SLOW_QUERY_MAX_FINGERPRINTS']
+        self.report_size = app.config['SLOW_QUERY_REPORT_SIZE']
+    
+    def listen(self, engine):
+        if self.enabled and not event.contains(engine, 'before_cursor_execute', _slow_query_before):
+            event.listen(engine, 'before_cursor_execute', _slow_query_before)
+            event.listen(engine, 'after_cursor_execute', _slow_query_after)
+    
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            self._explain_pending = set()
+            self.since = time.time()
+    
+    def _fingerprint(self, statement):
+        cached = self._fingerprints.get(statement)
+        if cached is None:
+            if len(self._fingerprints) >= 4096:
+                self._fingerprints = {}
+            fingerprint = fingerprint_sql(statement)
+            key = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:12]
+            cached = self._fingerprints[statement] = (key, fingerprint)
+        return cached
+    
+    def record(self, engine, statement, parameters, executemany, elapsed):
+        key, fingerprint = self._fingerprint(statement)
+        slow = elapsed >= self.threshold
+        with self._lock:
+            stats = self._stats.get(key)
+            first = stats is None
+            if first:
+                if len(self._stats) >= self.max_fingerprints:
+                    self._evict()
+                stats = self._stats[key] = _QueryStats(fingerprint)
+            stats.count += 1
+            stats.total += elapsed
+            if elapsed > stats.max:
+                stats.max = elapsed
+        if not (slow or first):
+            return
+        
+        # Attribution walks the stack, so only new fingerprints and slow executions pay for it
+        shape = parameter_shape(parameters, executemany)
+        caller, route = _calling_code(), _request_route()
+        with self._lock:
+            stats.shapes[shape] += 1
+            stats.callers[caller] += 1
+            stats.routes[route] += 1
+            if slow:
+                stats.slow += 1
+        if not slow:
+            return
+        SLOW_QUERIES.inc()
+        logger.warning("Slow query %.0f ms [%s] %s params=%s caller=%s route=%s",
+                       elapsed * 1000, key, fingerprint, shape, caller, route)
+        if not executemany and self._wants_plan(key, stats):
+            self._queue_explain(engine, key, statement, parameters)
+    
+    def _evict(self):
+        """Drop the quarter of fingerprints with the least total time"""
+        ranked = sorted(self._stats, key=lambda key: self._stats[key].total)
+        for key in ranked[:max(len(ranked) // 4, 1)]:
+            del self._stats[key]
+    
+    def _wants_plan(self, key, stats):
+        if self.explain_top <= 0 or not stats.fingerprint.lstrip('( ').upper().startswith(('SELECT', 'WITH')):
+            return False
+        with self._lock:
+            if stats.plan is not None or key in self._explain_pending:
+                return False
+            planned = [(other.max, other_key) for other_key, other in self._stats.items() if other.plan is not None]
+            if len(planned) + len(self._explain_pending) < self.explain_top:
+                return True
+            # Full: replace the plan of the fastest planned fingerprint if this one is slower
+            fastest = min(planned, default=None)
+            if fastest is None or fastest[0] >= stats.max:
+                return False
+            self._stats[fastest[1]].plan = None
+            return True
+    
+    def _queue_explain(self, engine, key, statement, parameters):
+        prefix = _EXPLAIN_PREFIXES.get(engine.dialect.name)
+        if prefix is None:
+            return
+        try:
+            self._explain_queue.put_nowait((engine, key, prefix + statement, parameters))
+        except queue.Full:
+            return
+        with self._lock:
+            self._explain_pending.add(key)
+        if self._explainer is None or not self._explainer.is_alive():
+            self._explainer = threading.Thread(target=self._explain_loop, name='slow-query-explain', daemon=True)
+            self._explainer.start()
+    
+    def _explain_loop(self):
+        while True:
+            engine, key, statement, parameters = self._explain_queue.get()
+            try:
+                plan = _explain(engine, statement, parameters)
+            except Exception as e:
+                logger.info("EXPLAIN failed for query %s: %s", key, e)
+                plan = None
+            with self._lock:
+                self._explain_pending.discard(key)
+                stats = self._stats.get(key)
+                if stats is not None and plan is not None:
+                    stats.plan = plan
+    
+    def report(self, limit=None, order='total'):
+        """Top fingerprints by `order` ('total', 'max', 'count' or 'slow')"""
+        attribute = {'total': 'total', 'max': 'max', 'count': 'count', 'slow': 'slow'}[order]
+        with self._lock:
+            ranked = sorted(self._stats.items(), key=lambda item: getattr(item[1], attribute), reverse=True)
+            queries = [stats.to_dict(key) for key, stats in ranked[:limit or self.report_size]]
+            tracked = len(self._stats)
+        return {
+            'enabled': self.enabled,
+            'pid': os.getpid(),
+            'since': self.since,
+            'threshold_ms': self.threshold * 1000,
+            'fingerprints': tracked,
+            'order': order,
+            'queries': queries
+        }
+
+slow_query_log = SlowQueryLog()
+
+def _explain(engine, statement, parameters):
+    # A raw connection fires no cursor events, so EXPLAIN is neither timed nor explained itself
+    start = time.perf_counter()
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(statement, parameters)
+        rows = cursor.fetchall()
+        cursor.close()
+    finally:
+        connection.close()
+    # SQLite's plan is (id, parent, notused, detail); other databases return one text column
+    lines = [str(row[-1]) if engine.dialect.name == 'sqlite' else '\t'.join(map(str, row)) for row in rows]
+    return {'captured_at': time.time(), 'duration_ms': round((time.perf_counter() - start) * 1000, 3), 'lines': lines}
+
+def _slow_query_before(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._slow_query_start = time.perf_counter()
+
+def _slow_query_after(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_slow_query_start', None)
+    if start is not None:
+        slow_query_log.record(conn.engine, statement, parameters, executemany, time.perf_counter() - start)
+
+def build_engine_options(config, url=None, pool_label='primary'):
+    """Build SQLAlchemy engine options from the DB_* settings"""
+    url = url or config['SQLALCHEMY_DATABASE_URI']
+    options = {
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_logging_name': pool_label
+    }
+    # SQLite keeps Flask-SQLAlchemy's driver defaults (StaticPool for in-memory databases)
+    if not url.startswith('sqlite'):
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT']
+        )
+    return options
+
+def configure_engines(app):
+    """Set engine options for the primary and a bind per read replica"""
+    config = app.config
+    config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', build_engine_options(config))
+    binds = config.setdefault('SQLALCHEMY_BINDS', {})
+    for index, url in enumerate(config['DATABASE_REPLICA_URLS']):
+        key = f'{REPLICA_BIND_PREFIX}{index}'
+        binds.setdefault(key, dict(build_engine_options(config, url, key), url=url))
+
+def instrument_engine(engine, app):
+    """Apply connection pragmas, register the engine with the pool gauges and the slow query log"""
+    _instrumented_engines[engine.pool.logging_name or 'default'] = engine
+    slow_query_log.listen(engine)
+    if engine.dialect.name != 'sqlite':
+        return
+    
+    journal_mode = app.config['SQLITE_JOURNAL_MODE']
+    synchronous = app.config['SQLITE_SYNCHRONOUS']
+    
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'PRAGMA journal_mode={journal_mode}')
+        cursor.execute(f'PRAGMA synchronous={synchronous}')
+        cursor.close()
+        # pysqlite opens no transaction before SAVEPOINT, so releasing a savepoint
+        # would commit; take transaction control from the driver and BEGIN below
+        dbapi_connection.isolation_level = None
+    
+    @event.listens_for(engine, 'begin')
+    def _begin_sqlite_transaction(connection):
+        driver_connection = connection.connection.driver_connection
+        # In-memory databases share one connection, which may already be in a transaction
+        if isinstance(driver_connection, sqlite3.Connection) and not driver_connection.in_transaction:
+            driver_connection.execute('BEGIN')
 
 def init_db(app):
-    """Initialize database with application context"""
+    """Initialize database with application context
+    
+    Runs no DDL or queries; schema and seed data come from `flask db-bootstrap`.
+    """
+    slow_query_log.init_app(app)
     with app.app_context():
-        # Import all models here to ensure they are registered with SQLAlchemy
-        from app.core.models import base_model, tenant, user, role, permission, audit_log, notification, file_upload
-        
-        # Create all tables
-        db.create_all()
-        
-        # Create initial data if in development
-        if os.getenv('FLASK_ENV') == 'development':
-            create_initial_data()
+        for engine in db.engines.values():
+            instrument_engine(engine, app)
+    
+    register_commands(app)
+
+def bootstrap_db(seed=False):
+    """Create the schema on the primary database and optionally seed initial data"""
+    create_schema(db.engine)
+    
+    if seed:
+        create_initial_data()
+
+def create_schema(engine):
+    """Create every model table on `engine`: the primary or a tenant shard"""
+    # Import all models here to ensure they are registered with SQLAlchemy
+    from app.core.models import base_model, tenant, user, role, permission, audit_log, notification, file_upload
+    
+    # audit_logs must exist as a partitioned table before create_all would create a plain one;
+    # schema-per-tenant shards (schema_translate_map) keep a plain table
+    from database.partitions import create_partitioned_audit_table, partitioning_enabled
+    if partitioning_enabled(current_app, engine) and not engine.get_execution_options().get('schema_translate_map'):
+        create_partitioned_audit_table(engine)
+    
+    db.metadata.create_all(engine)
+
+def uninstrument_engine(engine):
+    """Stop reporting pool gauges for a disposed engine"""
+    _instrumented_engines.pop(engine.pool.logging_name or 'default', None)
+
+def register_commands(app):
+    """Register database bootstrap commands on the Flask CLI"""
+    
+    @app.cli.command('db-bootstrap')
+    @click.option('--seed/--no-seed', default=None,
+                  help='Seed initial data (default: only when FLASK_ENV=development)')
+    def db_bootstrap_command(seed):
+        """Create database tables and seed initial data"""
+        if seed is None:
+            seed = os.getenv('FLASK_ENV') == 'development'
+        bootstrap_db(seed)
+        click.echo("✅ Database schema is up to date")
+    
+    @app.cli.command('db-seed')
+    def db_seed_command():
+        """Seed initial data into an existing database"""
+        create_initial_data()
+    
+    from database.partitions import register_partition_commands
+    register_partition_commands(app)
 
 def create_initial_data():
     """Create initial development data"""
     from app.core.models.tenant import Tenant
+    from database.seeds.seed_tenants import seed_default_tenant
+    from database.seeds.seed_users import seed_default_roles, seed_default_admin, seed_system_permissions
     
     # Check if we already have data
     if Tenant.query.first() is None:
-        _create_default_tenant_and_roles()
+        default_tenant = seed_default_tenant()
+        admin_role, user_role, manager_role = seed_default_roles()
+        seed_default_admin(default_tenant, admin_role)
         print("✅ Initial development data created")
         print("   Default admin: admin@example.com / admin123")
         print("   ⚠️  Change default credentials in production!")
     else:
+        # Permissions added since the database was first seeded
+        seed_system_permissions()
+        db.session.commit()
         print("ℹ️  Database already has data, skipping initial data creation")
-
-def _create_default_tenant_and_roles():
-    """Create default tenant and roles"""
-    from app.core.models.tenant import Tenant
-    from app.core.models.user import User
-    from app.core.models.role import Role
-    
-    default_tenant = _create_default_tenant()
-    admin_role, user_role, manager_role = _create_default_roles()
-    _create_default_admin_user(default_tenant, admin_role)
-
-def _create_default_tenant():
-    """Create and return the default tenant"""
-    from app.core.models.tenant import Tenant
-    
-    default_tenant = Tenant(
-        name="Default Organization",
-        slug="default",
-        description="Default organization for development",
-        contact_email="admin@example.com",
-        is_active=True
-    )
-    db.session.add(default_tenant)
-    db.session.flush()  # Get the tenant ID
-    return default_tenant
-
-def _create_default_roles():
-    """Create and return default roles"""
-    from app.core.models.role import Role
-    
-    admin_role = Role(name="Administrator", description="System administrator")
-    user_role = Role(name="User", description="Regular user")
-    manager_role = Role(name="Manager", description="Department manager")
-    db.session.add_all([admin_role, user_role, manager_role])
-    return admin_role, user_role, manager_role
-
-def _create_default_admin_user(tenant, admin_role):
-    """Create default admin user"""
-    from app.core.models.user import User
-    
-    admin_user = User(
-        email="admin@example.com",
-        first_name="System",
-        last_name="Administrator",
-        is_active=True,
-        tenant_id=tenant.id
-    )
-    admin_user.set_password("admin123")  # Change in production!
-    admin_user.roles.append(admin_role)
-    
-    db.session.add(admin_user)
-    db.session.commit()
\ No newline at end of file
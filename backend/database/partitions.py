@@ -0,0 +1,169 @@
+"""
+Monthly partitioning and retention for audit_logs
+On PostgreSQL (AUDIT_PARTITIONING=True) audit_logs is range-partitioned by created_at,
+one partition per month, and retention detaches whole partitions. Other databases
+keep a plain table and retention falls back to chunked deletes.
+"""
+
+from datetime import datetime
+
+import click
+from sqlalchemy import Column, Index, MetaData, Table, delete, select, text
+
+from database.connection import db
+
+PARTITION_PREFIX = 'audit_logs_y'
+# Catches rows outside every monthly partition (backfills, a missed cron run)
+DEFAULT_PARTITION = 'audit_logs_default'
+
+
+def _month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def _add_months(value, months):
+    month = value.month - 1 + months
+    return datetime(value.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month_start):
+    return f'{PARTITION_PREFIX}{month_start.year:04d}m{month_start.month:02d}'
+
+
+def partitioning_enabled(app, engine):
+    return app.config['AUDIT_PARTITIONING'] and engine.dialect.name == 'postgresql'
+
+
+def partitioned_audit_table():
+    """audit_logs as a PostgreSQL partitioned table
+
+    Partitioned tables need the partition key in the primary key, so it becomes
+    (id, created_at); the ORM still identifies rows by id. Foreign keys are left
+    off so audit history outlives the users and tenants it mentions.
+    """
+    from app.core.models.audit_log import AuditLog
+
+    source = AuditLog.__table__
+    columns = [
+        Column(
+            column.name, column.type,
+            primary_key=column.name in ('id', 'created_at'),
+            autoincrement=column.name == 'id',
+            nullable=column.nullable and column.name != 'created_at'
+        )
+        for column in source.columns
+    ]
+    table = Table(source.name, MetaData(), *columns, postgresql_partition_by='RANGE (created_at)')
+    for index in source.indexes:
+        Index(index.name, *(table.c[column.name] for column in index.columns))
+    return table
+
+
+def create_partitioned_audit_table(engine, months_ahead=2):
+    """Create the partitioned audit_logs table (if missing), its default and upcoming partitions"""
+    partitioned_audit_table().create(engine, checkfirst=True)
+    with engine.begin() as connection:
+        connection.execute(text(f'CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF audit_logs DEFAULT'))
+    ensure_audit_partitions(engine, months_ahead)
+
+
+def ensure_audit_partitions(engine, months_ahead=2, now=None, months_back=0):
+    """Create partitions from `months_back` months ago through `months_ahead` months ahead
+
+    Create a month's partition before rows for it arrive: PostgreSQL refuses to
+    attach one while the default partition holds rows in its range.
+    """
+    start = _month_start(now or datetime.utcnow())
+    created = []
+    with engine.begin() as connection:
+        for offset in range(-months_back, months_ahead + 1):
+            lower = _add_months(start, offset)
+            upper = _add_months(lower, 1)
+            name = partition_name(lower)
+            connection.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF audit_logs "
+                f"FOR VALUES FROM ('{lower:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+            ))
+            created.append(name)
+    return created
+
+
+def list_audit_partitions(connection):
+    """Names of the partitions attached to audit_logs, oldest first"""
+    rows = connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'audit_logs' ORDER BY child.relname"
+    ))
+    return [name for (name,) in rows if name.startswith(PARTITION_PREFIX)]
+
+
+def retention_cutoff(retain_months, now=None):
+    """Start of the oldest month kept when retaining `retain_months` whole months"""
+    return _add_months(_month_start(now or datetime.utcnow()), -retain_months)
+
+
+def expired_partitions(names, cutoff):
+    """Monthly partitions among `names` that end on or before `cutoff`, oldest first"""
+    boundary = partition_name(cutoff)
+    return sorted(name for name in names if name.startswith(PARTITION_PREFIX) and name < boundary)
+
+
+def apply_audit_retention(app, engine, retain_months, archive_schema=None, chunk_size=10000):
+    """Remove audit history older than `retain_months` whole months
+
+    Partitioned: each expired partition is detached, then dropped or moved to
+    `archive_schema`, and expired rows in the default partition are deleted.
+    Otherwise rows are deleted in chunks to keep transactions short.
+    """
+    cutoff = retention_cutoff(retain_months)
+
+    if not partitioning_enabled(app, engine):
+        from app.core.models.audit_log import AuditLog
+        removed = 0
+        while True:
+            with engine.begin() as connection:
+                ids = select(AuditLog.id).where(AuditLog.created_at < cutoff).limit(chunk_size)
+                deleted = connection.execute(delete(AuditLog).where(AuditLog.id.in_(ids))).rowcount
+            removed += deleted
+            if deleted < chunk_size:
+                return removed
+
+    expired = []
+    with engine.begin() as connection:
+        for name in expired_partitions(list_audit_partitions(connection), cutoff):
+            connection.execute(text(f'ALTER TABLE audit_logs DETACH PARTITION {name}'))
+            if archive_schema:
+                connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS {archive_schema}'))
+                connection.execute(text(f'ALTER TABLE {name} SET SCHEMA {archive_schema}'))
+            else:
+                connection.execute(text(f'DROP TABLE {name}'))
+            expired.append(name)
+        connection.execute(
+            text(f'DELETE FROM {DEFAULT_PARTITION} WHERE created_at < :cutoff'), {'cutoff': cutoff}
+        )
+    return expired
+
+
+def register_partition_commands(app):
+    """Register audit partition maintenance commands on the Flask CLI"""
+
+    @app.cli.command('audit-partitions')
+    @click.option('--months-ahead', default=2, show_default=True)
+    def audit_partitions_command(months_ahead):
+        """Create upcoming monthly audit_logs partitions (run from cron)"""
+        if not partitioning_enabled(app, db.engine):
+            click.echo("ℹ️  Audit partitioning is disabled for this database")
+            return
+        for name in ensure_audit_partitions(db.engine, months_ahead):
+            click.echo(f"   {name}")
+
+    @app.cli.command('audit-retention')
+    @click.option('--months', default=None, type=int, help='Months of history to keep')
+    @click.option('--archive-schema', default=None, help='Move expired partitions here instead of dropping')
+    def audit_retention_command(months, archive_schema):
+        """Drop or archive audit history past the retention window"""
+        months = months or app.config['AUDIT_RETENTION_MONTHS']
+        result = apply_audit_retention(app, db.engine, months, archive_schema)
+        click.echo(f"✅ Audit retention applied ({months} months kept): {result}")
@@ -0,0 +1,138 @@
+"""
+Read-replica routing for SQLAlchemy sessions
+Replica-safe reads go to a healthy replica; writes, and every read after a write
+in the same request, go to the primary
+
+Local stand-in: point DATABASE_REPLICA_URLS at a copy of the primary SQLite file
+(or a second PostgreSQL container) and list endpoints will read from it.
+"""
+
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+# Seconds since the last replayed transaction on a PostgreSQL standby (NULL on a primary);
+# zero once everything received has been replayed, so a quiet primary is not read as lag
+_POSTGRES_LAG_SQL = text(
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+)
+
+
+def replica_bind_keys(app):
+    """Bind keys of the configured read replicas"""
+    return [key for key in app.config['SQLALCHEMY_BINDS'] if str(key).startswith(REPLICA_BIND_PREFIX)]
+
+
+class ReplicaRouter:
+    """Round-robin replica selection with cached health and lag probes"""
+
+    def __init__(self):
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._probing = set()
+        self._health = {}
+
+    def choose(self, engines):
+        """Return a healthy replica engine, or None to fall back to the primary"""
+        keys = replica_bind_keys(current_app)
+        if not keys:
+            return None
+        start = next(self._counter)
+        for offset in range(len(keys)):
+            engine = engines[keys[(start + offset) % len(keys)]]
+            if self.is_healthy(engine):
+                return engine
+        return None
+
+    def is_healthy(self, engine):
+        """Cached health for a replica; one thread re-probes when the entry expires"""
+        config = current_app.config
+        healthy, checked_at = self._health.get(engine, (True, 0.0))
+        if time.monotonic() - checked_at < config['DB_REPLICA_CHECK_INTERVAL']:
+            return healthy
+        with self._lock:
+            if engine in self._probing:
+                return healthy
+            self._probing.add(engine)
+        try:
+            healthy = self._probe(engine, config['DB_REPLICA_MAX_LAG'])
+            self._health[engine] = (healthy, time.monotonic())
+        finally:
+            with self._lock:
+                self._probing.discard(engine)
+        return healthy
+
+    def _probe(self, engine, max_lag):
+        try:
+            with engine.connect() as connection:
+                lag = self._lag(connection)
+        except Exception as e:
+            logger.warning("Replica %s is unavailable, reading from primary: %s", engine.url, e)
+            return False
+        if lag > max_lag:
+            logger.warning("Replica %s is %.1fs behind, reading from primary", engine.url, lag)
+            return False
+        return True
+
+    @staticmethod
+    def _lag(connection):
+        """Seconds the replica is behind its primary (0 when it cannot tell)"""
+        if connection.dialect.name == 'postgresql':
+            return connection.execute(_POSTGRES_LAG_SQL).scalar() or 0
+        connection.execute(text('SELECT 1'))
+        return 0
+
+
+router = ReplicaRouter()
+
+
+class RoutingSession(Session):
+    """Session that sends replica-safe SELECTs to a read replica
+
+    Reads only leave the primary inside replica_reads(), and never once the
+    session has flushed or executed DML (read-your-writes for the request).
+    In sharding mode, info['shard_engine'] pins every statement to the tenant's shard.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is not None:
+            return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        writing = self._flushing or getattr(clause, 'is_dml', False)
+        if writing:
+            self.info['wrote'] = True
+        shard = self.info.get('shard_engine')
+        if shard is not None:
+            return shard
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if writing:
+            return engine
+        if (
+            self.info.get('prefer_replica')
+            and not self.info.get('wrote')
+            and getattr(clause, 'is_select', False)
+            and engine is self._db.engine
+        ):
+            return router.choose(self._db.engines) or engine
+        return engine
+
+
+@contextmanager
+def replica_reads(session):
+    """Allow SELECTs issued in the block to be served by a read replica"""
+    previous = session.info.get('prefer_replica', False)
+    session.info['prefer_replica'] = True
+    try:
+        yield session
+    finally:
+        session.info['prefer_replica'] = previous
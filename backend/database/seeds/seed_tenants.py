@@ -1,4 +1,20 @@
-# seed_tenants.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+Tenant seed data
+"""
 
+from database.connection import db
 
+def seed_default_tenant():
+    """Create and return the default tenant"""
+    from app.core.models.tenant import Tenant
+    
+    default_tenant = Tenant(
+        name="Default Organization",
+        slug="default",
+        description="Default organization for development",
+        contact_email="admin@example.com",
+        is_active=True
+    )
+    db.session.add(default_tenant)
+    db.session.flush()  # Get the tenant ID
+    return default_tenant
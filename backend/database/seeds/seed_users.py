@@ -1,4 +1,59 @@
-# seed_users.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+Role and user seed data
+"""
 
+from database.connection import db
 
+# (module, action, name, description) of permissions the core application checks
+SYSTEM_PERMISSIONS = (
+    ('system', 'admin', 'System administration', 'Slow query reports and request profiles under /api/admin'),
+)
+
+def seed_default_roles():
+    """Create and return default roles; Administrator holds the system permissions"""
+    from app.core.models.role import Role
+    
+    admin_role = Role(name="Administrator", description="System administrator")
+    user_role = Role(name="User", description="Regular user")
+    manager_role = Role(name="Manager", description="Department manager")
+    db.session.add_all([admin_role, user_role, manager_role])
+    seed_system_permissions(admin_role)
+    return admin_role, user_role, manager_role
+
+def seed_system_permissions(admin_role=None):
+    """Create missing system permissions and grant them to the Administrator role
+    
+    Safe to run again on an existing database.
+    """
+    from app.core.models.permission import Permission
+    from app.core.models.role import Role
+    
+    if admin_role is None:
+        admin_role = Role.query.filter_by(name="Administrator").first()
+    permissions = []
+    for module, action, name, description in SYSTEM_PERMISSIONS:
+        permission = Permission.query.filter_by(module=module, action=action).first()
+        if permission is None:
+            permission = Permission(name=name, description=description, module=module, action=action)
+            db.session.add(permission)
+        if admin_role is not None and permission not in admin_role.permissions:
+            admin_role.permissions.append(permission)
+        permissions.append(permission)
+    return permissions
+
+def seed_default_admin(tenant, admin_role):
+    """Create default admin user"""
+    from app.core.models.user import User
+    
+    admin_user = User(
+        email="admin@example.com",
+        first_name="System",
+        last_name="Administrator",
+        is_active=True,
+        tenant_id=tenant.id
+    )
+    admin_user.set_password("admin123")  # Change in production!
+    admin_user.roles.append(admin_role)
+    
+    db.session.add(admin_user)
+    db.session.commit()
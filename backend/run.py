@@ -73,6 +73,75 @@ def validate_environment():
     
     return True
 
+def get_server_options(host, port):
+    """Build production server options from environment variables"""
+    workers = int(os.getenv('WEB_CONCURRENCY', (os.cpu_count() or 1) * 2 + 1))
+    threads = int(os.getenv('SERVER_THREADS', 4))
+    
+    return {
+        'bind': f'{host}:{port}',
+        'workers': workers,
+        'threads': threads,
+        'worker_class': os.getenv('SERVER_WORKER_CLASS', 'gthread' if threads > 1 else 'sync'),
+        'keepalive': int(os.getenv('SERVER_KEEPALIVE', 5)),
+        'timeout': int(os.getenv('SERVER_TIMEOUT', 60)),
+        'graceful_timeout': int(os.getenv('SERVER_GRACEFUL_TIMEOUT', 30)),
+        # Recycle workers periodically to bound memory growth; jitter avoids simultaneous restarts
+        'max_requests': int(os.getenv('SERVER_MAX_REQUESTS', 1000)),
+        'max_requests_jitter': int(os.getenv('SERVER_MAX_REQUESTS_JITTER', 100)),
+        # Load the app once in the master so workers share its memory copy-on-write
+        'preload_app': True,
+        'accesslog': '-' if os.getenv('SERVER_ACCESS_LOG', 'False').lower() == 'true' else None,
+        'errorlog': '-',
+        'loglevel': os.getenv('LOG_LEVEL', 'INFO').lower()
+    }
+
+def run_production_server(app, host, port):
+    """Serve the app with a pre-forking gunicorn server (SIGHUP reloads workers gracefully)"""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        logging.error("Production mode requires gunicorn (Linux/macOS): pip install gunicorn")
+        sys.exit(1)
+    
+    from database.connection import db
+    from app.core.utils.metrics import REGISTRY
+    
+    metrics_dir = app.config['METRICS_MULTIPROC_DIR']
+    if metrics_dir:
+        # Workers share metrics snapshots, so any worker answering /metrics reports the whole server
+        REGISTRY.enable_multiprocess(metrics_dir, app.config['METRICS_MULTIPROC_INTERVAL'], clear=True)
+    
+    def post_fork(server, worker):
+        # Never share pooled connections opened in the master with forked workers
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+        REGISTRY.start_writer()
+    
+    def worker_exit(server, worker):
+        REGISTRY.write_final()
+    
+    class ProductionServer(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+        
+        def load_config(self):
+            for key, value in self.options.items():
+                if value is not None:
+                    self.cfg.set(key, value)
+        
+        def load(self):
+            return self.application
+    
+    options = get_server_options(host, port)
+    options['post_fork'] = post_fork
+    options['worker_exit'] = worker_exit
+    logging.info(f"   Workers: {options['workers']} x {options['threads']} threads ({options['worker_class']})")
+    ProductionServer(app, options).run()
+
 def main():
     """Main application entry point"""
     # Load environment variables
@@ -95,10 +164,12 @@ def main():
     host = os.getenv('FLASK_RUN_HOST', '0.0.0.0')
     port = int(os.getenv('FLASK_RUN_PORT', 5001))
     debug = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
+    server_mode = os.getenv('SERVER_MODE', 'production' if os.getenv('FLASK_ENV') == 'production' else 'development')
     
     logging.info(startup_message)
     logging.info(f"   Environment: {os.getenv('FLASK_ENV', 'development')}")
     logging.info(f"   Debug mode: {debug}")
+    logging.info(f"   Server mode: {server_mode}")
     logging.info(f"   Server: {host}:{port}")
     logging.info(f"   Database: {os.getenv('DATABASE_URL', 'Not configured')}")
     
@@ -107,6 +178,36 @@ def main():
     
     # Start the application
     try:
+        if server_mode == 'production':
+            run_production_server(app, host, port)
+            return
+        
+        if server_mode == 'push':
+            from app.core.services.push_server import run_push_server
+            logging.info(f"   Push streams: {host}:{app.config['PUSH_PORT']}")
+            run_push_server(app, host, app.config['PUSH_PORT'])
+            return
+        
+        if server_mode == 'worker':
+            from app.core.services.preview_service import preview_service
+            logging.info(f"   Preview worker: {app.config['PREVIEW_WORKERS']} render processes")
+            try:
+                preview_service.run_worker()
+            except KeyboardInterrupt:
+                pass
+            return
+        
+        # The reloader runs the app in a child process; start the push server there only
+        if app.config['PUSH_EMBEDDED'] and (not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+            from app.core.services.push_server import start_push_server_thread
+            start_push_server_thread(app, host, app.config['PUSH_PORT'])
+            logging.info(f"   Push streams: {host}:{app.config['PUSH_PORT']}")
+        
+        if app.config['PREVIEW_EMBEDDED'] and (not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+            from app.core.services.preview_service import start_preview_worker_thread
+            start_preview_worker_thread()
+            logging.info(f"   Preview worker: {app.config['PREVIEW_WORKERS']} render processes")
+        
         app.run(
             host=host,
             port=port,
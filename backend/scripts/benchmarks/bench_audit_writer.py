@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark synchronous audit writes against the batched background writer
+
+Usage:
+    python scripts/benchmarks/bench_audit_writer.py --events 20000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark audit log write paths')
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--database-url', help='Target database (default: temporary SQLite file)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        run(url, args.events)
+
+
+def run(url, events):
+    from app import create_app
+    from database.connection import db
+    from app.core.models import AuditLog, Tenant, User
+    from app.core.services.audit_service import audit_writer
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': url})
+
+    with app.app_context():
+        db.create_all()
+        tenant = Tenant(name='Bench', slug='bench')
+        tenant.save()
+        user = User(email='bench@example.com', password_hash='x', first_name='Bench',
+                    last_name='User', tenant_id=tenant.id)
+        user.save()
+        user_id = user.id
+
+        sync_events = min(events, 5000)
+        start = time.perf_counter()
+        for i in range(sync_events):
+            AuditLog(user_id=user_id, action='update', resource_type='Asset', resource_id=i).save()
+        elapsed = time.perf_counter() - start
+        print(f"   synchronous save()      {sync_events / elapsed:>10,.0f} events/sec"
+              f"  ({elapsed / sync_events * 1e6:,.0f} µs per request)")
+
+    start = time.perf_counter()
+    for i in range(events):
+        audit_writer.record('update', user_id, resource_type='Asset', resource_id=i)
+    enqueued = time.perf_counter() - start
+    audit_writer.flush()
+    total = time.perf_counter() - start
+    print(f"   batched record()        {events / total:>10,.0f} events/sec"
+          f"  ({enqueued / events * 1e6:,.1f} µs per request)")
+    audit_writer.shutdown()
+
+
+if __name__ == '__main__':
+    main()
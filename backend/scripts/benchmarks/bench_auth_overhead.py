@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Per-request authentication overhead
+Times the JWT middleware's before_request hook for --requests requests spread over
+--users tokens, with --revoked revocations loaded, against the naive approach of
+PyJWT decoding plus a users lookup for is_active on every request. Each request runs
+inside a prepared request context with its database session already open (as any
+request that queries has), so only the authentication work is measured.
+
+Usage:
+    python scripts/benchmarks/bench_auth_overhead.py --users 1000 --requests 100000 --revoked 50000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def _time_per_request(app, tokens, requests, check):
+    from database.connection import db
+    contexts = [
+        app.test_request_context('/api/files', headers={'Authorization': f'Bearer {token}'})
+        for token in tokens
+    ]
+    elapsed = 0.0
+    for i in range(requests):
+        with contexts[i % len(contexts)]:
+            db.session.info  # Opens the request's session outside the timed section
+            start = time.perf_counter()
+            check()
+            elapsed += time.perf_counter() - start
+    return elapsed / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-request authentication overhead')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=100000)
+    parser.add_argument('--revoked', type=int, default=50000, help='Revoked token ids loaded in the bloom filter')
+    args = parser.parse_args()
+
+    import jwt
+    from flask import g, request
+    from app import create_app
+    from database.connection import bootstrap_db, db
+    from app.core.models import RevokedToken, Tenant, User
+    from app.core.middleware.auth_middleware import jwt_authenticator
+    from app.core.services.auth_service import auth_service
+
+    tmp = tempfile.TemporaryDirectory()
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp.name, 'bench.db')}",
+        'AUDIT_ASYNC': False
+    })
+    with app.app_context():
+        bootstrap_db()
+        tenant = Tenant(name='Bench', slug='bench')
+        db.session.add(tenant)
+        db.session.commit()
+        now = datetime.utcnow()
+        User.bulk_insert([
+            {'email': f'user{i}@bench.test', 'password_hash': 'x', 'first_name': 'Bench', 'last_name': str(i),
+             'tenant_id': tenant.id, 'created_at': now, 'updated_at': now, 'is_active': True}
+            for i in range(args.users)
+        ])
+        revoked_at = now - timedelta(minutes=30)  # Accumulated earlier, not re-read by incremental refreshes
+        RevokedToken.bulk_insert([
+            {'jti': f'revoked-{i}', 'user_id': 1, 'expires_at': now + timedelta(minutes=30),
+             'created_at': revoked_at, 'updated_at': revoked_at, 'is_active': True}
+            for i in range(args.revoked)
+        ])
+        users = User.query.order_by(User.id).all()
+        tokens = [auth_service.issue_access_token(user) for user in users]
+
+    def middleware():
+        assert jwt_authenticator._before_request() is None and g.user_id is not None
+
+    def naive():
+        token = request.headers['Authorization'].split(' ', 1)[1]
+        claims = jwt.decode(token, app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
+        user = db.session.get(User, int(claims['sub']))
+        assert user is not None and user.is_active
+        db.session.expunge_all()  # No identity map carried over between requests
+
+    with app.app_context():
+        jwt_authenticator.revocations.refresh()  # First load happens once per process, not per request
+    print(f"➡️  {args.requests} requests over {args.users} tokens, "
+          f"{len(jwt_authenticator.revocations.bloom)} revoked token ids in the bloom filter")
+    for label, check in (('JWT middleware', middleware), ('PyJWT + users lookup', naive)):
+        per_request = _time_per_request(app, tokens, args.requests, check)
+        print(f"   {label:<22} {per_request * 1e6:8.1f} µs/request")
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
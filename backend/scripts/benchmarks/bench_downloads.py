@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+File download benchmark
+Serves a --size MB upload from gunicorn (SERVER_MODE=production options) in a child
+process and downloads it from --concurrency clients at once, through GET
+/api/files/<id>/download and through a baseline route that reads the file into memory,
+reporting throughput and peak worker RSS
+
+Usage:
+    python scripts/benchmarks/bench_downloads.py --size 256 --concurrency 16
+"""
+
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(BACKEND)
+
+MB = 1024 * 1024
+
+SERVER_SCRIPT = """
+import os, sys
+from flask import g, Response
+from app import create_app
+from database.connection import db
+from app.core.models import FileUpload
+from app.core.services.file_service import file_service
+from run import run_production_server
+
+app = create_app()
+
+@app.before_request
+def _bench_user():
+    g.user_id = 1
+
+@app.route('/bench/read/<int:upload_id>')
+def read_into_memory(upload_id):
+    upload = db.session.get(FileUpload, upload_id)
+    with open(os.path.join(file_service.root, upload.file_path), 'rb') as source:
+        return Response(source.read(), mimetype='application/octet-stream')
+
+run_production_server(app, '127.0.0.1', int(sys.argv[1]))
+"""
+
+
+def _tree_rss_mb(pid):
+    """RSS of a process and its children (gunicorn master and workers)"""
+    total = 0
+    pids = [pid]
+    while pids:
+        current = pids.pop()
+        try:
+            with open(f'/proc/{current}/status') as status:
+                total += next(int(line.split()[1]) for line in status if line.startswith('VmRSS:'))
+            with open(f'/proc/{current}/task/{current}/children') as children:
+                pids.extend(int(child) for child in children.read().split())
+        except (FileNotFoundError, StopIteration):
+            continue
+    return total / 1024
+
+
+def _download(port, path, results):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    connection.request('GET', path)
+    response = connection.getresponse()
+    received = 0
+    while True:
+        chunk = response.read(256 * 1024)
+        if not chunk:
+            break
+        received += len(chunk)
+    connection.close()
+    results.append(received)
+
+
+def _run(label, port, path, concurrency, size, server_pid):
+    results = []
+    threads = [threading.Thread(target=_download, args=(port, path, results)) for _ in range(concurrency)]
+    base_rss = peak_rss = _tree_rss_mb(server_pid)
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        peak_rss = max(peak_rss, _tree_rss_mb(server_pid))
+        time.sleep(0.02)
+    elapsed = time.perf_counter() - start
+    complete = sum(1 for received in results if received == size)
+    print(f"   {label:<28} {elapsed:6.2f} s  {sum(results) / MB / elapsed:8.1f} MB/s  "
+          f"server RSS {base_rss:5.0f} -> {peak_rss:5.0f} MB peak  ({complete}/{concurrency} complete)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark concurrent large-file downloads')
+    parser.add_argument('--size', type=int, default=256, help='File size in MB')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--port', type=int, default=5903)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            UPLOAD_FOLDER=os.path.join(tmp, 'uploads'),
+            AUDIT_ASYNC='False',
+            WEB_CONCURRENCY=str(args.workers),
+            SERVER_THREADS=str(max(args.concurrency // args.workers, 1)),
+            LOG_LEVEL='WARNING'
+        )
+        os.environ.update(env)
+
+        from app import create_app
+        from database.connection import bootstrap_db, db
+        from app.core.models import Tenant, User
+        from app.core.services.file_service import file_service
+
+        app = create_app()
+        with app.app_context():
+            bootstrap_db()
+            tenant = Tenant(name='Bench', slug='bench')
+            db.session.add(tenant)
+            db.session.commit()
+            db.session.add(User(email='bench@bench.test', password_hash='x', first_name='Bench',
+                                last_name='User', tenant_id=tenant.id))
+            db.session.commit()
+
+            source = os.path.join(tmp, 'source.bin')
+            with open(source, 'wb') as target:
+                for _ in range(args.size):
+                    target.write(os.urandom(MB))
+            with open(source, 'rb') as body:
+                upload_id = file_service.save_stream(1, body, 'large.bin', 'application/octet-stream').id
+
+        size = args.size * MB
+        server = subprocess.Popen([sys.executable, '-c', SERVER_SCRIPT, str(args.port)], cwd=BACKEND, env=env)
+        try:
+            for _ in range(100):
+                try:
+                    urllib.request.urlopen(f'http://127.0.0.1:{args.port}/api/health/live', timeout=1)
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            print(f"➡️  {args.concurrency} concurrent downloads of {args.size} MB "
+                  f"({args.workers} gunicorn workers)")
+            _run('send_file (file_wrapper)', args.port, f'/api/files/{upload_id}/download',
+                 args.concurrency, size, server.pid)
+            _run('read into memory', args.port, f'/bench/read/{upload_id}', args.concurrency, size, server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
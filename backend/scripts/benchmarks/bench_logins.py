@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Login throughput benchmark
+Runs --logins logins from --concurrency request threads, hashing inline in each thread
+(the old User.check_password path) and through auth_service's bounded hashing pool.
+Reports logins/sec, login latency percentiles and the latency of a cheap request served
+alongside the burst, then replays a brute-force run against one account.
+
+Usage:
+    python scripts/benchmarks/bench_logins.py --concurrency 32 --logins 256
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def _burst(app, login, emails, concurrency):
+    """Run one login per email from `concurrency` threads; returns (elapsed, latencies, cheap latencies)"""
+    latencies, cheap = [], []
+    pending = list(emails)
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def worker():
+        with app.app_context():
+            while True:
+                with lock:
+                    if not pending:
+                        return
+                    email = pending.pop()
+                start = time.perf_counter()
+                login(email)
+                latencies.append(time.perf_counter() - start)
+
+    def cheap_requests():
+        # Stands in for the other requests a worker serves while logins are in flight
+        while not done.is_set():
+            start = time.perf_counter()
+            for _ in range(10):
+                sum(range(5000))
+                time.sleep(0)  # Yield like a request doing I/O, then wait for the CPU again
+            cheap.append(time.perf_counter() - start)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    observer = threading.Thread(target=cheap_requests)
+    start = time.perf_counter()
+    observer.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    observer.join()
+    return elapsed, sorted(latencies), sorted(cheap)
+
+
+def _report(label, count, elapsed, latencies, cheap):
+    print(f"   {label:<26} {count / elapsed:8.1f} logins/s  "
+          f"p50 {_percentile(latencies, 0.5) * 1000:7.0f} ms  p99 {_percentile(latencies, 0.99) * 1000:7.0f} ms  "
+          f"| other request p99 {_percentile(cheap, 0.99) * 1000:6.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark login throughput and latency')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--logins', type=int, default=256)
+    parser.add_argument('--method', default='pbkdf2:sha256:100000', help='PASSWORD_HASH_METHOD to benchmark')
+    args = parser.parse_args()
+
+    from werkzeug.security import check_password_hash, generate_password_hash
+    from app import create_app
+    from database.connection import bootstrap_db, db
+    from app.core.models import Tenant, User
+    from app.core.services.auth_service import AuthError, auth_service
+
+    tmp = tempfile.TemporaryDirectory()
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp.name, 'bench.db')}",
+        'PASSWORD_HASH_METHOD': args.method,
+        'AUDIT_ASYNC': False
+    })
+    with app.app_context():
+        bootstrap_db()
+        tenant = Tenant(name='Bench', slug='bench')
+        db.session.add(tenant)
+        db.session.commit()
+        password_hash = generate_password_hash('correct horse', args.method)
+        now = datetime.utcnow()
+        User.bulk_insert([
+            {'email': f'user{i}@bench.test', 'password_hash': password_hash, 'first_name': 'Bench',
+             'last_name': str(i), 'tenant_id': tenant.id, 'created_at': now, 'updated_at': now, 'is_active': True}
+            for i in range(args.logins)
+        ])
+    emails = [f'user{i}@bench.test' for i in range(args.logins)]
+
+    def inline_login(email):
+        user = User.query.filter_by(email=email).first()
+        assert check_password_hash(user.password_hash, 'correct horse')
+        user.update_last_login()
+
+    def pooled_login(email):
+        auth_service.authenticate(email, 'correct horse')
+
+    print(f"➡️  {args.logins} logins from {args.concurrency} threads, {args.method}, "
+          f"{auth_service.hasher.workers} hashing workers")
+    _report('inline in request thread', args.logins, *_burst(app, inline_login, emails, args.concurrency))
+    _report('bounded hashing pool', args.logins, *_burst(app, pooled_login, emails, args.concurrency))
+
+    attempts = 1000
+    start = time.perf_counter()
+    with app.app_context():
+        for _ in range(attempts):
+            try:
+                auth_service.authenticate('user0@bench.test', 'guess', '203.0.113.7')
+            except AuthError:
+                pass
+    elapsed = time.perf_counter() - start
+    print(f"   brute force: {attempts} wrong passwords in {elapsed:.2f}s, "
+          f"{auth_service.limiter.max_per_account} hashed, the rest refused before hashing")
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Notification fan-out benchmark
+Broadcasts one notification to every user of a tenant through fan_out() and through
+per-notification save(), then compares cached unread counts with COUNT(*)
+
+Usage:
+    python scripts/benchmarks/bench_notifications.py --users 20000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def _timed(label, func, count=None):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    rate = f"  {count / elapsed:>12,.0f} /sec" if count else ''
+    print(f"   {label:<40} {elapsed * 1000:9.1f} ms{rate}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark notification fan-out and unread counts')
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--naive-users', type=int, default=2000, help='Recipients for the per-row save() baseline')
+    args = parser.parse_args()
+
+    from sqlalchemy import func, select
+    from app import create_app
+    from database.connection import bootstrap_db, db
+    from app.core.models import Notification, Tenant, User
+    from app.core.services.notification_service import notification_service
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}"})
+
+        with app.app_context():
+            bootstrap_db()
+            tenant = Tenant(name='Bench', slug='bench')
+            db.session.add(tenant)
+            db.session.commit()
+            now = datetime.utcnow()
+            User.bulk_insert([
+                {'email': f'user{i}@bench.test', 'password_hash': 'x', 'first_name': 'Bench', 'last_name': str(i),
+                 'tenant_id': tenant.id, 'created_at': now, 'updated_at': now, 'is_active': True}
+                for i in range(args.users)
+            ])
+
+            print(f"➡️  Broadcast to {args.users:,} users")
+            _timed('fan_out()', lambda: notification_service.broadcast_to_tenant(
+                tenant.id, 'Maintenance', 'Scheduled downtime at 22:00'), args.users)
+
+            def naive():
+                for user_id in range(1, args.naive_users + 1):
+                    Notification(user_id=user_id, title='Maintenance', message='Scheduled downtime').save()
+            _timed(f'save() per row ({args.naive_users:,} users)', naive, args.naive_users)
+
+            print("➡️  Unread badge, 1,000 lookups")
+            user_ids = range(1, 1001)
+            _timed('COUNT(*) per lookup', lambda: [
+                db.session.execute(select(func.count()).select_from(Notification).where(
+                    Notification.user_id == user_id, Notification.is_read.is_(False))).scalar()
+                for user_id in user_ids
+            ], 1000)
+            _timed('unread_count() first (builds counters)', lambda: [notification_service.unread_count(u) for u in user_ids], 1000)
+            notification_service.local.clear()
+            _timed('unread_count() counter row', lambda: [notification_service.unread_count(u) for u in user_ids], 1000)
+            _timed('unread_count() warm', lambda: [notification_service.unread_count(u) for u in user_ids], 1000)
+
+            print("➡️  Mark all read")
+            _timed('mark_all_read() for one user', lambda: notification_service.mark_all_read(1))
+
+
+if __name__ == '__main__':
+    main()
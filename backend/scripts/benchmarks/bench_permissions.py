@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark authorization checks through the permission service
+Compares cold resolution (database) with warm in-process cache hits
+
+Usage:
+    python scripts/benchmarks/bench_permissions.py --users 1000 --checks 500000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+MODULES = ['maintenance', 'education', 'finance', 'hr', 'inventory']
+ACTIONS = ['read', 'write', 'delete', 'approve']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark permission checks')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--checks', type=int, default=500000)
+    args = parser.parse_args()
+
+    from app import create_app
+    from database.connection import db
+    from app.core.models import Permission, Role, Tenant, User
+    from app.core.services.permission_service import permission_service
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+
+    with app.app_context():
+        db.create_all()
+        tenant = Tenant(name='Bench', slug='bench')
+        permissions = [
+            Permission(name=f'{module}.{action}', module=module, action=action)
+            for module in MODULES for action in ACTIONS
+        ]
+        roles = [Role(name=f'role-{i}', permissions=random.sample(permissions, 6)) for i in range(5)]
+        db.session.add_all([tenant, *permissions, *roles])
+        db.session.flush()
+        db.session.add_all(
+            User(email=f'user{i}@example.com', password_hash='x', first_name='Bench', last_name=str(i),
+                 tenant_id=tenant.id, roles=random.sample(roles, 2))
+            for i in range(args.users)
+        )
+        db.session.commit()
+        user_ids = [user_id for (user_id,) in db.session.query(User.id)]
+        checks = [
+            (random.choice(user_ids), random.choice(MODULES), random.choice(ACTIONS))
+            for _ in range(args.checks)
+        ]
+
+        start = time.perf_counter()
+        for user_id in user_ids:
+            permission_service.resolve(user_id)
+        elapsed = time.perf_counter() - start
+        print(f"   cold resolve (database)  {len(user_ids) / elapsed:>12,.0f} users/sec")
+
+        start = time.perf_counter()
+        for user_id, module, action in checks:
+            permission_service.has_permission(user_id, module, action)
+        elapsed = time.perf_counter() - start
+        print(f"   warm has_permission()    {len(checks) / elapsed:>12,.0f} checks/sec"
+              f"  ({elapsed / len(checks) * 1e6:.2f} µs/check)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of to_dict() against the compiled model serializer
+Compares ORM instances, raw Row tuples, field projection and JSON encoding
+
+Usage:
+    python scripts/benchmarks/bench_serializer.py --rows 50000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def _timed(label, count, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"   {label:<34} {elapsed * 1000:9.1f} ms  {count / elapsed:>12,.0f} rows/sec")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark model serialization paths')
+    parser.add_argument('--rows', type=int, default=50000)
+    args = parser.parse_args()
+
+    from app import create_app
+    from database.connection import db
+    from app.core.models import Notification, Tenant, User
+    from app.core.models.serializer import dumps, orjson
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+
+    with app.app_context():
+        db.create_all()
+        tenant = Tenant(name='Bench', slug='bench')
+        tenant.save()
+        User.bulk_insert({
+            'email': f'user{i}@example.com', 'password_hash': 'x', 'first_name': 'Bench',
+            'last_name': str(i), 'tenant_id': tenant.id, 'is_active': True
+        } for i in range(args.rows))
+        Notification.bulk_insert({
+            'user_id': 1, 'title': 'Notice', 'message': 'Benchmark', 'is_read': False, 'is_active': True
+        } for i in range(args.rows))
+
+        notifications = Notification.query.all()
+        serializer = Notification.serializer()
+        rows = db.session.execute(serializer.select()).all()
+        projected = Notification.serializer(('id', 'title'))
+        projected_rows = db.session.execute(projected.select()).all()
+
+        print(f"➡️  {args.rows} notifications (orjson {'enabled' if orjson else 'not installed'})")
+        dicts = _timed('to_dict()', args.rows, lambda: [n.to_dict() for n in notifications])
+        _timed('serializer.serialize(instances)', args.rows, lambda: serializer.serialize(notifications))
+        payload = _timed('serializer.serialize_rows(rows)', args.rows, lambda: serializer.serialize_rows(rows))
+        _timed('projected ?fields=id,title', args.rows, lambda: projected.serialize_rows(projected_rows))
+        _timed('json.dumps(to_dict output)', args.rows, lambda: json.dumps(dicts).encode('utf-8'))
+        _timed('dumps(serialized rows)', args.rows, lambda: dumps(payload))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the backend
+Measures `import app` cost (-X importtime) and create_app() wall time in fresh
+interpreters, and exits non-zero when the median exceeds the budget so CI can gate on it
+
+Usage:
+    python scripts/benchmarks/bench_startup.py --runs 5 --budget-ms 1500
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CREATE_APP_SNIPPET = """
+import time
+start = time.perf_counter()
+from app import create_app
+create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+print(time.perf_counter() - start)
+"""
+
+
+def _python(*args):
+    return subprocess.run(
+        [sys.executable, *args], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+
+
+def measure_import_us():
+    """Cumulative microseconds reported by -X importtime for the app package"""
+    stderr = _python('-X', 'importtime', '-c', 'import app').stderr
+    for line in stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) == 3 and parts[2] == 'app':
+            return int(parts[1])
+    raise RuntimeError('importtime output did not include the app package')
+
+
+def measure_create_app_ms():
+    """Wall time of importing and creating the app in a fresh interpreter"""
+    return float(_python('-c', CREATE_APP_SNIPPET).stdout.strip()) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure backend cold-start time')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('STARTUP_BUDGET_MS', 1500)))
+    args = parser.parse_args()
+
+    import_times = [measure_import_us() / 1000 for _ in range(args.runs)]
+    create_times = [measure_create_app_ms() for _ in range(args.runs)]
+    create_median = statistics.median(create_times)
+
+    print(f"   import app           median {statistics.median(import_times):8.1f} ms")
+    print(f"   import + create_app  median {create_median:8.1f} ms  (max {max(create_times):.1f} ms)")
+    print(f"   budget                      {args.budget_ms:8.1f} ms")
+
+    if create_median > args.budget_ms:
+        print("❌ Startup time exceeds budget")
+        sys.exit(1)
+    print("✅ Startup time within budget")
+
+
+if __name__ == '__main__':
+    main()
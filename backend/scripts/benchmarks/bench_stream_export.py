@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Streaming export benchmark
+Streams audit rows through BaseRepository.stream_rows into a chunked JSON response
+and reports throughput and peak Python memory, which should stay flat as rows grow
+
+Usage:
+    python scripts/benchmarks/bench_stream_export.py --rows 1000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from bench_audit_search import generate  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark streaming JSON exports')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    from app import create_app
+    from database.connection import bootstrap_db
+    from app.core.repositories import AuditRepository
+    from app.core.utils.streaming import json_stream_response
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}"})
+
+        with app.test_request_context():
+            bootstrap_db()
+            generate(args.rows)
+
+            response = json_stream_response(AuditRepository().stream_rows(batch_size=args.batch_size))
+            tracemalloc.start()
+            start = time.perf_counter()
+            size = sum(len(chunk) for chunk in response.response)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        print(f"➡️  Streamed {args.rows:,} rows ({size / 1e6:,.1f} MB JSON) in {elapsed:.1f}s "
+              f"= {args.rows / elapsed:,.0f} rows/sec")
+        print(f"   Peak traced memory: {peak / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
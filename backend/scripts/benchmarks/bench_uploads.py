@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Upload pipeline benchmark
+Streams a --size MB file through POST /api/files, uploads the same content again
+(deduplicated) and sends it as a resumable upload in MAX_CONTENT_LENGTH chunks, reporting
+throughput, peak RSS growth and bytes stored on disk
+
+Usage:
+    python scripts/benchmarks/bench_uploads.py --size 512
+"""
+
+import argparse
+import io
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+MB = 1024 * 1024
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _disk_usage(folder):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(folder) for name in names)
+
+
+class _Slice(io.RawIOBase):
+    """A window of `length` bytes of a file, read lazily like a client sending one chunk"""
+
+    def __init__(self, source, start, length):
+        self.source = source
+        self.start = start
+        self.length = length
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self.position = offset if whence == io.SEEK_SET else self.length + offset
+        return self.position
+
+    def readinto(self, buffer):
+        self.source.seek(self.start + self.position)
+        data = self.source.read(min(len(buffer), self.length - self.position))
+        self.position += len(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _timed(label, func, size):
+    rss = _peak_rss_mb()
+    start = time.perf_counter()
+    response = func()
+    elapsed = time.perf_counter() - start
+    print(f"   {label:<34} {elapsed:7.2f} s  {size / MB / elapsed:8.1f} MB/s  "
+          f"peak RSS +{_peak_rss_mb() - rss:6.1f} MB  -> {response.status_code}")
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark streaming and resumable uploads')
+    parser.add_argument('--size', type=int, default=512, help='File size in MB')
+    parser.add_argument('--chunk', type=int, default=16, help='Resumable chunk size in MB (MAX_CONTENT_LENGTH)')
+    args = parser.parse_args()
+
+    from flask import g
+    from app import create_app
+    from database.connection import bootstrap_db, db
+    from app.core.models import Tenant, User
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads = os.path.join(tmp, 'uploads')
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            'UPLOAD_FOLDER': uploads,
+            'MAX_CONTENT_LENGTH': None,
+            'AUDIT_ASYNC': False
+        })
+
+        @app.before_request
+        def _bench_user():
+            g.user_id = 1
+
+        with app.app_context():
+            bootstrap_db()
+            tenant = Tenant(name='Bench', slug='bench')
+            db.session.add(tenant)
+            db.session.commit()
+            db.session.add(User(email='bench@bench.test', password_hash='x', first_name='Bench',
+                                last_name='User', tenant_id=tenant.id))
+            db.session.commit()
+
+        source = os.path.join(tmp, 'source.bin')
+        with open(source, 'wb') as target:
+            for _ in range(args.size):
+                target.write(os.urandom(MB))
+        size = args.size * MB
+        client = app.test_client()
+
+        def single(name):
+            with open(source, 'rb') as body:
+                return client.post(f'/api/files?filename={name}', input_stream=body,
+                                   content_type='application/octet-stream', headers={'Content-Length': str(size)})
+
+        print(f"➡️  {args.size} MB upload")
+        _timed('single request (streamed)', lambda: single('first.bin'), size)
+        stored = _disk_usage(uploads)
+        _timed('same content again (dedup)', lambda: single('copy.bin'), size)
+        print(f"   stored on disk: {stored / MB:.0f} MB after first, {_disk_usage(uploads) / MB:.0f} MB after copy")
+
+        app.config['MAX_CONTENT_LENGTH'] = args.chunk * MB
+        with open(source, 'rb+') as body:
+            body.write(b'\0')  # Different content, so the resumable upload is stored again
+
+        def resumable():
+            token = client.post('/api/files/uploads', json={'filename': 'big.bin', 'size': size}).json['upload_id']
+            step = args.chunk * MB
+            with open(source, 'rb') as body:
+                for offset in range(0, size, step):
+                    chunk = _Slice(body, offset, min(step, size - offset))
+                    response = client.patch(f'/api/files/uploads/{token}', input_stream=chunk,
+                                            headers={'Upload-Offset': str(offset)})
+            return response
+
+        _timed(f'resumable, {args.chunk} MB chunks', resumable, size)
+
+
+if __name__ == '__main__':
+    main()
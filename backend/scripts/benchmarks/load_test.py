@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for a running backend
+Keep-alive clients on threads; reports req/s and latency percentiles per path
+
+Usage:
+    SERVER_MODE=production python run.py &
+    python scripts/benchmarks/load_test.py --url http://localhost:5001 \\
+        --path /api/health --path /api/health/ready --concurrency 64 --duration 30
+"""
+
+import argparse
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+def _client(target, path, deadline, latencies, errors):
+    connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=10)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors.append(response.status)
+            latencies.append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            connection.close()
+            connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=10)
+    connection.close()
+
+
+def run(url, path, concurrency, duration):
+    target = urlsplit(url)
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=_client, args=(target, path, deadline, latencies, errors))
+        for _ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"➡️  GET {path}  ({concurrency} clients, {elapsed:.1f}s)")
+    print(f"   requests   {len(latencies):>10}   errors {len(errors)}")
+    print(f"   throughput {len(latencies) / elapsed:>10,.0f} req/s")
+    if latencies:
+        print(f"   latency    p50 {statistics.median(latencies) * 1000:.2f} ms"
+              f"   p99 {_percentile(latencies, 0.99) * 1000:.2f} ms"
+              f"   max {latencies[-1] * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test backend endpoints')
+    parser.add_argument('--url', default='http://localhost:5001')
+    parser.add_argument('--path', action='append', help='Endpoint to test (repeatable, default /api/health)')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=15)
+    args = parser.parse_args()
+
+    for path in args.path or ['/api/health']:
+        run(args.url, path, args.concurrency, args.duration)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Push server load test with simulated SSE clients
+Starts SERVER_MODE=push against a temporary SQLite database in a child process, holds
+--clients idle streams open from one asyncio loop, fans a notification out to every
+user and reports delivery latency, server memory per connection, and Last-Event-ID resume
+
+Usage:
+    python scripts/benchmarks/load_test_push.py --clients 10000
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(BACKEND)
+
+SERVER_SCRIPT = """
+import sys
+from app import create_app
+from app.core.services.push_server import run_push_server
+run_push_server(create_app(), '127.0.0.1', int(sys.argv[1]))
+"""
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def _rss_mb(pid):
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class Client:
+    """One simulated browser EventSource"""
+
+    def __init__(self, port, user_id, token):
+        self.port = port
+        self.user_id = user_id
+        self.token = token
+        self.last_event_id = None
+        self.received = {}
+        self.reader = self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection('127.0.0.1', self.port)
+        headers = f'Last-Event-ID: {self.last_event_id}\r\n' if self.last_event_id else ''
+        self.writer.write(
+            f'GET /api/notifications/stream?token={self.token} HTTP/1.1\r\n'
+            f'Host: localhost\r\nAccept: text/event-stream\r\n{headers}\r\n'.encode('ascii')
+        )
+        await self.writer.drain()
+        status = await self.reader.readuntil(b'\r\n\r\n')
+        if b' 200 ' not in status.split(b'\r\n', 1)[0]:
+            raise RuntimeError(status.split(b'\r\n', 1)[0].decode())
+
+    async def listen(self):
+        try:
+            while True:
+                block = await self.reader.readuntil(b'\n\n')
+                if block.startswith(b'id: '):
+                    event_id = int(block[4:block.index(b'\n')])
+                    self.last_event_id = event_id
+                    self.received[event_id] = time.perf_counter()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+
+    def close(self):
+        self.writer.close()
+
+
+async def _run(args, port, users, tokens, fan_out, server_pid):
+    clients = [Client(port, user_id, tokens[user_id]) for user_id in users]
+    semaphore = asyncio.Semaphore(500)
+
+    async def connect(client):
+        async with semaphore:
+            await client.connect()
+
+    base_rss = _rss_mb(server_pid)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(connect(client) for client in clients), return_exceptions=True)
+    failures = [result for result in results if isinstance(result, Exception)]
+    connected = [client for client, result in zip(clients, results) if not isinstance(result, Exception)]
+    print(f"   connected {len(connected):,} streams in {time.perf_counter() - start:.1f}s "
+          f"({len(failures)} failed{': ' + repr(failures[0]) if failures else ''})")
+    listeners = {client: asyncio.create_task(client.listen()) for client in connected}
+
+    await asyncio.sleep(1)
+    rss = _rss_mb(server_pid)
+    print(f"   server RSS {base_rss:.0f} MB idle -> {rss:.0f} MB with streams "
+          f"({(rss - base_rss) * 1024 / max(len(connected), 1):.1f} KB per stream)")
+
+    loop = asyncio.get_running_loop()
+    sent_at = time.perf_counter()
+    await loop.run_in_executor(None, fan_out, 'Maintenance', 'Scheduled downtime at 22:00')
+    deadline = time.perf_counter() + args.poll_interval * 5 + 10
+    while time.perf_counter() < deadline and sum(1 for c in connected if c.received) < len(connected):
+        await asyncio.sleep(0.1)
+    latencies = sorted(min(c.received.values()) - sent_at for c in connected if c.received)
+    print(f"   delivered to {len(latencies):,}/{len(connected):,} streams; latency "
+          f"p50 {_percentile(latencies, 0.5) * 1000:.0f} ms, p99 {_percentile(latencies, 0.99) * 1000:.0f} ms, "
+          f"max {(latencies[-1] if latencies else 0) * 1000:.0f} ms (includes the fan-out insert)")
+
+    # Resume: drop some streams, notify while they are away, reconnect with Last-Event-ID
+    away = connected[:args.resume_clients]
+    for client in away:
+        listeners[client].cancel()
+        client.close()
+    await loop.run_in_executor(None, fan_out, 'Follow-up', 'Downtime moved to 23:00')
+    before = {client: len(client.received) for client in away}
+    for client in away:
+        await client.connect()
+        listeners[client] = asyncio.create_task(client.listen())
+    await asyncio.sleep(1)
+    resumed = sum(1 for client in away if len(client.received) > before[client])
+    print(f"   resumed {resumed}/{len(away)} reconnecting streams with the missed event")
+
+    for task in listeners.values():
+        task.cancel()
+    for client in connected:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the SSE push server')
+    parser.add_argument('--clients', type=int, default=10000)
+    parser.add_argument('--resume-clients', type=int, default=100)
+    parser.add_argument('--port', type=int, default=5902)
+    parser.add_argument('--poll-interval', type=float, default=0.5)
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if args.clients + 100 > hard:
+        sys.exit(f"Open file limit {hard} is too low for {args.clients} clients (raise ulimit -n)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'push.db')}",
+            PUSH_POLL_INTERVAL=str(args.poll_interval),
+            AUDIT_ASYNC='False'
+        )
+        os.environ.update(env)
+
+        from app import create_app
+        from database.connection import bootstrap_db, db
+        from app.core.models import Tenant, User
+        from app.core.services.notification_service import notification_service
+        from app.core.services.push_service import create_push_token
+
+        app = create_app()
+        with app.app_context():
+            bootstrap_db()
+            tenant = Tenant(name='Load', slug='load')
+            db.session.add(tenant)
+            db.session.commit()
+            now = datetime.utcnow()
+            User.bulk_insert([
+                {'email': f'user{i}@load.test', 'password_hash': 'x', 'first_name': 'Load', 'last_name': str(i),
+                 'tenant_id': tenant.id, 'created_at': now, 'updated_at': now, 'is_active': True}
+                for i in range(args.clients)
+            ])
+            users = list(range(1, args.clients + 1))
+            tokens = {user_id: create_push_token(app.config['SECRET_KEY'], user_id) for user_id in users}
+            tenant_id = tenant.id
+
+        def fan_out(title, message):
+            with app.app_context():
+                notification_service.broadcast_to_tenant(tenant_id, title, message)
+
+        server = subprocess.Popen([sys.executable, '-c', SERVER_SCRIPT, str(args.port)], cwd=BACKEND, env=env,
+                                  preexec_fn=lambda: resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard)))
+        try:
+            for _ in range(100):
+                try:
+                    urllib.request.urlopen(f'http://127.0.0.1:{args.port}/api/push/health', timeout=1)
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            print(f"➡️  {args.clients:,} simulated clients against the push server (pid {server.pid})")
+            asyncio.run(_run(args, args.port, users, tokens, fan_out, server.pid))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,79 @@
-# create_tenant.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+#!/usr/bin/env python3
+"""
+Create a tenant and provision its shard
+Registers the tenant in the catalog (primary database). In sharding mode it also
+creates or migrates the tenant's database/schema and seeds its default roles;
+re-running against an existing tenant only brings its shard schema up to date.
 
+Usage:
+    python scripts/create_tenant.py acme --name "Acme Corp" --contact-email ops@acme.test
+    TENANT_SHARDING=database python scripts/create_tenant.py acme --name "Acme Corp" \\
+        --admin-email admin@acme.test --admin-password change-me
+"""
 
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Create a tenant and provision its shard')
+    parser.add_argument('slug')
+    parser.add_argument('--name', help='Display name (default: the slug)')
+    parser.add_argument('--contact-email')
+    parser.add_argument('--shard', help='Database URL or schema overriding the configured shard naming')
+    parser.add_argument('--admin-email', help='Create an administrator in the new shard')
+    parser.add_argument('--admin-password')
+    args = parser.parse_args()
+
+    from app import create_app
+    from database.connection import db
+    from app.core.models import Role, Tenant, User
+    from app.core.models.tenant_owned import tenant_scope
+    from app.core.services.tenant_service import tenant_shards
+    from database.seeds.seed_users import seed_default_roles
+
+    app = create_app()
+
+    with app.app_context():
+        tenant = Tenant.query.filter_by(slug=args.slug).first()
+        if tenant is None:
+            tenant = Tenant(name=args.name or args.slug, slug=args.slug,
+                            contact_email=args.contact_email, shard=args.shard)
+            db.session.add(tenant)
+            db.session.commit()
+            print(f"✅ Tenant {tenant.slug} created (id {tenant.id})")
+        else:
+            print(f"ℹ️  Tenant {tenant.slug} already exists (id {tenant.id})")
+
+        if not tenant_shards.enabled:
+            print("ℹ️  TENANT_SHARDING is off; the tenant shares the primary database")
+            return
+
+        shard = tenant_shards.provision(tenant)
+        print(f"✅ Shard ready: {shard.schema or shard.url}")
+
+        with tenant_shards.bound(db.session, tenant.slug), tenant_scope(db.session, tenant.id):
+            if Role.query.first() is None:
+                admin_role = seed_default_roles()[0]
+                db.session.commit()
+                print("   Default roles created")
+            else:
+                admin_role = Role.query.filter_by(name='Administrator').first()
+
+            if args.admin_email and User.query.filter_by(email=args.admin_email).first() is None:
+                if not args.admin_password:
+                    parser.error('--admin-password is required with --admin-email')
+                admin = User(email=args.admin_email, first_name='Tenant', last_name='Administrator')
+                admin.set_password(args.admin_password)
+                if admin_role is not None:
+                    admin.roles.append(admin_role)
+                db.session.add(admin)
+                db.session.commit()
+                print(f"   Administrator {admin.email} created")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,128 @@
-# conftest.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+Shared pytest fixtures for the backend test suite
+"""
 
+from contextlib import contextmanager
 
+import pytest
+from sqlalchemy import event
+
+# Settings that keep tests fast and deterministic: synchronous audit writes, cheap
+# password hashes, no background threads, and limits only where a test enables them
+TEST_CONFIG = {
+    'TESTING': True,
+    'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+    'AUDIT_ASYNC': False,
+    'RATE_LIMIT_ENABLED': False,
+    'REQUEST_METRICS_ENABLED': False,
+    'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+    'PASSWORD_HASH_WORKERS': 2,
+    'PREVIEW_EMBEDDED': False,
+    'PUSH_EMBEDDED': False
+}
+
+
+@pytest.fixture
+def app_config(tmp_path):
+    """Configuration for the `app` fixture; override entries to change it per test"""
+    return dict(
+        TEST_CONFIG,
+        UPLOAD_FOLDER=str(tmp_path / 'uploads'),
+        PROFILING_DIR=str(tmp_path / 'profiles')
+    )
+
+
+@pytest.fixture
+def app(app_config):
+    """Application bound to a fresh in-memory database"""
+    from app import create_app
+    from database.connection import db
+
+    app = create_app(app_config)
+    with app.app_context():
+        # Primary only: `db` keeps a metadata per bind key any earlier app configured
+        db.create_all(bind_key=None)
+        yield app
+        db.session.remove()
+        db.drop_all(bind_key=None)
+
+
+@pytest.fixture
+def client(app):
+    """Test client for the application"""
+    return app.test_client()
+
+
+@pytest.fixture
+def tenant(app):
+    """An active tenant with slug 'acme'"""
+    from app.core.models.tenant import Tenant
+
+    tenant = Tenant(name='Acme', slug='acme')
+    tenant.save()
+    return tenant
+
+
+@pytest.fixture
+def make_user(app, tenant):
+    """Factory creating active users of `tenant` (or another tenant), optionally with roles"""
+    from app.core.models.user import User
+    from database.connection import db
+
+    created = []
+
+    def _make_user(email=None, password='secret', roles=(), tenant_id=None):
+        user = User(
+            email=email or f'user{len(created) + 1}@example.com',
+            first_name='Test',
+            last_name=f'User {len(created) + 1}',
+            tenant_id=tenant_id or tenant.id
+        )
+        user.set_password(password)
+        user.roles.extend(roles)
+        db.session.add(user)
+        db.session.commit()
+        created.append(user)
+        return user
+
+    return _make_user
+
+
+@pytest.fixture
+def auth_headers(app):
+    """Factory returning an Authorization header with a fresh access token for a user"""
+    from app.core.services.auth_service import auth_service
+
+    def _auth_headers(user):
+        return {'Authorization': f'Bearer {auth_service.issue_access_token(user)}'}
+
+    return _auth_headers
+
+
+@pytest.fixture
+def assert_max_queries(app):
+    """Fail when the wrapped block issues more SQL statements than allowed
+
+    Usage:
+        with assert_max_queries(3):
+            client.get('/api/users')
+    """
+    from database.connection import db
+
+    @contextmanager
+    def _assert_max_queries(limit):
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', _record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', _record)
+        assert len(statements) <= limit, (
+            f"Expected at most {limit} queries, got {len(statements)}:\n" + "\n".join(statements)
+        )
+
+    return _assert_max_queries
@@ -0,0 +1,104 @@
+"""
+Administrative reports: reachable by the seeded Administrator role only
+"""
+
+import time
+
+import pytest
+
+from app.core.models.permission import Permission
+from app.core.models.user import User
+from database.connection import create_initial_data, db
+from database.seeds.seed_users import seed_default_admin, seed_default_roles, seed_system_permissions
+
+
+@pytest.fixture
+def roles(tenant):
+    admin_role, user_role, _ = seed_default_roles()
+    seed_default_admin(tenant, admin_role)
+    return admin_role, user_role
+
+
+@pytest.fixture
+def admin_headers(roles, auth_headers):
+    return auth_headers(User.query.filter_by(email='admin@example.com').one())
+
+
+@pytest.fixture
+def user_headers(roles, make_user, auth_headers):
+    return auth_headers(make_user(roles=[roles[1]]))
+
+
+def test_seeded_administrator_reads_slow_queries(client, admin_headers):
+    response = client.get('/api/admin/slow-queries', headers=admin_headers)
+    assert response.status_code == 200
+    assert client.delete('/api/admin/slow-queries', headers=admin_headers).status_code == 204
+
+
+def test_other_users_are_refused(client, user_headers):
+    assert client.get('/api/admin/slow-queries', headers=user_headers).status_code == 403
+    assert client.get('/api/admin/slow-queries').status_code == 401
+
+
+def test_slow_query_parameters_are_validated(client, admin_headers):
+    assert client.get('/api/admin/slow-queries?order=random', headers=admin_headers).status_code == 400
+    assert client.get('/api/admin/slow-queries?limit=0', headers=admin_headers).status_code == 400
+
+
+def test_system_permissions_seed_is_idempotent(roles):
+    admin_role = roles[0]
+    seed_system_permissions()
+    db.session.commit()
+    assert Permission.query.filter_by(module='system', action='admin').count() == 1
+    assert [permission.name for permission in admin_role.permissions] == ['System administration']
+
+
+def test_reseeding_an_existing_database_adds_missing_permissions(roles):
+    admin_role = roles[0]
+    db.session.delete(Permission.query.filter_by(module='system', action='admin').one())
+    db.session.commit()
+    create_initial_data()
+    assert [(p.module, p.action) for p in admin_role.permissions] == [('system', 'admin')]
+
+
+class TestProfiles:
+    @pytest.fixture
+    def app_config(self, app_config):
+        return dict(app_config, PROFILING_ENABLED=True, PROFILING_TOKEN='let-me-profile', PROFILING_INTERVAL=0.001)
+
+    @pytest.fixture
+    def profiled(self, app, client):
+        def slow_report():
+            time.sleep(0.05)
+            return 'done'
+
+        app.add_url_rule('/api/reports/slow', 'slow_report', slow_report)
+        response = client.get('/api/reports/slow', headers={'X-Profile': 'let-me-profile'})
+        assert response.status_code == 200
+        return response.headers['X-Profile-Id']
+
+    def test_only_requests_with_the_token_are_profiled(self, client):
+        assert 'X-Profile-Id' not in client.get('/api/health/live').headers
+        assert 'X-Profile-Id' not in client.get('/api/health/live', headers={'X-Profile': 'guess'}).headers
+
+    def test_summary_and_collapsed_stacks(self, client, admin_headers, profiled):
+        routes = client.get('/api/admin/profiles', headers=admin_headers).get_json()['routes']
+        summary = routes['GET /api/reports/slow']
+        assert summary['profiles'] == 1 and summary['latest'] == profiled
+        assert summary['samples'] > 0 and summary['seconds'] >= 0.05
+
+        response = client.get('/api/admin/profiles/collapsed?route=GET /api/reports/slow', headers=admin_headers)
+        assert response.mimetype == 'text/plain'
+        assert 'attachment' in response.headers['Content-Disposition']
+        lines = response.text.splitlines()
+        assert lines and all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+        assert any('slow_report' in line for line in lines)
+
+    def test_delete_profiles(self, client, admin_headers, profiled):
+        assert client.delete('/api/admin/profiles', headers=admin_headers).status_code == 204
+        assert client.get('/api/admin/profiles', headers=admin_headers).get_json()['routes'] == {}
+
+    def test_profiles_need_the_admin_permission(self, client, user_headers, profiled):
+        assert client.get('/api/admin/profiles', headers=user_headers).status_code == 403
+        assert client.get('/api/admin/profiles/collapsed', headers=user_headers).status_code == 403
+        assert client.delete('/api/admin/profiles', headers=user_headers).status_code == 403
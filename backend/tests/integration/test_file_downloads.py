@@ -0,0 +1,106 @@
+"""
+File downloads: byte ranges, ETag revalidation and nginx X-Accel-Redirect hand-off
+"""
+
+import hashlib
+import io
+
+import pytest
+
+CONTENT = b'0123456789' * 10
+ETAG = f'"{hashlib.sha256(CONTENT).hexdigest()}"'
+ACCEL_PREFIX = '/protected-uploads/'
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user()
+
+
+@pytest.fixture
+def headers(user, auth_headers):
+    return auth_headers(user)
+
+
+@pytest.fixture
+def upload(client, headers):
+    response = client.post('/api/files', data={'file': (io.BytesIO(CONTENT), 'digits.txt')}, headers=headers)
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def _download(client, upload, headers, **extra):
+    return client.get(f"/api/files/{upload['id']}/download", headers=dict(headers, **extra))
+
+
+def test_full_download(client, upload, headers):
+    response = _download(client, upload, headers)
+    assert response.status_code == 200
+    assert response.data == CONTENT
+    assert response.headers['ETag'] == ETAG
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert response.headers['Content-Disposition'] == 'attachment; filename=digits.txt'
+    assert response.cache_control.private
+
+
+def test_inline_download(client, upload, headers):
+    response = client.get(f"/api/files/{upload['id']}/download?inline=1", headers=headers)
+    assert response.headers['Content-Disposition'] == 'inline; filename=digits.txt'
+
+
+def test_range_request(client, upload, headers):
+    response = _download(client, upload, headers, Range='bytes=10-19')
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == 'bytes 10-19/100'
+    assert response.data == CONTENT[10:20]
+
+
+def test_unsatisfiable_range(client, upload, headers):
+    response = _download(client, upload, headers, Range='bytes=500-600')
+    assert response.status_code == 416
+
+
+def test_other_users_cannot_download(client, upload, make_user, auth_headers):
+    response = _download(client, upload, auth_headers(make_user()))
+    assert response.status_code == 404
+
+
+class TestConditionalRequests:
+    """Revalidation behaves the same whether the app or nginx sends the content"""
+
+    @pytest.fixture(params=['', ACCEL_PREFIX], ids=['send_file', 'accel_redirect'])
+    def app_config(self, request, app_config):
+        return dict(app_config, UPLOAD_ACCEL_REDIRECT=request.param)
+
+    @pytest.mark.parametrize('if_none_match', [ETAG, f'W/{ETAG}', f'"other", {ETAG}', '*'])
+    def test_matching_etag_is_not_modified(self, client, upload, headers, if_none_match):
+        response = _download(client, upload, headers, **{'If-None-Match': if_none_match})
+        assert response.status_code == 304
+        assert response.data == b''
+        assert response.headers['ETag'] == ETAG
+        assert 'X-Accel-Redirect' not in response.headers
+
+    def test_stale_etag_downloads_again(self, client, upload, headers):
+        response = _download(client, upload, headers, **{'If-None-Match': '"other"'})
+        assert response.status_code == 200
+        assert response.headers['ETag'] == ETAG
+
+
+class TestAccelRedirect:
+    @pytest.fixture
+    def app_config(self, app_config):
+        return dict(app_config, UPLOAD_ACCEL_REDIRECT=ACCEL_PREFIX)
+
+    def test_nginx_sends_the_file(self, client, upload, headers):
+        response = _download(client, upload, headers)
+        assert response.status_code == 200
+        assert response.data == b''
+        assert response.headers['X-Accel-Redirect'] == ACCEL_PREFIX + upload['file_path']
+        assert response.headers['Content-Disposition'] == 'attachment; filename=digits.txt'
+        assert response.mimetype == 'text/plain'
+        assert response.cache_control.private
+
+    def test_ranges_are_left_to_nginx(self, client, upload, headers):
+        response = _download(client, upload, headers, Range='bytes=10-19')
+        assert response.status_code == 200
+        assert 'X-Accel-Redirect' in response.headers
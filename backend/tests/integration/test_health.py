@@ -0,0 +1,33 @@
+"""
+Health endpoints: liveness touches nothing, readiness probes the database and upload folder
+"""
+
+import os
+
+import pytest
+
+
+@pytest.fixture
+def app_config(app_config):
+    # Probe on every request; cached results are keyed per app object
+    return dict(app_config, HEALTH_PROBE_TTL=0)
+
+
+def test_upload_folder_created_at_startup(app):
+    assert os.path.isdir(app.config['UPLOAD_FOLDER'])
+
+
+def test_ready_with_fresh_upload_folder(client):
+    response = client.get('/api/health/ready')
+    assert response.status_code == 200
+    checks = response.get_json()['checks']
+    assert checks['database']['status'] == 'up'
+    assert checks['uploads']['status'] == 'up'
+    assert checks['cache']['status'] == 'skipped'
+
+
+def test_unavailable_without_upload_folder(app, client):
+    os.rmdir(app.config['UPLOAD_FOLDER'])
+    response = client.get('/api/health/ready')
+    assert response.status_code == 503
+    assert response.get_json()['checks']['uploads']['status'] == 'down'
@@ -1,4 +1,91 @@
-# test_multi_tenant_isolation.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+Tenant isolation: ORM statements on tenant-owned models are scoped to the session's tenant
+"""
 
+import pytest
+from sqlalchemy import update
 
+from app.core.middleware.tenant_middleware import tenant_resolver
+from app.core.models.tenant import Tenant
+from app.core.models.tenant_owned import ALL_TENANTS, tenant_scope
+from app.core.models.user import User
+from database.connection import db
+
+
+@pytest.fixture
+def globex(app):
+    tenant = Tenant(name='Globex', slug='globex')
+    tenant.save()
+    return tenant
+
+
+@pytest.fixture
+def users(make_user, tenant, globex):
+    return {
+        'acme': [make_user(f'a{i}@acme.test') for i in range(3)],
+        'globex': [make_user(f'g{i}@globex.test', tenant_id=globex.id) for i in range(2)]
+    }
+
+
+def _emails(query):
+    return sorted(user.email for user in query)
+
+
+def test_select_is_scoped_to_the_session_tenant(users, globex):
+    with tenant_scope(db.session, globex.id):
+        assert _emails(User.query) == ['g0@globex.test', 'g1@globex.test']
+        assert User.query.filter_by(email='a0@acme.test').first() is None
+        assert User.query.execution_options(**{ALL_TENANTS: True}).count() == 5
+    assert User.query.count() == 5
+
+
+def test_bulk_update_is_scoped(users, tenant):
+    with tenant_scope(db.session, tenant.id):
+        result = db.session.execute(update(User).values(first_name='Scoped'))
+        db.session.commit()
+    assert result.rowcount == 3
+    assert User.query.filter_by(first_name='Scoped').count() == 3
+
+
+def test_new_rows_default_to_the_session_tenant(app, globex):
+    with tenant_scope(db.session, globex.id):
+        user = User(email='new@globex.test', first_name='New', last_name='User')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+    assert user.tenant_id == globex.id
+
+
+def test_resolver_caches_slugs(tenant, assert_max_queries):
+    tenant_resolver.invalidate()
+    assert tenant_resolver.resolve('acme') == tenant.id
+    with assert_max_queries(0):
+        assert tenant_resolver.resolve('acme') == tenant.id
+
+
+def test_unknown_slugs_are_cached_as_unknown(app, assert_max_queries):
+    tenant_resolver.invalidate()
+    assert tenant_resolver.resolve('missing') is None
+    with assert_max_queries(0):
+        assert tenant_resolver.resolve('missing') is None
+
+
+def test_creating_a_tenant_clears_a_cached_miss(app):
+    tenant_resolver.invalidate()
+    assert tenant_resolver.resolve('newco') is None
+    tenant = Tenant(name='NewCo', slug='newco')
+    tenant.save()
+    assert tenant_resolver.resolve('newco') == tenant.id
+
+
+def test_deactivating_a_tenant_invalidates_the_cache(tenant):
+    tenant_resolver.invalidate()
+    assert tenant_resolver.resolve('acme') == tenant.id
+    tenant.is_active = False
+    db.session.commit()
+    assert tenant_resolver.resolve('acme') is None
+
+
+def test_unknown_tenant_header_is_rejected(client, tenant):
+    assert client.get('/api/health/live', headers={'X-Tenant': 'nobody'}).status_code == 404
+    assert client.get('/api/health/live', headers={'X-Tenant': 'acme'}).status_code == 200
@@ -0,0 +1,92 @@
+"""
+SSE push server: token checks, Last-Event-ID replay from the database, then live events
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.models.notification import Notification
+from app.core.services.push_server import STREAM_PATH, PushServer
+from app.core.services.push_service import PushHub, create_push_token
+from database.connection import db
+
+
+@pytest.fixture
+def app_config(app_config):
+    # Only the events under test: no database tail and no heartbeats while reading
+    return dict(app_config, PUSH_POLL_INTERVAL=3600, PUSH_HEARTBEAT=3600)
+
+
+@pytest.fixture
+def notifications(make_user):
+    user = make_user()
+    rows = [
+        Notification(user_id=user.id, title=f'Notice {i}', message='Body', notification_type='info')
+        for i in range(3)
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return user.id, [row.id for row in rows]
+
+
+async def _open_stream(port, headers):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    lines = [f'GET {STREAM_PATH} HTTP/1.1', 'Host: localhost', *(f'{k}: {v}' for k, v in headers.items())]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+    await writer.drain()
+    status = await reader.readline()
+    await reader.readuntil(b'\r\n\r\n')
+    return status, reader, writer
+
+
+async def _read_event(reader):
+    """(id, event, data) of the next event, skipping the retry hint"""
+    while True:
+        block = (await asyncio.wait_for(reader.readuntil(b'\n\n'), timeout=5)).decode('utf-8')
+        fields = dict(line.split(': ', 1) for line in block.strip().split('\n'))
+        if 'id' in fields:
+            return int(fields['id']), fields['event'], fields['data']
+
+
+def _serve(app, scenario):
+    async def _main():
+        server = PushServer(app, hub=PushHub())
+        await server.start('127.0.0.1', 0)
+        try:
+            return await scenario(server, server.server.sockets[0].getsockname()[1])
+        finally:
+            await server.stop()
+    return asyncio.run(_main())
+
+
+def test_invalid_tokens_are_refused(app):
+    async def scenario(server, port):
+        status, _, writer = await _open_stream(port, {'Authorization': 'Bearer forged'})
+        writer.close()
+        return status
+
+    assert _serve(app, scenario).startswith(b'HTTP/1.1 401')
+
+
+def test_reconnect_replays_missed_events_then_streams_live(app, notifications):
+    user_id, ids = notifications
+    token = create_push_token(app.config['SECRET_KEY'], user_id)
+
+    async def scenario(server, port):
+        status, reader, writer = await _open_stream(
+            port, {'Authorization': f'Bearer {token}', 'Last-Event-ID': str(ids[0])}
+        )
+        assert status.startswith(b'HTTP/1.1 200')
+        replayed = [await _read_event(reader), await _read_event(reader)]
+        # A replayed event published again (e.g. by the database tail) is not sent twice
+        server.hub.deliver(user_id, ids[2], {'title': 'Notice 2'})
+        server.hub.deliver(user_id, ids[2] + 1, {'title': 'Live'})
+        live = await _read_event(reader)
+        writer.close()
+        return replayed, live
+
+    replayed, live = _serve(app, scenario)
+    assert [event_id for event_id, _, _ in replayed] == ids[1:]
+    assert all(event == 'notification' and '"title":"Notice' in data for _, event, data in replayed)
+    assert live == (ids[2] + 1, 'notification', '{"title":"Live"}')
@@ -0,0 +1,45 @@
+"""
+Per-endpoint SQL statement budgets, so N+1 regressions fail the build
+"""
+
+import io
+
+import pytest
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user('owner@example.com', password='correct horse')
+
+
+@pytest.fixture
+def upload_id(client, user, auth_headers):
+    response = client.post('/api/files', data={'file': (io.BytesIO(b'report'), 'report.txt')},
+                           headers=auth_headers(user))
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def test_login(client, user, assert_max_queries):
+    with assert_max_queries(5) as statements:
+        response = client.post('/api/auth/login', json={'email': 'owner@example.com', 'password': 'correct horse'})
+    assert response.status_code == 200, statements
+
+
+def test_get_file(client, user, upload_id, auth_headers, assert_max_queries):
+    headers = auth_headers(user)
+    with assert_max_queries(1):
+        response = client.get(f'/api/files/{upload_id}', headers=headers)
+    assert response.status_code == 200
+
+
+def test_download_file(client, user, upload_id, auth_headers, assert_max_queries):
+    headers = auth_headers(user)
+    with assert_max_queries(1):
+        response = client.get(f'/api/files/{upload_id}/download', headers=headers)
+    assert response.data == b'report'
+
+
+def test_liveness_touches_no_database(client, assert_max_queries):
+    with assert_max_queries(0):
+        assert client.get('/api/health/live').status_code == 200
@@ -0,0 +1,65 @@
+"""
+Cold-start budget: create_app() runs no SQL and stays within STARTUP_BUDGET_MS
+Measured in fresh interpreters with scripts/benchmarks/bench_startup.py
+"""
+
+import importlib.util
+import os
+import statistics
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from tests.conftest import TEST_CONFIG
+
+BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', 1500))
+RUNS = 3
+
+
+@pytest.fixture(scope='module')
+def bench_startup():
+    path = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        'scripts', 'benchmarks', 'bench_startup.py'
+    )
+    spec = importlib.util.spec_from_file_location('bench_startup', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_create_app_issues_no_sql(tmp_path):
+    from app import create_app
+
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', _record)
+    try:
+        create_app(dict(TEST_CONFIG, UPLOAD_FOLDER=str(tmp_path / 'uploads')))
+    finally:
+        event.remove(Engine, 'before_cursor_execute', _record)
+    assert statements == []
+
+
+def test_import_time_within_budget(bench_startup):
+    import_ms = statistics.median(bench_startup.measure_import_us() / 1000 for _ in range(RUNS))
+    assert import_ms <= BUDGET_MS, f'import app took {import_ms:.1f} ms (budget {BUDGET_MS:.0f} ms)'
+
+
+def test_create_app_within_budget(bench_startup):
+    create_ms = statistics.median(bench_startup.measure_create_app_ms() for _ in range(RUNS))
+    assert create_ms <= BUDGET_MS, f'import + create_app took {create_ms:.1f} ms (budget {BUDGET_MS:.0f} ms)'
+
+
+def test_background_servers_are_not_embedded_by_default(monkeypatch, tmp_path):
+    from app import create_app
+
+    monkeypatch.delenv('PUSH_EMBEDDED', raising=False)
+    monkeypatch.delenv('PREVIEW_EMBEDDED', raising=False)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'UPLOAD_FOLDER': str(tmp_path / 'uploads')})
+    assert app.config['PUSH_EMBEDDED'] is False
+    assert app.config['PREVIEW_EMBEDDED'] is False
@@ -0,0 +1,97 @@
+"""
+Access token revocation: logout, logout everywhere and credential changes
+"""
+
+import time
+
+import jwt
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app.core.middleware.auth_middleware import RevocationList, jwt_authenticator
+from app.core.models.role import Role
+from app.core.services.auth_service import auth_service
+from database.connection import db
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user('owner@example.com', password='correct horse')
+
+
+def _status(client, headers):
+    # 404 for an authenticated caller, 401 otherwise
+    return client.get('/api/files/999', headers=headers).status_code
+
+
+def _claims(headers):
+    token = headers['Authorization'].split(' ', 1)[1]
+    return jwt.decode(token, options={'verify_signature': False})
+
+
+def test_logout_revokes_only_that_token(client, user, auth_headers):
+    first, second = auth_headers(user), auth_headers(user)
+    assert client.post('/api/auth/logout', headers=first).status_code == 204
+    assert _status(client, first) == 401
+    assert _status(client, second) == 404
+    # Logging out twice is harmless
+    assert client.post('/api/auth/logout', headers=second).status_code == 204
+
+
+def test_logout_all_revokes_earlier_tokens(client, user, auth_headers):
+    first, second = auth_headers(user), auth_headers(user)
+    assert client.post('/api/auth/logout-all', headers=first).status_code == 204
+    assert _status(client, first) == 401
+    assert _status(client, second) == 401
+    time.sleep(0.01)
+    assert _status(client, auth_headers(user)) == 404
+
+
+def test_password_change_revokes_tokens(client, user, auth_headers):
+    headers = auth_headers(user)
+    user.set_password('battery staple')
+    db.session.commit()
+    assert _status(client, headers) == 401
+
+
+def test_password_rehash_keeps_tokens(client, user, auth_headers):
+    user.password_hash = generate_password_hash('correct horse', 'pbkdf2:sha256:500')
+    db.session.commit()
+    headers = auth_headers(user)
+    time.sleep(0.01)
+    auth_service.authenticate('owner@example.com', 'correct horse')
+    assert user.password_hash.startswith('pbkdf2:sha256:1000$')
+    assert _status(client, headers) == 404
+
+
+def test_removed_role_revokes_tokens(client, make_user, auth_headers):
+    role = Role(name='Technician')
+    user = make_user(roles=[role])
+    headers = auth_headers(user)
+    user.roles.remove(role)
+    db.session.commit()
+    assert _status(client, headers) == 401
+
+
+def test_tampered_token_is_rejected(client, user, auth_headers):
+    headers = auth_headers(user)
+    token = headers['Authorization']
+    assert _status(client, {'Authorization': token[:-2] + ('AA' if token[-2:] != 'AA' else 'BB')}) == 401
+
+
+def test_other_workers_pick_up_revocations(app, user, auth_headers):
+    claims = _claims(auth_headers(user))
+    other = RevocationList()
+    other.init_app(app)
+    other.refresh_interval = 0
+    assert not other.is_revoked(user.id, claims['jti'], claims['iat'])
+
+    jwt_authenticator.revoke(claims)
+    assert other.is_revoked(user.id, claims['jti'], claims['iat'])
+
+    # After a rebuild the id lives in the bloom filter and is confirmed in the database
+    other.rebuild_interval = 0
+    other.refresh()
+    assert claims['jti'] in other.bloom and not other.recent
+    assert other.is_revoked(user.id, claims['jti'], claims['iat'])
+    assert not other.is_revoked(user.id, 'never-issued', claims['iat'])
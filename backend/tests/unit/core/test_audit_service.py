@@ -0,0 +1,129 @@
+"""
+Asynchronous audit writer: batching, dropping on a full queue, and flushing at exit
+"""
+
+import os
+import threading
+
+import pytest
+
+from app.core.models.audit_log import AuditLog
+from app.core.services import audit_service
+from app.core.services.audit_service import AUDIT_EVENTS_DROPPED, AuditWriter
+from database.connection import db
+
+
+@pytest.fixture
+def app_config(app_config, tmp_path):
+    # The writer thread needs its own connection, which an in-memory database cannot give it
+    return dict(
+        app_config,
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'audit.db'}",
+        AUDIT_ASYNC=True,
+        AUDIT_BATCH_SIZE=3,
+        AUDIT_FLUSH_INTERVAL=60,
+        AUDIT_QUEUE_SIZE=100
+    )
+
+
+@pytest.fixture
+def exit_hooks(monkeypatch):
+    hooks = []
+    monkeypatch.setattr(audit_service.atexit, 'register', hooks.append)
+    return hooks
+
+
+@pytest.fixture
+def writer(app, exit_hooks):
+    writer = AuditWriter()
+    writer.init_app(app)
+    batches = []
+    write = writer._write
+
+    def _write(batch):
+        batches.append(len(batch))
+        write(batch)
+
+    writer._write = _write
+    writer.batches = batches
+    yield writer
+    writer.shutdown()
+
+
+@pytest.fixture
+def user_id(make_user):
+    user_id = make_user().id
+    # End the read transaction, whose snapshot would hide rows the writer thread commits
+    db.session.commit()
+    return user_id
+
+
+def test_events_are_written_in_batches(writer, user_id):
+    for _ in range(3):
+        writer.record('login', user_id)
+    writer.flush()
+    assert writer.batches == [3]
+    assert AuditLog.query.count() == 3
+
+
+def test_partial_batch_is_written_after_the_flush_interval(writer, user_id):
+    writer.flush_interval = 0.05
+    writer.record('login', user_id)
+    writer.record('logout', user_id)
+    writer.flush()
+    assert writer.batches == [2]
+    assert AuditLog.query.count() == 2
+
+
+def test_full_queue_drops_events(app, exit_hooks, user_id):
+    app.config.update(AUDIT_QUEUE_SIZE=1, AUDIT_BATCH_SIZE=1, AUDIT_ENQUEUE_TIMEOUT=0.01)
+    writer = AuditWriter()
+    writer.init_app(app)
+    writing, release = threading.Event(), threading.Event()
+    write = writer._write
+
+    def _blocked_write(batch):
+        writing.set()
+        release.wait(5)
+        write(batch)
+
+    writer._write = _blocked_write
+    dropped = AUDIT_EVENTS_DROPPED._values.get(('queue_full',), 0)
+    try:
+        writer.record('first', user_id)
+        assert writing.wait(5)
+        writer.record('queued', user_id)
+        writer.record('dropped', user_id)
+        assert AUDIT_EVENTS_DROPPED._values.get(('queue_full',), 0) == dropped + 1
+    finally:
+        release.set()
+        writer.shutdown()
+    assert sorted(entry.action for entry in AuditLog.query) == ['first', 'queued']
+
+
+def test_pending_events_are_written_at_exit(writer, exit_hooks, user_id):
+    writer.record('login', user_id)
+    writer.record('logout', user_id)
+    assert exit_hooks == [writer.shutdown]
+    exit_hooks[0]()
+    assert writer._thread is None
+    assert writer.batches == [2]
+    assert AuditLog.query.count() == 2
+
+
+def test_worker_starts_lazily_once_per_process(writer, user_id):
+    assert writer._thread is None
+    writer.record('login', user_id)
+    thread = writer._thread
+    assert thread.is_alive() and writer._pid == os.getpid()
+    writer.record('logout', user_id)
+    assert writer._thread is thread
+
+    # A forked worker inherits the parent's thread object but not the thread itself
+    writer.shutdown()
+    writer._thread, writer._pid = thread, -1
+    writer.record('login', user_id)
+    assert writer._thread is not thread and writer._thread.is_alive()
+    writer.shutdown()
+    assert AuditLog.query.count() == 3
+
@@ -1,4 +1,90 @@
-# test_auth_service.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+Password login: attempt limits, hash upgrades and client addresses behind a proxy
+"""
 
+import pytest
+from flask import request
+from werkzeug.security import generate_password_hash
 
+from app.core.services.auth_service import InvalidCredentials, TooManyAttempts, auth_service
+
+LIMITS = {'LOGIN_MAX_ATTEMPTS_PER_ACCOUNT': 3, 'LOGIN_MAX_ATTEMPTS_PER_ADDRESS': 5}
+
+
+@pytest.fixture
+def app_config(app_config):
+    return dict(app_config, **LIMITS)
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user('owner@example.com', password='correct horse')
+
+
+def _fail(times, email='owner@example.com', ip_address='10.0.0.1'):
+    for _ in range(times):
+        with pytest.raises(InvalidCredentials):
+            auth_service.authenticate(email, 'wrong', ip_address)
+
+
+def test_account_lockout_refuses_even_the_correct_password(user):
+    _fail(3, ip_address=None)
+    with pytest.raises(TooManyAttempts) as excinfo:
+        auth_service.authenticate('OWNER@example.com', 'correct horse', '10.0.0.2')
+    assert 1 <= excinfo.value.retry_after <= 900
+
+
+def test_success_resets_the_account_count(user):
+    _fail(2)
+    assert auth_service.authenticate('owner@example.com', 'correct horse', '10.0.0.1').id == user.id
+    _fail(2)
+    assert auth_service.authenticate('owner@example.com', 'correct horse', '10.0.0.1').id == user.id
+
+
+def test_address_limit_spans_accounts(user):
+    for index in range(5):
+        _fail(1, email=f'guess{index}@example.com')
+    with pytest.raises(TooManyAttempts):
+        auth_service.authenticate('owner@example.com', 'correct horse', '10.0.0.1')
+    assert auth_service.authenticate('owner@example.com', 'correct horse', '10.0.0.9').id == user.id
+
+
+def test_login_upgrades_outdated_hashes(user):
+    user.password_hash = generate_password_hash('correct horse', 'pbkdf2:sha256:500')
+    auth_service.authenticate('owner@example.com', 'correct horse')
+    assert user.password_hash.startswith('pbkdf2:sha256:1000$')
+    assert not auth_service.hasher.needs_rehash(user.password_hash)
+    assert auth_service.authenticate('owner@example.com', 'correct horse').id == user.id
+
+
+class TestBehindProxy:
+    @pytest.fixture
+    def app_config(self, app_config):
+        return dict(app_config, TRUSTED_PROXY_HOPS=1)
+
+    def test_address_limit_uses_the_forwarded_client(self, client, make_user):
+        for index in range(5):
+            make_user(f'user{index}@example.com')
+        for index in range(5):
+            response = client.post('/api/auth/login', json={'email': f'user{index}@example.com', 'password': 'x'},
+                                   headers={'X-Forwarded-For': '203.0.113.7'})
+            assert response.status_code == 401
+        blocked = client.post('/api/auth/login', json={'email': 'user0@example.com', 'password': 'secret'},
+                              headers={'X-Forwarded-For': '203.0.113.7'})
+        assert blocked.status_code == 429
+        # Another client behind the same proxy is unaffected
+        allowed = client.post('/api/auth/login', json={'email': 'user0@example.com', 'password': 'secret'},
+                              headers={'X-Forwarded-For': '203.0.113.8'})
+        assert allowed.status_code == 200
+
+    def test_only_the_trusted_hop_is_believed(self, app):
+        app.add_url_rule('/client-address', 'client_address', lambda: request.remote_addr)
+        response = app.test_client().get('/client-address',
+                                         headers={'X-Forwarded-For': '198.51.100.1, 203.0.113.7'})
+        assert response.text == '203.0.113.7'
+
+
+def test_forwarded_headers_are_ignored_without_trusted_proxies(app):
+    app.add_url_rule('/client-address', 'client_address', lambda: request.remote_addr)
+    response = app.test_client().get('/client-address', headers={'X-Forwarded-For': '203.0.113.7'})
+    assert response.text == '127.0.0.1'
@@ -0,0 +1,90 @@
+"""
+BaseModel bulk unit of work: batched statements and a single commit
+"""
+
+import pytest
+from sqlalchemy import event
+
+from app.core.models.audit_log import AuditLog
+from app.core.models.base_model import BaseModel
+from app.core.models.tenant import Tenant
+from database.connection import db
+
+
+@pytest.fixture
+def commits(app):
+    """List that grows by one entry per COMMIT on the primary engine"""
+    seen = []
+
+    def _commit(conn):
+        seen.append(conn)
+
+    event.listen(db.engine, 'commit', _commit)
+    yield seen
+    event.remove(db.engine, 'commit', _commit)
+
+
+def _tenant_rows(count, prefix='t'):
+    return [{'name': f'Tenant {i}', 'slug': f'{prefix}{i}', 'is_active': True} for i in range(count)]
+
+
+def test_bulk_insert_chunks_rows_and_commits_once(app, commits, assert_max_queries):
+    with assert_max_queries(3):
+        inserted = Tenant.bulk_insert(_tenant_rows(1200), chunk_size=500)
+    assert inserted == 1200
+    assert len(commits) == 1
+    assert Tenant.query.count() == 1200
+
+
+def test_bulk_insert_fills_column_defaults(app, make_user, tenant):
+    user = make_user()
+    AuditLog.bulk_insert([{'tenant_id': tenant.id, 'user_id': user.id, 'action': 'login'}])
+    entry = AuditLog.query.one()
+    assert entry.created_at is not None and entry.is_active is True
+
+
+def test_bulk_save_inserts_instances_with_one_commit(app, commits):
+    saved = Tenant.bulk_save([Tenant(name=f'Tenant {i}', slug=f's{i}') for i in range(50)])
+    assert saved == 50
+    assert len(commits) == 1
+    assert Tenant.query.count() == 50
+
+
+def test_bulk_soft_delete(app, commits):
+    Tenant.bulk_insert(_tenant_rows(10))
+    ids = [tenant.id for tenant in Tenant.query.order_by(Tenant.id).limit(4)]
+    commits.clear()
+    assert Tenant.bulk_soft_delete(ids, chunk_size=3) == 4
+    assert len(commits) == 1
+    assert Tenant.query.filter_by(is_active=False).count() == 4
+
+
+def test_deferred_commit_collects_saves_into_one_commit(app, commits):
+    with BaseModel.deferred_commit():
+        for i in range(5):
+            Tenant(name=f'Tenant {i}', slug=f'd{i}').save()
+        assert commits == []
+    assert len(commits) == 1
+    assert Tenant.query.count() == 5
+
+
+def test_nested_deferred_commit_commits_at_the_outermost_block(app, commits):
+    with BaseModel.deferred_commit():
+        with BaseModel.deferred_commit():
+            Tenant(name='Inner', slug='inner').save()
+        assert commits == []
+        Tenant(name='Outer', slug='outer').save()
+    assert len(commits) == 1
+    assert Tenant.query.count() == 2
+
+
+def test_deferred_commit_rolls_back_on_error(app, commits):
+    with pytest.raises(RuntimeError):
+        with BaseModel.deferred_commit():
+            Tenant(name='Lost', slug='lost').save()
+            raise RuntimeError('import failed')
+    assert commits == []
+    assert Tenant.query.count() == 0
+    # The session is usable again and commits per save() outside the block
+    Tenant(name='Kept', slug='kept').save()
+    assert len(commits) == 1
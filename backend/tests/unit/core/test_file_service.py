@@ -0,0 +1,109 @@
+"""
+Content-addressed uploads: deduplication, resumable sessions and garbage collection
+"""
+
+import hashlib
+import io
+import os
+
+import pytest
+from sqlalchemy import select
+
+from app.core.models.file_upload import file_blobs
+from app.core.services.file_service import UploadConflict, UploadTooLarge, file_service
+from database.connection import db
+
+CONTENT = b'quarterly report\n' * 100
+CONTENT_HASH = hashlib.sha256(CONTENT).hexdigest()
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user()
+
+
+def _save(user, content=CONTENT):
+    return file_service.save_stream(user.id, io.BytesIO(content), 'report.txt', 'text/plain')
+
+
+def _ref_count(content_hash=CONTENT_HASH):
+    return db.session.execute(
+        select(file_blobs.c.ref_count).where(file_blobs.c.content_hash == content_hash)
+    ).scalar()
+
+
+def _incoming(app):
+    folder = os.path.join(app.config['UPLOAD_FOLDER'], 'incoming')
+    return os.listdir(folder) if os.path.isdir(folder) else []
+
+
+def test_identical_uploads_share_one_blob(app, user):
+    first, second = _save(user), _save(user)
+    assert first.id != second.id
+    assert first.file_path == second.file_path
+    assert _ref_count() == 2
+    with open(file_service.blob_path(CONTENT_HASH), 'rb') as stored:
+        assert stored.read() == CONTENT
+    assert _incoming(app) == []
+
+
+def test_garbage_collection_waits_for_the_last_reference(user):
+    first, second = _save(user), _save(user)
+    file_service.delete_upload(first)
+    assert file_service.collect_garbage() == (0, 0)
+    assert os.path.exists(file_service.blob_path(CONTENT_HASH))
+
+    file_service.delete_upload(second)
+    assert file_service.collect_garbage() == (1, 0)
+    assert not os.path.exists(file_service.blob_path(CONTENT_HASH))
+    assert _ref_count() is None
+
+
+def test_blob_unlinked_before_commit_is_placed_by_the_commit(user):
+    _save(user)
+    temp_path, content_hash, size = file_service.write_stream(io.BytesIO(CONTENT))
+    file_service.add_blob(temp_path, content_hash, size)
+    # Garbage collection removed the stored copy while this reference was uncommitted
+    os.remove(file_service.blob_path(CONTENT_HASH))
+    assert os.path.exists(temp_path)
+
+    db.session.commit()
+    with open(file_service.blob_path(CONTENT_HASH), 'rb') as stored:
+        assert stored.read() == CONTENT
+    assert not os.path.exists(temp_path)
+
+
+def test_rollback_discards_the_temp_file(app, user):
+    temp_path, content_hash, size = file_service.write_stream(io.BytesIO(b'never committed'))
+    file_service.add_blob(temp_path, content_hash, size)
+    db.session.rollback()
+    assert not os.path.exists(temp_path)
+    assert not os.path.exists(file_service.blob_path(content_hash))
+
+
+def test_oversized_upload_leaves_nothing_behind(app, user):
+    with pytest.raises(UploadTooLarge):
+        file_service.save_stream(user.id, io.BytesIO(CONTENT), 'big.txt', limit=10)
+    assert _incoming(app) == []
+
+
+def test_resumable_upload(app, user):
+    session = file_service.create_session(user.id, 'report.txt', len(CONTENT), 'text/plain')
+    assert file_service.append_chunk(session, 0, io.BytesIO(CONTENT[:700])) is None
+    with pytest.raises(UploadConflict):
+        file_service.append_chunk(session, 0, io.BytesIO(CONTENT[:700]))
+
+    # Resume at the offset the server reports
+    session = file_service.get_session(session.token, user.id)
+    assert session.offset == 700
+    upload = file_service.append_chunk(session, session.offset, io.BytesIO(CONTENT[700:]))
+    assert upload.content_hash == CONTENT_HASH
+    assert session.file_upload_id == upload.id and not session.is_active
+    assert os.path.exists(file_service.blob_path(CONTENT_HASH))
+    assert _incoming(app) == []
+
+
+def test_resumable_upload_rejects_bytes_past_its_size(user):
+    session = file_service.create_session(user.id, 'report.txt', 10)
+    with pytest.raises(UploadTooLarge):
+        file_service.append_chunk(session, 0, io.BytesIO(CONTENT))
@@ -0,0 +1,63 @@
+"""
+Metrics registry: exposition format and merging across worker processes
+"""
+
+import pytest
+
+from app.core.utils.metrics import Registry
+
+
+def _worker(directory, in_flight, queue_depth, calls):
+    """A registry as one worker process holds it"""
+    registry = Registry()
+    registry.enable_multiprocess(str(directory))
+    registry.counter('requests_total', 'Requests').inc(3)
+    registry.gauge('in_flight', 'Requests being handled').set(in_flight)
+
+    def _queue_depth():
+        calls.append(1)
+        return [({'status': 'pending'}, queue_depth)]
+
+    registry.gauge('queue_depth', 'Jobs by status', ['status'], callback=_queue_depth, multiprocess_mode='scrape')
+    return registry
+
+
+def test_render_format():
+    registry = Registry()
+    registry.counter('jobs_total', 'Jobs run', ['kind']).inc(kind='a"b')
+    registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0)).observe(0.5)
+    text = registry.render()
+    assert '# TYPE jobs_total counter\njobs_total{kind="a\\"b"} 1\n' in text
+    assert 'latency_seconds_bucket{le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 1' in text
+    assert 'latency_seconds_count 1' in text
+
+
+def test_scrape_gauges_are_computed_once_by_the_scraping_worker(tmp_path):
+    other_calls, own_calls = [], []
+    other = _worker(tmp_path, in_flight=2, queue_depth=7, calls=other_calls)
+    other._write('1001.json', other._snapshot(shared=True))
+    assert other_calls == []
+
+    scraper = _worker(tmp_path, in_flight=1, queue_depth=7, calls=own_calls)
+    text = scraper.render()
+    assert 'requests_total 6' in text
+    assert 'in_flight 3' in text
+    assert 'queue_depth{status="pending"} 7' in text
+    assert len(own_calls) == 1
+
+
+def test_exited_workers_keep_counters_only(tmp_path):
+    calls = []
+    exiting = _worker(tmp_path, in_flight=4, queue_depth=7, calls=calls)
+    exiting.write_final()
+    assert calls == []
+
+    text = _worker(tmp_path, in_flight=0, queue_depth=7, calls=[]).render()
+    assert 'requests_total 6' in text
+    assert 'in_flight 0' in text
+
+
+def test_unknown_multiprocess_mode_is_rejected():
+    with pytest.raises(ValueError):
+        Registry().gauge('depth', 'Depth', multiprocess_mode='max')
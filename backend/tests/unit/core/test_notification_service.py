@@ -1,4 +1,82 @@
-# test_notification_service.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+Unread counters: maintained by fan-out, read marking and ORM changes; built on first read
+"""
 
+import pytest
+from sqlalchemy import insert, select
 
+from app.core.models.notification import Notification, notification_counters
+from app.core.services.notification_service import notification_service
+from database.connection import db
+
+
+@pytest.fixture
+def users(make_user):
+    return [make_user() for _ in range(3)]
+
+
+def _stored_counter(user_id):
+    return db.session.execute(
+        select(notification_counters.c.unread).where(notification_counters.c.user_id == user_id)
+    ).scalar()
+
+
+def test_first_read_builds_counter_without_committing(users, assert_max_queries):
+    user_id = users[0].id
+    notification_service.fan_out([user_id], 'Hello', 'First')
+    notification_service.fan_out([user_id], 'Hello', 'Second')
+    assert _stored_counter(user_id) is None
+
+    assert notification_service.unread_count(user_id) == 2
+    assert db.session().in_transaction()
+    assert _stored_counter(user_id) == 2
+    with assert_max_queries(0):
+        assert notification_service.unread_count(user_id) == 2
+    # The counter row belongs to the caller's transaction
+    db.session.rollback()
+    assert _stored_counter(user_id) is None
+
+
+def test_recount_falls_back_to_update_when_the_row_exists(users):
+    user_id = users[0].id
+    # As left by a concurrent first read, or drifted
+    db.session.execute(insert(notification_counters).values(user_id=user_id, unread=9))
+    notification_service.fan_out([user_id], 'Hello', 'Only')
+    assert notification_service.recount(user_id) == 1
+    assert _stored_counter(user_id) == 1
+    db.session.commit()
+    assert _stored_counter(user_id) == 1
+
+
+def test_fan_out_and_mark_all_read_adjust_counters(users):
+    user_ids = [user.id for user in users]
+    for user_id in user_ids:
+        notification_service.unread_count(user_id)
+    db.session.commit()
+
+    assert notification_service.fan_out(user_ids + user_ids[:1], 'News', 'Body', chunk_size=2) == 3
+    assert [notification_service.unread_count(user_id) for user_id in user_ids] == [1, 1, 1]
+
+    notification_service.fan_out(user_ids[:1], 'More', 'Body')
+    assert notification_service.mark_all_read(user_ids[0]) == 2
+    assert notification_service.unread_count(user_ids[0]) == 0
+    assert _stored_counter(user_ids[0]) == 0
+
+
+def test_orm_changes_keep_counter_in_step(users):
+    user_id = users[0].id
+    notification_service.unread_count(user_id)
+    db.session.commit()
+
+    first = Notification(user_id=user_id, title='One', message='Body')
+    second = Notification(user_id=user_id, title='Two', message='Body')
+    db.session.add_all([first, second])
+    db.session.commit()
+    assert notification_service.unread_count(user_id) == 2
+
+    first.mark_as_read()
+    assert notification_service.unread_count(user_id) == 1
+    db.session.delete(second)
+    db.session.commit()
+    assert notification_service.unread_count(user_id) == 0
+    assert _stored_counter(user_id) == 0
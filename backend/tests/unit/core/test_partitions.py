@@ -0,0 +1,109 @@
+"""
+audit_logs partitions: month arithmetic, partition DDL and retention
+PostgreSQL-only statements are checked against a recording engine
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from app.core.models.audit_log import AuditLog
+from database import partitions
+from database.connection import db
+from database.partitions import (
+    apply_audit_retention, create_partitioned_audit_table, ensure_audit_partitions,
+    expired_partitions, partition_name, partitioned_audit_table, retention_cutoff
+)
+
+
+class _RecordingEngine:
+    """Engine stand-in that records the SQL of each executed statement"""
+
+    def __init__(self):
+        self.statements = []
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    def execute(self, statement, parameters=None):
+        self.statements.append(str(statement))
+
+
+@pytest.mark.parametrize('value, months, expected', [
+    (datetime(2026, 10, 17), 0, datetime(2026, 10, 1)),
+    (datetime(2026, 11, 1), 2, datetime(2027, 1, 1)),
+    (datetime(2026, 1, 31), -1, datetime(2025, 12, 1)),
+    (datetime(2026, 3, 1), -14, datetime(2025, 1, 1)),
+    (datetime(2026, 12, 1), 25, datetime(2029, 1, 1)),
+])
+def test_add_months(value, months, expected):
+    assert partitions._add_months(partitions._month_start(value), months) == expected
+
+
+def test_partition_names_sort_by_month():
+    names = [partition_name(datetime(2025, month, 1)) for month in (1, 9, 10, 12)]
+    assert names[0] == 'audit_logs_y2025m01'
+    assert names == sorted(names)
+
+
+def test_ensure_partitions_spans_the_requested_months():
+    engine = _RecordingEngine()
+    created = ensure_audit_partitions(engine, months_ahead=1, now=datetime(2026, 12, 15), months_back=1)
+    assert created == ['audit_logs_y2026m11', 'audit_logs_y2026m12', 'audit_logs_y2027m01']
+    assert engine.statements[-1] == (
+        "CREATE TABLE IF NOT EXISTS audit_logs_y2027m01 PARTITION OF audit_logs "
+        "FOR VALUES FROM ('2027-01-01') TO ('2027-02-01')"
+    )
+
+
+def test_partitioned_table_creates_a_default_partition(monkeypatch):
+    engine = _RecordingEngine()
+
+    class _Table:
+        def create(self, bind, checkfirst):
+            bind.statements.append('CREATE TABLE audit_logs')
+
+    monkeypatch.setattr(partitions, 'partitioned_audit_table', _Table)
+    create_partitioned_audit_table(engine, months_ahead=0)
+    assert engine.statements[:2] == [
+        'CREATE TABLE audit_logs',
+        'CREATE TABLE IF NOT EXISTS audit_logs_default PARTITION OF audit_logs DEFAULT'
+    ]
+    assert len(engine.statements) == 3
+
+
+def test_partitioned_table_ddl(app):
+    ddl = str(CreateTable(partitioned_audit_table()).compile(dialect=postgresql.dialect()))
+    assert 'PARTITION BY RANGE (created_at)' in ddl
+    assert 'PRIMARY KEY (id, created_at)' in ddl
+    assert 'FOREIGN KEY' not in ddl
+
+
+def test_retention_cutoff_keeps_whole_months():
+    assert retention_cutoff(24, now=datetime(2026, 10, 17, 12)) == datetime(2024, 10, 1)
+    assert retention_cutoff(1, now=datetime(2026, 1, 5)) == datetime(2025, 12, 1)
+
+
+def test_expired_partitions_end_before_the_cutoff():
+    names = [
+        'audit_logs_y2024m11', 'audit_logs_y2024m09', 'audit_logs_default',
+        'audit_logs_y2024m10', 'audit_logs_y2026m10'
+    ]
+    assert expired_partitions(names, datetime(2024, 10, 1)) == ['audit_logs_y2024m09']
+    assert expired_partitions(names, datetime(2024, 9, 1)) == []
+
+
+def test_unpartitioned_retention_deletes_in_chunks(app, make_user, tenant):
+    user = make_user()
+    now = datetime.utcnow()
+    AuditLog.bulk_insert([
+        {'tenant_id': tenant.id, 'user_id': user.id, 'action': 'old', 'created_at': datetime(2000, 1, i + 1)}
+        for i in range(5)
+    ] + [{'tenant_id': tenant.id, 'user_id': user.id, 'action': 'recent', 'created_at': now}])
+
+    assert apply_audit_retention(app, db.engine, retain_months=1, chunk_size=2) == 5
+    assert [entry.action for entry in AuditLog.query] == ['recent']
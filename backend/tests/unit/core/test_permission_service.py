@@ -0,0 +1,97 @@
+"""
+Permission resolution and cross-worker cache invalidation
+"""
+
+import queue
+import time
+
+import pytest
+
+from app.core.models.permission import Permission
+from app.core.models.role import Role
+from app.core.services.permission_service import PermissionService, permission_service
+from app.core.utils.cache import RedisInvalidationBus, TTLCache
+from database.connection import db
+
+
+class FakeBroker:
+    """Just enough of the Redis pub/sub API for RedisInvalidationBus"""
+
+    def __init__(self):
+        self.subscribers = {}
+
+    def publish(self, channel, data):
+        for inbox in self.subscribers.get(channel, []):
+            inbox.put({'type': 'message', 'channel': channel.encode('utf-8'), 'data': data.encode('utf-8')})
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        broker, inbox = self, queue.Queue()
+
+        class PubSub:
+            def subscribe(self, *channels):
+                for channel in channels:
+                    broker.subscribers.setdefault(channel, []).append(inbox)
+
+            def listen(self):
+                while True:
+                    yield inbox.get()
+
+        return PubSub()
+
+
+def _worker(broker):
+    """A PermissionService as another worker process would hold it"""
+    service = PermissionService()
+    service.local = TTLCache(ttl=60)
+    service.bus = RedisInvalidationBus(broker)
+    service.bus.subscribe(service.INVALIDATION_CHANNEL, service._drop_local)
+    service.bus.ensure_listening()
+    return service
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def editor_role(app):
+    permission = Permission(name='Edit documents', module='documents', action='edit')
+    role = Role(name='Editor', permissions=[permission])
+    db.session.add(role)
+    db.session.commit()
+    return role
+
+
+def test_role_change_invalidates_on_commit(make_user, editor_role):
+    user = make_user()
+    assert not permission_service.has_permission(user.id, 'documents', 'edit')
+    user.roles.append(editor_role)
+    db.session.commit()
+    assert permission_service.has_permission(user.id, 'documents', 'edit')
+
+
+def test_invalidation_reaches_other_workers():
+    broker = FakeBroker()
+    first, second = _worker(broker), _worker(broker)
+    assert _wait_for(lambda: len(broker.subscribers.get('sems:perm:invalidate', [])) == 2)
+    first.local.set(7, 'stale')
+    second.local.set(7, 'stale')
+    second.local.set(8, 'kept')
+
+    second.invalidate_users([7])
+
+    assert _wait_for(lambda: first.local.get(7) is None)
+    assert second.local.get(7) is None
+    assert second.local.get(8) == 'kept'
+
+
+def test_missed_messages_clear_the_local_cache():
+    service = PermissionService()
+    service.local.set(1, 'stale')
+    service._drop_local(None)
+    assert len(service.local) == 0
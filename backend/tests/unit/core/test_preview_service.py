@@ -0,0 +1,191 @@
+"""
+Preview job queue: enqueue, claiming, retries with backoff, stale jobs and the worker loop
+Rendering is replaced by an in-process stub, so no Pillow or render processes are needed
+"""
+
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select, update
+
+from app.core.models.preview_job import PreviewJob
+from app.core.services import preview_service as preview_module
+from app.core.services.file_service import file_service
+from app.core.services.preview_service import preview_service
+from app.core.utils.previews import UnsupportedPreview
+from database.connection import db
+
+CONTENT_HASH = 'ab' * 32
+
+
+def _job(content_hash=CONTENT_HASH):
+    return db.session.execute(
+        select(PreviewJob.status, PreviewJob.attempts, PreviewJob.available_at, PreviewJob.last_error)
+        .where(PreviewJob.content_hash == content_hash)
+    ).one()
+
+
+def _make_due(content_hash=CONTENT_HASH):
+    db.session.execute(
+        update(PreviewJob).where(PreviewJob.content_hash == content_hash)
+        .values(available_at=datetime.utcnow() - timedelta(seconds=1))
+    )
+    db.session.commit()
+
+
+@pytest.fixture
+def claimed(app):
+    """A job claimed by a worker (attempt 1)"""
+    preview_service.enqueue(CONTENT_HASH, 'image/png')
+    db.session.commit()
+    return preview_service.claim(1)[0]
+
+
+def test_enqueue_once_per_content(app):
+    preview_service.enqueue(CONTENT_HASH, 'image/png')
+    preview_service.enqueue(CONTENT_HASH, 'image/png')
+    preview_service.enqueue('cd' * 32, 'text/plain')
+    db.session.commit()
+    assert db.session.execute(select(PreviewJob.content_hash)).scalars().all() == [CONTENT_HASH]
+    assert preview_service.job_status(CONTENT_HASH) == PreviewJob.PENDING
+
+
+def test_claim_takes_due_jobs_once(app):
+    for content_hash in ('01' * 32, '02' * 32, '03' * 32):
+        preview_service.enqueue(content_hash, 'image/png')
+    db.session.commit()
+    db.session.execute(
+        update(PreviewJob).where(PreviewJob.content_hash == '03' * 32)
+        .values(available_at=datetime.utcnow() + timedelta(hours=1))
+    )
+    db.session.commit()
+
+    claimed = preview_service.claim(5)
+    assert sorted(job.content_hash for job in claimed) == ['01' * 32, '02' * 32]
+    assert all(job.attempts == 1 for job in claimed)
+    assert _job('01' * 32).status == PreviewJob.RUNNING
+    assert preview_service.claim(5) == []
+
+
+def test_finished_job(claimed):
+    preview_service._finish(claimed, render_seconds=0.1)
+    assert _job().status == PreviewJob.DONE
+
+
+def test_unsupported_content_is_not_retried(claimed):
+    preview_service._finish(claimed, UnsupportedPreview('cannot identify image file'))
+    job = _job()
+    assert (job.status, job.last_error) == (PreviewJob.UNSUPPORTED, 'cannot identify image file')
+
+
+def test_failures_back_off_then_fail(claimed):
+    job = claimed
+    for attempt in range(1, preview_service.max_attempts):
+        before = datetime.utcnow()
+        preview_service._finish(job, RuntimeError('decoder crashed'))
+        row = _job()
+        assert (row.status, row.attempts) == (PreviewJob.PENDING, attempt)
+        delay = preview_service.retry_delay * 2 ** (attempt - 1)
+        assert before + timedelta(seconds=delay) <= row.available_at <= datetime.utcnow() + timedelta(seconds=delay)
+        assert preview_service.claim(1) == []
+        _make_due()
+        job = preview_service.claim(1)[0]
+
+    preview_service._finish(job, RuntimeError('decoder crashed'))
+    row = _job()
+    assert (row.status, row.attempts) == (PreviewJob.FAILED, preview_service.max_attempts)
+    assert "RuntimeError('decoder crashed')" == row.last_error
+
+
+def test_stale_running_jobs_are_requeued(claimed):
+    stale = datetime.utcnow() - timedelta(seconds=preview_service.job_timeout + 1)
+    db.session.execute(update(PreviewJob).values(started_at=stale))
+    db.session.commit()
+    preview_service.requeue_stale()
+    assert (_job().status, _job().last_error) == (PreviewJob.PENDING, 'Worker timed out')
+
+
+def test_stale_jobs_out_of_attempts_fail(claimed):
+    stale = datetime.utcnow() - timedelta(seconds=preview_service.job_timeout + 1)
+    db.session.execute(update(PreviewJob).values(started_at=stale, attempts=preview_service.max_attempts))
+    db.session.commit()
+    preview_service.requeue_stale()
+    assert _job().status == PreviewJob.FAILED
+
+
+def test_running_jobs_within_the_timeout_are_left_alone(claimed):
+    preview_service.requeue_stale()
+    assert _job().status == PreviewJob.RUNNING
+
+
+def test_jobs_claimed_before_their_blob_is_placed_wait_without_using_an_attempt(claimed):
+    assert preview_service._defer_until_placed(claimed)
+    row = _job()
+    assert (row.status, row.attempts) == (PreviewJob.PENDING, 0)
+    assert row.available_at > datetime.utcnow()
+
+
+def test_blobs_missing_past_the_job_timeout_count_as_failures(claimed):
+    expired = SimpleNamespace(**dict(
+        claimed._asdict(), created_at=datetime.utcnow() - timedelta(seconds=preview_service.job_timeout)
+    ))
+    assert preview_service._defer_until_placed(expired)
+    row = _job()
+    assert (row.status, row.attempts) == (PreviewJob.PENDING, 1)
+    assert 'is missing' in row.last_error
+
+
+class TestWorker:
+    @pytest.fixture
+    def app_config(self, app_config, tmp_path):
+        # The worker thread needs its own connection, which an in-memory database cannot give it
+        return dict(app_config, SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'previews.db'}",
+                    PREVIEW_POLL_INTERVAL=0.01)
+
+    @pytest.fixture
+    def rendered(self, monkeypatch):
+        """Sources rendered by the stub, which writes each target file"""
+        sources = []
+
+        def _render(source, mime_type, targets):
+            sources.append(source)
+            for path in targets.values():
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as preview:
+                    preview.write(b'jpeg')
+
+        class _InProcessPool(ThreadPoolExecutor):
+            def __init__(self, workers, mp_context=None):
+                super().__init__(workers)
+
+        monkeypatch.setattr(preview_module, 'render_previews', _render)
+        monkeypatch.setattr(preview_module, 'ProcessPoolExecutor', _InProcessPool)
+        return sources
+
+    def test_worker_renders_uploaded_images(self, make_user, rendered):
+        upload = file_service.save_stream(make_user().id, io.BytesIO(b'png bytes'), 'photo.png', 'image/png')
+        content_hash = upload.content_hash
+        db.session.remove()
+
+        stop = threading.Event()
+        worker = threading.Thread(target=preview_service.run_worker, args=(stop,))
+        worker.start()
+        try:
+            deadline = time.monotonic() + 10
+            while _job(content_hash).status != PreviewJob.DONE:
+                assert time.monotonic() < deadline, 'preview job did not finish'
+                # A new transaction per poll sees the worker's commits
+                db.session.remove()
+                time.sleep(0.01)
+        finally:
+            stop.set()
+            worker.join(10)
+
+        assert rendered == [file_service.blob_path(content_hash)]
+        assert all(preview_service.preview_path(content_hash, size) for size in preview_service.sizes)
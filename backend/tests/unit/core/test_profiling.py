@@ -0,0 +1,32 @@
+"""
+Profile store retention and the collapsed stack format
+"""
+
+import time
+
+from app.core.utils.profiling import ProfileStore, collapsed
+
+
+def test_prune_keeps_the_newest_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=3)
+    ids = [store.save('GET /a', 0.01, {'main;handler': index + 1}) for index in range(5)]
+    store.prune()
+    assert sorted(profile_id for profile_id, _ in store._profiles()) == sorted(ids[-3:])
+
+
+def test_prune_drops_expired_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), retention=60)
+    store.save('GET /a', 0.01, {'main': 1})
+    store.retention = -1
+    store.prune()
+    assert store.summary() == {}
+
+
+def test_aggregate_sums_stacks_per_route(tmp_path):
+    store = ProfileStore(str(tmp_path))
+    store.save('GET /a', 0.01, {'main;handler': 2, 'main;render': 1})
+    store.save('GET /a', 0.02, {'main;handler': 3})
+    store.save('GET /b', 0.03, {'main;other': 4})
+    assert store.aggregate('GET /a') == {'main;handler': 5, 'main;render': 1}
+    assert store.aggregate(since=time.time() + 60) == {}
+    assert collapsed(store.aggregate('GET /a')) == 'main;handler 5\nmain;render 1\n'
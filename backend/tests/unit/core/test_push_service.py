@@ -0,0 +1,91 @@
+"""
+Push hub: fan-out to a user's streams, duplicate suppression, slow clients and stream tokens
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.core.services.push_service import (
+    PUSH_SUBSCRIBERS_DROPPED, PushHub, create_push_token, format_event, verify_push_token
+)
+
+
+@pytest.fixture
+def hub():
+    loop = asyncio.new_event_loop()
+    hub = PushHub()
+    hub.attach(loop, queue_size=4)
+    yield hub
+    hub.detach()
+    loop.close()
+
+
+def _drain(subscription):
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return events
+
+
+def test_events_fan_out_to_every_stream_of_the_recipient(hub):
+    first, second, other = hub.subscribe(1), hub.subscribe(1), hub.subscribe(2)
+    assert hub.connections == 3
+    hub.deliver(1, 10, {'title': 'Hello'})
+    expected = [format_event(10, {'title': 'Hello'})]
+    assert _drain(first) == expected
+    assert _drain(second) == expected
+    assert _drain(other) == []
+
+
+def test_events_are_delivered_once_per_stream(hub):
+    subscription = hub.subscribe(1)
+    hub.deliver(1, 10, {'title': 'Hello'})
+    hub.deliver(1, 10, {'title': 'Hello'})
+    assert len(_drain(subscription)) == 1
+
+
+def test_slow_streams_are_closed(hub):
+    subscription = hub.subscribe(1)
+    dropped = PUSH_SUBSCRIBERS_DROPPED._values.get((), 0)
+    for event_id in range(5):
+        hub.deliver(1, event_id, {})
+    assert subscription.overflowed
+    assert _drain(subscription) == [None]
+    assert PUSH_SUBSCRIBERS_DROPPED._values.get((), 0) == dropped + 1
+    hub.deliver(1, 99, {})
+    assert _drain(subscription) == []
+
+
+def test_unsubscribe(hub):
+    subscription = hub.subscribe(1)
+    hub.unsubscribe(subscription)
+    assert not hub.has_subscribers(1)
+    assert hub.connections == 0
+    hub.deliver(1, 10, {})
+    assert _drain(subscription) == []
+
+
+def test_publish_hands_events_to_the_loop_from_any_thread(hub):
+    subscription = hub.subscribe(1)
+    thread = threading.Thread(target=hub.publish, args=([(1, 10, {}), (2, 11, {})],))
+    thread.start()
+    thread.join()
+    assert _drain(subscription) == []
+    hub.loop.run_until_complete(asyncio.sleep(0))
+    assert _drain(subscription) == [format_event(10, {})]
+
+
+def test_publish_without_a_push_server_is_a_no_op():
+    hub = PushHub()
+    assert not hub.active
+    hub.publish([(1, 10, {})])
+
+
+def test_push_tokens():
+    token = create_push_token('secret', 42)
+    assert verify_push_token('secret', token, max_age=60) == 42
+    assert verify_push_token('other-secret', token, max_age=60) is None
+    assert verify_push_token('secret', token, max_age=-1) is None
+    assert verify_push_token('secret', 'not-a-token', max_age=60) is None
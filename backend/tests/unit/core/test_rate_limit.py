@@ -0,0 +1,204 @@
+"""
+Rate limiting: token bucket and sliding window counters, rules and the request hook
+"""
+
+import json
+import logging
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.middleware import rate_limit_middleware
+from app.core.middleware.rate_limit_middleware import RateLimitConfig, RateLimiter, RateLimitRule, rate_limiter
+from app.core.utils import rate_limit
+from app.core.utils.rate_limit import LocalRateLimitStore, RedisRateLimitStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time for the counter stores"""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(rate_limit, 'time', SimpleNamespace(monotonic=lambda: now.value, time=lambda: now.value))
+    return now
+
+
+def test_token_bucket_allows_bursts_then_refills(clock):
+    store = LocalRateLimitStore()
+    assert [store.token_bucket('k', 2, 3)[0] for _ in range(4)] == [True, True, True, False]
+    allowed, remaining, retry_after = store.token_bucket('k', 2, 3)
+    assert not allowed and remaining == 0 and retry_after == pytest.approx(0.5)
+
+    clock.value += 1.0
+    assert [store.token_bucket('k', 2, 3)[0] for _ in range(3)] == [True, True, False]
+    assert store.token_bucket('other', 2, 3)[0]
+
+
+def test_sliding_window_weighs_the_previous_window(clock):
+    clock.value = 1000.0  # Start of a 10 s window
+    store = LocalRateLimitStore()
+    assert [store.sliding_window('k', 3, 10)[0] for _ in range(4)] == [True, True, True, False]
+
+    clock.value = 1010.0  # Next window: the previous one still counts in full
+    allowed, _, retry_after = store.sliding_window('k', 3, 10)
+    assert not allowed and retry_after > 0
+
+    clock.value = 1015.0  # Half of it has slid out
+    assert store.sliding_window('k', 3, 10)[0]
+
+    clock.value = 1030.0  # Two windows later nothing is left
+    assert store.sliding_window('k', 3, 10)[1] == 2
+
+
+def test_store_stays_bounded(clock):
+    store = LocalRateLimitStore(shards=4, max_keys=40)
+    for index in range(1000):
+        store.token_bucket(f'k{index}', 1, 5)
+    assert len(store) <= 40
+
+
+class _FakeRedis:
+    """Just enough of a redis client to run the sliding window script, emulated in Python"""
+
+    def __init__(self):
+        self.values = {}
+
+    def register_script(self, source):
+        return self._sliding_window if source == rate_limit._SLIDING_WINDOW_SCRIPT else None
+
+    def _sliding_window(self, keys, args):
+        limit, weight, _ = args
+        current, previous = (self.values.get(key, 0) for key in keys)
+        if previous * weight + current < limit:
+            current = self.values[keys[0]] = current + 1
+            return [1, current, previous]
+        return [0, current, previous]
+
+
+def test_redis_sliding_window_does_not_count_refused_requests(clock):
+    client = _FakeRedis()
+    store = RedisRateLimitStore(client, prefix='')
+    clock.value = 1000.0
+    decisions = [store.sliding_window('k', 3, 10) for _ in range(5)]
+    assert [allowed for allowed, _, _ in decisions] == [True, True, True, False, False]
+    assert [remaining for _, remaining, _ in decisions[:3]] == [2, 1, 0]
+    assert client.values == {'k:100': 3}
+
+    clock.value = 1015.0  # Half of the previous window has slid out, as in LocalRateLimitStore
+    assert store.sliding_window('k', 3, 10)[0]
+
+
+class TestStoreOutage:
+    class _DownStore:
+        calls = 0
+
+        def sliding_window(self, key, limit, window):
+            self.calls += 1
+            raise ConnectionError('redis is down')
+
+    @pytest.fixture
+    def limiter(self, clock, monkeypatch):
+        monkeypatch.setattr(rate_limit_middleware, 'time', rate_limit.time)
+        limiter = RateLimiter()
+        limiter.store = self._DownStore()
+        limiter.store_cooldown = 10.0
+        return limiter
+
+    def test_falls_back_to_per_worker_limits_for_a_cooldown(self, limiter, clock, caplog):
+        rule = RateLimitRule({'name': 'r', 'algorithm': 'sliding_window', 'limit': 2, 'window': 60})
+        with caplog.at_level(logging.WARNING):
+            assert [limiter._check(rule, 'k')[0] for _ in range(3)] == [True, True, False]
+        # Only the first request waited on the failing store
+        assert limiter.store.calls == 1
+        assert caplog.text.count('Shared rate limit store unavailable') == 1
+
+        clock.value += 10.0
+        limiter._check(rule, 'k')
+        assert limiter.store.calls == 2
+
+
+@pytest.mark.parametrize('rule', [
+    {'name': 'r', 'algorithm': 'leaky_bucket'},
+    {'name': 'r', 'rate': 0},
+    {'name': 'r', 'algorithm': 'sliding_window', 'limit': 5, 'window': 0},
+    {'name': 'r', 'rate': 1, 'key': ['session']},
+    {'name': 'r', 'algorithm': 'sliding_window', 'window': 60},
+])
+def test_invalid_rules_are_rejected(rule):
+    with pytest.raises((ValueError, KeyError)):
+        RateLimitConfig({'rules': [rule]})
+
+
+def test_rules_match_routes_methods_and_exemptions():
+    config = RateLimitConfig({
+        'exempt': ['/api/health*'],
+        'rules': [
+            {'name': 'writes', 'paths': ['/api/files*'], 'methods': ['post'], 'rate': 1},
+            {'name': 'all', 'paths': ['/api/*'], 'rate': 10}
+        ]
+    })
+    assert [rule.name for rule in config.rules_for('/api/files/<int:upload_id>', 'POST')] == ['writes', 'all']
+    assert [rule.name for rule in config.rules_for('/api/files', 'GET')] == ['all']
+    assert config.rules_for('/api/health/ready', 'GET') == []
+
+
+def test_default_config_path_does_not_depend_on_the_working_directory(app_config, monkeypatch, tmp_path):
+    from app import create_app
+
+    monkeypatch.chdir(tmp_path)
+    create_app(dict(app_config, RATE_LIMIT_ENABLED=True, RATE_LIMIT_CONFIG='../security/rate_limiting.json'))
+    backend = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    assert os.path.normpath(rate_limiter.path) == os.path.join(os.path.dirname(backend), 'security', 'rate_limiting.json')
+    assert 'login' in [rule.name for rule in rate_limiter.config.rules]
+
+
+class TestRequests:
+    RULES = {
+        'exempt': ['/api/health/ready'],
+        'rules': [{'name': 'per-client', 'paths': ['/api/*'], 'key': ['ip'],
+                   'algorithm': 'sliding_window', 'limit': 2, 'window': 60}]
+    }
+
+    @pytest.fixture
+    def rules_file(self, tmp_path):
+        path = tmp_path / 'rate_limiting.json'
+        path.write_text(json.dumps(self.RULES))
+        return path
+
+    @pytest.fixture
+    def app_config(self, app_config, rules_file):
+        return dict(app_config, RATE_LIMIT_ENABLED=True, RATE_LIMIT_CONFIG=str(rules_file),
+                    RATE_LIMIT_RELOAD_INTERVAL=0, TRUSTED_PROXY_HOPS=1)
+
+    def _get(self, client, address='203.0.113.7', path='/api/health/live'):
+        return client.get(path, headers={'X-Forwarded-For': address})
+
+    def test_refuses_with_retry_after(self, client):
+        assert [self._get(client).status_code for _ in range(3)] == [200, 200, 429]
+        response = self._get(client)
+        assert int(response.headers['Retry-After']) >= 1
+        assert response.get_json()['rule'] == 'per-client'
+        # Clients behind the same proxy are counted apart
+        assert self._get(client, '203.0.113.8').status_code == 200
+        assert self._get(client, path='/api/health/ready').status_code == 200
+
+    def test_reports_remaining_requests(self, client):
+        response = self._get(client)
+        assert response.headers['RateLimit-Limit'] == '2'
+        assert response.headers['RateLimit-Remaining'] == '1'
+
+    def test_reloads_changed_rules_and_keeps_them_when_invalid(self, client, rules_file):
+        rules = dict(self.RULES, rules=[dict(self.RULES['rules'][0], limit=1)])
+        rules_file.write_text(json.dumps(rules))
+        os.utime(rules_file, ns=(0, os.stat(rules_file).st_mtime_ns + 10 ** 9))
+        assert [self._get(client).status_code for _ in range(2)] == [200, 429]
+
+        rules_file.write_text('{"rules": [')
+        os.utime(rules_file, ns=(0, os.stat(rules_file).st_mtime_ns + 10 ** 9))
+        assert self._get(client).status_code == 429
+
+    def test_missing_file_disables_limits_and_logs_an_error(self, client, rules_file, caplog):
+        rules_file.unlink()
+        with caplog.at_level(logging.ERROR):
+            assert [self._get(client).status_code for _ in range(3)] == [200, 200, 200]
+        assert 'does not exist' in caplog.text
@@ -1,4 +1,125 @@
-# test_repositories.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+Repository list queries: a fixed number of statements however many rows are listed
+"""
 
+from datetime import datetime, timedelta
 
+import pytest
+
+from app.core.models.audit_log import AuditLog
+from app.core.models.role import Role
+from app.core.repositories import AuditRepository, UserRepository
+from database.connection import db
+
+
+@pytest.fixture
+def users_with_roles(make_user):
+    roles = [Role(name='Technician'), Role(name='Teacher')]
+    db.session.add_all(roles)
+    db.session.commit()
+    return [make_user(roles=roles) for _ in range(25)]
+
+
+@pytest.fixture
+def audit_entries(make_user, tenant):
+    users = [make_user() for _ in range(5)]
+    AuditLog.bulk_insert([
+        {'tenant_id': tenant.id, 'user_id': users[i % 5].id, 'action': 'update',
+         'resource_type': 'User', 'resource_id': i}
+        for i in range(40)
+    ])
+    identities = [(user.id, user.email) for user in users]
+    db.session.expunge_all()
+    return identities
+
+
+@pytest.fixture
+def dated_entries(make_user, tenant):
+    """30 entries an hour apart in pairs (equal created_at), alternating between two users"""
+    users = [make_user().id for _ in range(2)]
+    start = datetime(2026, 1, 1)
+    AuditLog.bulk_insert([
+        {'tenant_id': tenant.id, 'user_id': users[i % 2], 'action': 'create' if i % 3 == 0 else 'update',
+         'resource_type': 'Asset', 'resource_id': i, 'created_at': start + timedelta(hours=i // 2)}
+        for i in range(30)
+    ])
+    db.session.expunge_all()
+    return users, start
+
+
+def test_user_listing_preloads_roles(users_with_roles, assert_max_queries):
+    db.session.expunge_all()
+    with assert_max_queries(2):
+        listed = UserRepository().list_dicts()
+    assert len(listed) == 25
+    assert all(sorted(user['roles']) == ['Teacher', 'Technician'] for user in listed)
+
+
+def test_user_listing_for_tenant(users_with_roles, tenant, assert_max_queries):
+    tenant_id = tenant.id
+    db.session.expunge_all()
+    with assert_max_queries(2):
+        listed = [user.to_dict() for user in UserRepository().list_for_tenant(tenant_id, limit=10)]
+    assert len(listed) == 10
+    assert all(user['roles'] for user in listed)
+
+
+def test_user_rows_skip_excluded_columns(users_with_roles, assert_max_queries):
+    with assert_max_queries(1):
+        rows = UserRepository().list_rows()
+    assert len(rows) == 25
+    assert 'password_hash' not in rows[0]
+
+
+def test_audit_listing_joins_users(audit_entries, assert_max_queries):
+    with assert_max_queries(1):
+        listed = AuditRepository().list_dicts()
+    assert len(listed) == 40
+    assert all(entry['user_email'].endswith('@example.com') for entry in listed)
+
+
+def test_audit_listing_for_user(audit_entries, assert_max_queries):
+    user_id, email = audit_entries[0]
+    with assert_max_queries(1):
+        listed = [entry.to_dict() for entry in AuditRepository().list_for_user(user_id)]
+    assert len(listed) == 8
+    assert {entry['user_email'] for entry in listed} == {email}
+
+
+def test_audit_search_pages_through_every_match_newest_first(dated_entries, assert_max_queries):
+    pages, cursor = [], None
+    with assert_max_queries(4):
+        while True:
+            page = AuditRepository().search(resource_type='Asset', cursor=cursor, limit=8)
+            pages.append([(entry.created_at, entry.id) for entry in page.items])
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+    assert [len(items) for items in pages] == [8, 8, 8, 6]
+    keys = [key for items in pages for key in items]
+    assert keys == sorted(keys, reverse=True)
+    assert len(set(keys)) == 30
+
+
+def test_audit_search_filters(dated_entries):
+    (first_user, _), start = dated_entries
+    repository = AuditRepository()
+    assert len(repository.search(user_id=first_user).items) == 15
+    assert len(repository.search(action='create').items) == 10
+    assert [entry.resource_id for entry in repository.search(resource_type='Asset', resource_id=7).items] == [7]
+    assert repository.search(resource_type='User').items == []
+
+    window = repository.search(since=start + timedelta(hours=2), until=start + timedelta(hours=4)).items
+    assert sorted(entry.resource_id for entry in window) == [4, 5, 6, 7]
+
+
+def test_audit_search_rejects_a_malformed_cursor(dated_entries):
+    with pytest.raises(ValueError):
+        AuditRepository().search(cursor='not-a-cursor')
+
+
+def test_query_budget_fails_when_exceeded(app, assert_max_queries):
+    with pytest.raises(AssertionError, match='Expected at most 1 queries, got 2'):
+        with assert_max_queries(1):
+            UserRepository().list()
+            AuditRepository().list()
@@ -0,0 +1,85 @@
+"""
+Read-replica routing: replica_reads() SELECTs go to a healthy replica, writes stay on the primary
+"""
+
+import pytest
+
+from app.core.models.tenant import Tenant
+from database.connection import db
+from database.routing import replica_reads, router
+
+
+@pytest.fixture
+def app_config(app_config, tmp_path):
+    return dict(
+        app_config,
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'primary.db'}",
+        DATABASE_REPLICA_URLS=[f"sqlite:///{tmp_path / 'replica.db'}"],
+        DB_REPLICA_CHECK_INTERVAL=0
+    )
+
+
+@pytest.fixture
+def replica(app):
+    """The replica engine, holding one tenant the primary does not have"""
+    engine = db.engines['replica_0']
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(Tenant.__table__.insert(), {'name': 'Replica only', 'slug': 'replica-only'})
+    yield engine
+    db.metadata.drop_all(engine)
+
+
+def _replica_only_count():
+    return Tenant.query.filter_by(slug='replica-only').count()
+
+
+def test_reads_go_to_the_replica_only_inside_replica_reads(replica):
+    assert _replica_only_count() == 0
+    with replica_reads(db.session):
+        assert _replica_only_count() == 1
+    assert _replica_only_count() == 0
+
+
+def test_writes_and_later_reads_stay_on_the_primary(replica):
+    with replica_reads(db.session):
+        db.session.add(Tenant(name='Written', slug='written'))
+        db.session.flush()
+        # Read-your-writes: the session has flushed, so this SELECT is not sent to the replica
+        assert Tenant.query.filter_by(slug='written').count() == 1
+        assert _replica_only_count() == 0
+    db.session.commit()
+
+    with replica.connect() as connection:
+        assert connection.execute(Tenant.__table__.select().where(Tenant.slug == 'written')).first() is None
+    # A new session (the next request) reads from the replica again
+    db.session.remove()
+    with replica_reads(db.session):
+        assert _replica_only_count() == 1
+
+
+def test_unreachable_replica_falls_back_to_the_primary(replica, monkeypatch, caplog):
+    def _fail(connection):
+        raise ConnectionError('replica down')
+
+    monkeypatch.setattr(router, '_lag', _fail)
+    with replica_reads(db.session):
+        assert _replica_only_count() == 0
+    assert 'is unavailable, reading from primary' in caplog.text
+
+
+def test_lagging_replica_falls_back_to_the_primary(app, replica, monkeypatch, caplog):
+    monkeypatch.setattr(router, '_lag', lambda connection: app.config['DB_REPLICA_MAX_LAG'] + 1)
+    with replica_reads(db.session):
+        assert _replica_only_count() == 0
+    assert 'behind, reading from primary' in caplog.text
+
+
+def test_health_is_cached_for_the_check_interval(app, replica, monkeypatch):
+    app.config['DB_REPLICA_CHECK_INTERVAL'] = 60
+    probes = []
+    monkeypatch.setattr(router, '_lag', lambda connection: probes.append(connection) or 0)
+    router._health.pop(replica, None)
+    for _ in range(3):
+        assert router.is_healthy(replica) is True
+    assert len(probes) == 1
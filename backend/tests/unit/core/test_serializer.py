@@ -0,0 +1,80 @@
+"""
+Compiled model serializers: field projection, exclusions and parity with to_dict()
+"""
+
+import pytest
+
+from app.core.models.role import Role
+from app.core.models.serializer import ModelSerializer, dumps, get_serializer, parse_fields
+from app.core.models.user import User
+from app.core.repositories import UserRepository
+from database.connection import db
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, None),
+    ('', None),
+    ('id,email', ('id', 'email')),
+    (' id , email ,, ', ('id', 'email')),
+])
+def test_parse_fields(value, expected):
+    assert parse_fields(value) == expected
+
+
+def test_password_hash_is_never_serialized(app):
+    assert 'password_hash' not in ModelSerializer(User).fields
+    with pytest.raises(ValueError, match='password_hash'):
+        ModelSerializer(User, ('id', 'password_hash'))
+
+
+def test_unknown_fields_are_rejected(app):
+    with pytest.raises(ValueError, match='Unknown fields for User: nickname'):
+        ModelSerializer(User, ('id', 'nickname'))
+
+
+def test_relationships_are_not_serializer_fields(app):
+    # roles are emitted by to_dict() only; the serializer covers columns
+    with pytest.raises(ValueError, match='roles'):
+        ModelSerializer(User, ('id', 'roles'))
+
+
+def test_field_selection(app, make_user):
+    user = make_user(email='picked@example.com')
+    serializer = ModelSerializer(User, ('id', 'email'))
+    assert serializer.serialize([user]) == [{'id': user.id, 'email': 'picked@example.com'}]
+    rows = db.session.execute(serializer.select()).all()
+    assert serializer.serialize_rows(rows) == [{'id': user.id, 'email': 'picked@example.com'}]
+
+
+def test_instances_and_rows_match_to_dict(app, make_user):
+    user = make_user()
+    user.update_last_login()
+    expected = {key: value for key, value in user.to_dict().items() if key != 'roles'}
+
+    serializer = ModelSerializer(User)
+    assert serializer.serialize([user]) == [expected]
+    rows = db.session.execute(serializer.select()).all()
+    assert serializer.serialize_rows(rows) == [expected]
+
+
+def test_to_dict_serializes_relationships(app, make_user):
+    roles = [Role(name='Technician'), Role(name='Teacher')]
+    db.session.add_all(roles)
+    db.session.commit()
+    make_user(roles=roles)
+    db.session.expunge_all()
+
+    listed = UserRepository().list_dicts()
+    assert sorted(listed[0]['roles']) == ['Teacher', 'Technician']
+    projected = UserRepository().list_rows(fields=('id', 'email'))
+    assert projected == [{'id': listed[0]['id'], 'email': listed[0]['email']}]
+
+
+def test_serializers_are_cached_per_projection(app):
+    assert get_serializer(User) is get_serializer(User)
+    assert User.serializer(['id']) is get_serializer(User, ('id',))
+    assert User.serializer(['id']) is not User.serializer()
+
+
+def test_dumps_is_compact_json():
+    assert dumps({'id': 1, 'email': None}) == b'{"id":1,"email":null}'
@@ -0,0 +1,131 @@
+"""
+Slow query log: statement fingerprints, parameter shapes and which fingerprints get an EXPLAIN plan
+"""
+
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.models.user import User
+from database.connection import SlowQueryLog, fingerprint_sql, parameter_shape, slow_query_log
+
+
+@pytest.mark.parametrize('statement, expected', [
+    ("SELECT * FROM users WHERE id = 42 AND email = 'a@b.test'",
+     'SELECT * FROM users WHERE id = ? AND email = ?'),
+    ('SELECT * FROM users WHERE id = %(id_1)s OR id = %s OR id = :id OR id = $1',
+     'SELECT * FROM users WHERE id = ? OR id = ? OR id = ? OR id = ?'),
+    ('SELECT *\n  FROM users\n WHERE id IN (1, 2, 3)', 'SELECT * FROM users WHERE id IN (...)'),
+    ('SELECT * FROM users WHERE id in (?)', 'SELECT * FROM users WHERE id IN (...)'),
+    ('INSERT INTO tags (name, rank) VALUES (?, ?), (?, ?), (?, ?)', 'INSERT INTO tags (name, rank) VALUES (?, ?), ...'),
+    ("SELECT created_at::date, '2024-01-01'::timestamp FROM users", 'SELECT created_at::date, ?::timestamp FROM users'),
+    ("SELECT * FROM users WHERE last_name = 'O''Brien' AND id = 7", 'SELECT * FROM users WHERE last_name = ? AND id = ?'),
+])
+def test_fingerprints_drop_values(statement, expected):
+    assert fingerprint_sql(statement) == expected
+
+
+def test_statements_differing_only_in_values_share_a_fingerprint():
+    assert fingerprint_sql('SELECT * FROM t WHERE id IN (1, 2)') == fingerprint_sql('SELECT * FROM t WHERE id IN (?, ?, ?)')
+    # Digits inside identifiers are not literals
+    assert fingerprint_sql('SELECT * FROM audit_logs_2024_01') == 'SELECT * FROM audit_logs_2024_01'
+
+
+@pytest.mark.parametrize('parameters, executemany, expected', [
+    ((1, 2, 3, 'a'), False, '(int×3, str)'),
+    ((), False, '()'),
+    (None, False, '()'),
+    ({'email': 'a@b.test', 'ids': [1, 2, 3]}, False, '{email: str, ids: list[3]}'),
+    ([(1, 'a'), (2, 'b')], True, '2× (int, str)'),
+    ([], True, '[]'),
+])
+def test_parameter_shapes_never_include_values(parameters, executemany, expected):
+    assert parameter_shape(parameters, executemany) == expected
+
+
+def _log(explain_top=2):
+    log = SlowQueryLog()
+    log.enabled, log.threshold, log.explain_top = True, 0.1, explain_top
+    return log
+
+
+def _stats(log, statement, max_seconds, planned=False):
+    key, fingerprint = log._fingerprint(statement)
+    log.record(None, statement, (), True, max_seconds)  # executemany: recorded without queueing an EXPLAIN
+    stats = log._stats[key]
+    if planned:
+        stats.plan = {'lines': []}
+    return key, stats
+
+
+class TestPlanSelection:
+    def test_only_reads_are_explained(self):
+        log = _log()
+        assert log._wants_plan(*_stats(log, 'SELECT * FROM a', 1.0))
+        assert log._wants_plan(*_stats(log, 'WITH x AS (SELECT 1) SELECT * FROM x', 1.0))
+        assert not log._wants_plan(*_stats(log, 'UPDATE a SET b = 1', 1.0))
+        disabled = _log(explain_top=0)
+        assert not disabled._wants_plan(*_stats(disabled, 'SELECT * FROM a', 1.0))
+
+    def test_planned_and_pending_fingerprints_are_not_explained_again(self):
+        log = _log()
+        assert not log._wants_plan(*_stats(log, 'SELECT * FROM a', 1.0, planned=True))
+        key, stats = _stats(log, 'SELECT * FROM b', 1.0)
+        log._explain_pending.add(key)
+        assert not log._wants_plan(key, stats)
+
+    def test_a_slower_fingerprint_replaces_the_fastest_plan_when_full(self):
+        log = _log(explain_top=2)
+        _, fast = _stats(log, 'SELECT * FROM fast', 0.2, planned=True)
+        _, slow = _stats(log, 'SELECT * FROM slow', 0.9, planned=True)
+
+        assert not log._wants_plan(*_stats(log, 'SELECT * FROM faster', 0.15))
+        assert fast.plan is not None
+
+        assert log._wants_plan(*_stats(log, 'SELECT * FROM slower', 0.5))
+        assert fast.plan is None
+        assert slow.plan is not None
+
+
+def test_slow_selects_get_their_plan_captured_on_sqlite(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'plans.db'}")
+    with engine.begin() as connection:
+        connection.execute(text('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)'))
+    log = _log()
+    statement = 'SELECT name FROM items WHERE id = ?'
+    log.record(engine, statement, (1,), False, 0.5)
+    key, _ = log._fingerprint(statement)
+
+    deadline = time.monotonic() + 5
+    while log._stats[key].plan is None:
+        assert time.monotonic() < deadline, 'EXPLAIN was not captured'
+        time.sleep(0.01)
+    plan = log.report()['queries'][0]['plan']
+    assert any('items' in line for line in plan['lines'])
+    assert log._explain_pending == set()
+    engine.dispose()
+
+
+class TestListener:
+    @pytest.fixture
+    def app_config(self, app_config):
+        return dict(app_config, SLOW_QUERY_LOG_ENABLED=True, SLOW_QUERY_THRESHOLD=0, SLOW_QUERY_EXPLAIN_TOP=0)
+
+    @pytest.fixture(autouse=True)
+    def fresh_log(self, app):
+        slow_query_log.reset()
+        yield
+        slow_query_log.enabled = False
+        slow_query_log.reset()
+
+    def test_statements_are_attributed_to_their_caller(self, make_user):
+        make_user()
+        User.query.filter_by(email='nobody@example.test').first()
+        report = slow_query_log.report(limit=100)
+        assert report['enabled']
+        query = next(query for query in report['queries']
+                     if query['fingerprint'].startswith('SELECT') and 'users.email = ?' in query['fingerprint'])
+        assert query['slow_count'] == query['count'] >= 1
+        assert 'nobody@example.test' not in str(query)
+        assert any('test_slow_query_log.py' in caller for caller in query['callers'])
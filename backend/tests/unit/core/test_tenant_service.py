@@ -1,4 +1,161 @@
-# test_tenant_service.py - Smart Enterprise Management System
-# Auto-generated placeholder file
+"""
+Tenant sharding: slug -> shard binding, idempotent provisioning and isolation between shards
+Shards are SQLite files under the test's temporary directory
+"""
 
+import os
+import subprocess
+import sys
 
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from app.core.models.audit_log import AuditLog
+from app.core.models.role import Role
+from app.core.models.tenant import Tenant
+from app.core.models.tenant_owned import tenant_scope
+from app.core.models.user import User
+from app.core.services.audit_service import audit_writer
+from app.core.services.tenant_service import tenant_shards
+from database.connection import db
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def _shard_url(directory):
+    return f"sqlite:///{directory / '{slug}.db'}"
+
+
+@pytest.fixture
+def app_config(app_config, tmp_path):
+    return dict(app_config, TENANT_SHARDING='database', TENANT_SHARD_URL=_shard_url(tmp_path / 'tenants'))
+
+
+@pytest.fixture
+def shards(app, tenant):
+    """Provisioned shards for 'acme' and 'globex'"""
+    globex = Tenant(name='Globex', slug='globex')
+    globex.save()
+    tenant_shards.provision(tenant)
+    tenant_shards.provision(globex)
+    yield {'acme': tenant.id, 'globex': globex.id}
+    tenant_shards.dispose_all()
+
+
+def _count(model, slug=None):
+    engine = db.engine if slug is None else tenant_shards.engine_for(tenant_shards.shard_for(slug))
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(model.__table__)).scalar()
+
+
+def _add_user(slug, tenant_id, email):
+    with tenant_shards.bound(db.session, slug), tenant_scope(db.session, tenant_id):
+        user = User(email=email, first_name='Shard', last_name='User')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.flush()
+        # Read before committing: a refresh afterwards would open a read transaction on the shard
+        user_id = user.id
+        db.session.commit()
+        return user_id
+
+
+def test_shards_are_named_by_slug(app, tmp_path):
+    shard = tenant_shards.shard_for('acme')
+    assert shard.url == f"sqlite:///{tmp_path / 'tenants' / 'acme.db'}"
+    assert shard.schema is None
+
+
+def test_tenant_shard_override_is_relative_to_the_instance_folder(app):
+    Tenant(name='Big', slug='big', shard='sqlite:///big/tenant.db').save()
+    assert tenant_shards.shard_for('big').url == f"sqlite:///{os.path.join(app.instance_path, 'big', 'tenant.db')}"
+
+
+def test_shard_mappings_are_cached_until_tenants_change(app, tenant, assert_max_queries):
+    tenant_shards.shard_for('acme')
+    with assert_max_queries(0):
+        tenant_shards.shard_for('acme')
+    tenant.shard = 'sqlite:///moved.db'
+    db.session.commit()
+    assert tenant_shards.shard_for('acme').url.endswith('moved.db')
+
+
+def test_provisioning_is_idempotent(shards, tenant):
+    tenant_shards.provision(tenant)
+    assert _count(Tenant, 'acme') == 1
+    with tenant_shards.bound(db.session, 'acme'):
+        assert Tenant.query.one().slug == 'acme'
+
+
+def test_shards_are_isolated(shards):
+    _add_user('acme', shards['acme'], 'a@acme.test')
+    _add_user('globex', shards['globex'], 'g@globex.test')
+    with tenant_shards.bound(db.session, 'acme'):
+        assert [user.email for user in User.query] == ['a@acme.test']
+    with tenant_shards.bound(db.session, 'globex'):
+        assert [user.email for user in User.query] == ['g@globex.test']
+    assert _count(User) == 0
+
+
+def test_requests_are_bound_to_their_tenant_shard(shards, client):
+    _add_user('acme', shards['acme'], 'a@acme.test')
+    credentials = {'email': 'a@acme.test', 'password': 'secret'}
+    assert client.post('/api/auth/login', json=credentials, headers={'X-Tenant': 'globex'}).status_code == 401
+    # Requests share the fixture's app context here; in production each starts with a fresh session
+    db.session.remove()
+    assert client.post('/api/auth/login', json=credentials, headers={'X-Tenant': 'acme'}).status_code == 200
+
+
+def test_least_recently_used_engines_are_disposed(shards, monkeypatch):
+    tenant_shards.dispose_all()
+    monkeypatch.setattr(tenant_shards, 'max_engines', 1)
+    acme = tenant_shards.engine_for(tenant_shards.shard_for('acme'))
+    tenant_shards.engine_for(tenant_shards.shard_for('globex'))
+    assert list(tenant_shards._engines) == [tenant_shards.shard_for('globex').url]
+    assert tenant_shards.engine_for(tenant_shards.shard_for('acme')) is not acme
+
+
+def test_audit_events_are_written_to_the_tenant_shard(shards):
+    user_id = _add_user('acme', shards['acme'], 'a@acme.test')
+    audit_writer.record('login', user_id, tenant_id=shards['acme'])
+    with tenant_shards.bound(db.session, 'acme'):
+        assert [(entry.action, entry.user.email) for entry in AuditLog.query] == [('login', 'a@acme.test')]
+    assert _count(AuditLog) == 0
+    assert _count(AuditLog, 'globex') == 0
+
+
+def test_create_tenant_script_is_idempotent(tmp_path):
+    import app.core.models  # noqa: F401  (registers every table on db.metadata)
+
+    catalog_url = f"sqlite:///{tmp_path / 'catalog.db'}"
+    catalog = create_engine(catalog_url)
+    db.metadata.create_all(catalog)
+    env = dict(
+        os.environ,
+        DATABASE_URL=catalog_url,
+        TENANT_SHARDING='database',
+        TENANT_SHARD_URL=_shard_url(tmp_path / 'tenants'),
+        PASSWORD_HASH_METHOD='pbkdf2:sha256:1000'
+    )
+    command = [sys.executable, os.path.join('scripts', 'create_tenant.py'), 'initech', '--name', 'Initech',
+               '--admin-email', 'admin@initech.test', '--admin-password', 'change-me']
+
+    outputs = []
+    for _ in range(2):
+        result = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120)
+        assert result.returncode == 0, result.stderr
+        outputs.append(result.stdout)
+    assert 'Tenant initech created' in outputs[0]
+    assert 'Tenant initech already exists' in outputs[1]
+    assert 'Administrator admin@initech.test created' not in outputs[1]
+
+    shard = create_engine(_shard_url(tmp_path / 'tenants').format(slug='initech'))
+    with catalog.connect() as connection:
+        assert connection.execute(select(func.count()).select_from(Tenant.__table__)).scalar() == 1
+        assert connection.execute(select(func.count()).select_from(User.__table__)).scalar() == 0
+    with shard.connect() as connection:
+        for model, expected in ((Tenant, 1), (User, 1)):
+            assert connection.execute(select(func.count()).select_from(model.__table__)).scalar() == expected
+        assert connection.execute(select(func.count()).select_from(Role.__table__)).scalar() > 0
+    catalog.dispose()
+    shard.dispose()
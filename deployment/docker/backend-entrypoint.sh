@@ -0,0 +1,11 @@
+#!/bin/sh
+# Smart Enterprise Management System - Backend container entrypoint
+# Creates any missing tables before starting the server (create_app runs no DDL).
+# Set DB_BOOTSTRAP=false where something else runs it, e.g. the Kubernetes initContainer.
+set -e
+
+if [ "${DB_BOOTSTRAP:-true}" = "true" ]; then
+    flask --app app db-bootstrap
+fi
+
+exec "$@"
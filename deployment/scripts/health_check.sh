@@ -1,2 +1,27 @@
-Placeholder content for health_check.sh
+#!/usr/bin/env bash
+# Smart Enterprise Management System - deployment health check
+# Usage: health_check.sh [base_url] [retries]
+#   Waits for liveness, then requires readiness (database, uploads, cache).
 
+set -euo pipefail
+
+BASE_URL="${1:-http://localhost:5001}"
+RETRIES="${2:-10}"
+
+for attempt in $(seq 1 "$RETRIES"); do
+    if curl -fsS --max-time 2 "$BASE_URL/api/health/live" > /dev/null; then
+        break
+    fi
+    if [ "$attempt" -eq "$RETRIES" ]; then
+        echo "❌ Backend is not responding at $BASE_URL"
+        exit 1
+    fi
+    sleep 2
+done
+
+if ! response=$(curl -fsS --max-time 5 "$BASE_URL/api/health/ready"); then
+    echo "❌ Backend is alive but not ready: ${response:-no response}"
+    exit 1
+fi
+
+echo "✅ Backend is ready: $response"